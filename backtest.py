@@ -43,7 +43,7 @@ async def run_backtest(args):
         start_date = end_date - timedelta(days=args.days)
         
         # Check if we have cached data
-        cache_file = f"xrp_usdt_{args.timeframe}_{args.days}d.csv"
+        cache_file = f"xrp_usdt_{args.timeframe}_{args.days}d.parquet"
         
         if args.use_cache:
             historical_data = await data_fetcher.load_data(cache_file)
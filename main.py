@@ -8,6 +8,7 @@ from src.config.settings import get_settings
 from src.bot.trading_bot import TradingBot
 from src.strategies.simple_momentum import SimpleMomentumStrategy
 from src.utils.logger import setup_logger
+from src.utils.event_loop import use_uvloop
 
 
 class BotManager:
@@ -79,6 +80,7 @@ if __name__ == "__main__":
         sys.exit(1)
     
     # Run the bot
+    use_uvloop()
     try:
         asyncio.run(main())
     except Exception as e:
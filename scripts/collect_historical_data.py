@@ -5,6 +5,7 @@ Script to collect historical DEX and AMM data from XRPL
 
 import asyncio
 import argparse
+import time
 from datetime import datetime, timedelta
 import sys
 import os
@@ -34,7 +35,7 @@ async def collect_dex_data(days: int = 180):
         
         # Log pairs we'll fetch
         for pair in pairs:
-            logger.info(f"  - {pair['symbol']}: {pair['type']}")
+            logger.info(f"  - {pair.symbol}: {pair.kind}")
         
         # Fetch historical data for all pairs
         logger.info(f"Fetching {days} days of historical data...")
@@ -68,19 +69,29 @@ async def collect_amm_data(hours: int = 24, interval_minutes: int = 5):
     try:
         await fetcher.connect()
         
-        # Get current state of all AMM pools
+        # Get current state of all AMM pools, with requests pipelined over
+        # the connection instead of one round-trip per pool
         logger.info("Fetching current AMM pool states...")
+        semaphore = asyncio.Semaphore(8)
         
-        for token_name, token_info in fetcher.tokens.items():
+        async def pool_metrics(amm_address: str):
+            async with semaphore:
+                return await fetcher.calculate_pool_metrics(amm_address)
+        
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(pool_metrics(token_info["amm_address"]) for token_info in fetcher.tokens.values()),
+            return_exceptions=True
+        )
+        logger.info(f"Fetched {len(results)} pools in {time.perf_counter() - started:.2f}s")
+        
+        for (token_name, token_info), metrics in zip(fetcher.tokens.items(), results):
             logger.info(f"\n{token_name} AMM Pool:")
-            
-            # Get pool info
-            amm_info = await fetcher.get_amm_info(token_info["amm_address"])
             logger.info(f"  AMM Address: {token_info['amm_address']}")
             
-            # Get pool metrics
-            metrics = await fetcher.calculate_pool_metrics(token_info["amm_address"])
-            if metrics:
+            if isinstance(metrics, Exception):
+                logger.error(f"  Failed to fetch pool metrics: {metrics}")
+            elif metrics:
                 logger.info(f"  Price: {metrics['price']:.6f} XRP per {token_name}")
                 logger.info(f"  XRP Reserve: {metrics['xrp_reserve']:,.2f}")
                 logger.info(f"  Token Reserve: {metrics['token_reserve']:,.2f}")
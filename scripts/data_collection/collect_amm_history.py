@@ -232,6 +232,7 @@ class AMMHistoryCollector:
                 # Small delay between chunks
                 await asyncio.sleep(0.5)
                 
+            await self.storage.flush_all()
             logger.success(f"Completed {token_name}: {total_transactions} transactions, {self.processed_count} snapshots stored")
             
         except Exception as e:
@@ -236,6 +236,7 @@ class EfficientAMMCollector:
                     if total_changes % 10 == 0:
                         logger.info(f"Stored {total_changes} state changes...")
                         
+            await self.storage.flush_all()
             logger.success(f"Completed {token_name}: Found {total_changes} AMM state changes from {len(all_transactions)} transactions")
             self.processed_count += total_changes
             
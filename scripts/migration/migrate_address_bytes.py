@@ -0,0 +1,76 @@
+"""
+Add 20-byte AccountID columns next to account address strings
+
+Joins, filters and group-bys on accounts and AMM pools use the fixed-width
+byte keys; the base58 strings are kept for display.
+"""
+
+from sqlalchemy import create_engine, text
+from src.config.settings import get_settings
+from src.database.models import AMM_POOL_STATES_VIEW, address_bytes
+
+
+# table -> (address column, bytes column)
+ADDRESS_COLUMNS = {
+    "dex_trades": ("account", "account_bytes"),
+    "token_transactions": ("wallet_address", "wallet_address_bytes"),
+    "amm_snapshots": ("amm_address", "amm_address_bytes"),
+}
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_dex_account ON dex_trades (account_bytes, timestamp)",
+    "DROP INDEX IF EXISTS idx_token_tx_wallet",
+    "CREATE INDEX idx_token_tx_wallet ON token_transactions (wallet_address_bytes, timestamp)",
+    "DROP INDEX IF EXISTS ix_token_transactions_wallet_address",
+    "DROP INDEX IF EXISTS idx_amm_snapshot",
+    "CREATE INDEX idx_amm_snapshot ON amm_snapshots (amm_address_bytes, timestamp)",
+]
+
+
+def migrate_database():
+    """Add and backfill address byte columns, then rebuild the indexes on them"""
+    settings = get_settings()
+    engine = create_engine(settings.database_url)
+    
+    print("Migrating address columns to byte keys...")
+    
+    try:
+        with engine.connect() as conn:
+            for table, (column, bytes_column) in ADDRESS_COLUMNS.items():
+                conn.execute(text(
+                    f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {bytes_column} BYTEA"
+                ))
+                
+                # Decode once per distinct address rather than per row
+                addresses = conn.execute(text(
+                    f"SELECT DISTINCT {column} FROM {table} "
+                    f"WHERE {bytes_column} IS NULL AND {column} IS NOT NULL"
+                )).scalars().all()
+                params = [
+                    {"address": address, "raw": address_bytes(address)}
+                    for address in addresses
+                ]
+                if params:
+                    conn.execute(text(
+                        f"UPDATE {table} SET {bytes_column} = :raw WHERE {column} = :address"
+                    ), params)
+                print(f"✓ Backfilled {table}.{bytes_column} for {len(params)} addresses")
+            
+            for statement in INDEXES:
+                conn.execute(text(statement))
+            print("✓ Rebuilt address indexes on byte columns")
+            
+            conn.execute(text(AMM_POOL_STATES_VIEW))
+            print("✓ Refreshed amm_pool_states view")
+            
+            conn.commit()
+            
+        print("\n✓ Database migration complete!")
+        
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        print("\nYou may need to manually update the schema or drop/recreate the table")
+
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,82 @@
+"""
+Fold amm_pool_states into amm_snapshots
+
+amm_snapshots is the canonical AMM history table. Rows from the retired
+amm_pool_states table are copied over, the table is dropped and replaced by
+a view with the same columns.
+"""
+
+from sqlalchemy import create_engine, text
+from src.config.settings import get_settings
+from src.database.models import AMM_POOL_STATES_VIEW
+
+
+def migrate_database():
+    """Backfill amm_snapshots from amm_pool_states and swap the table for a view"""
+    settings = get_settings()
+    engine = create_engine(settings.database_url)
+    
+    print("Folding amm_pool_states into amm_snapshots...")
+    
+    try:
+        with engine.connect() as conn:
+            is_table = conn.execute(text(
+                "SELECT 1 FROM information_schema.tables "
+                "WHERE table_name = 'amm_pool_states' AND table_type = 'BASE TABLE'"
+            )).scalar()
+            
+            if is_table:
+                conn.execute(text("""
+                    INSERT INTO assets (currency_code, issuer, symbol)
+                    SELECT 'XRP', NULL, 'XRP'
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM assets WHERE currency_code = 'XRP' AND issuer IS NULL
+                    )
+                """))
+                conn.execute(text("""
+                    INSERT INTO assets (currency_code, issuer, symbol)
+                    SELECT DISTINCT p.token, NULL, p.token
+                    FROM amm_pool_states p
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM assets a WHERE a.currency_code = p.token
+                    )
+                """))
+                result = conn.execute(text("""
+                    INSERT INTO amm_snapshots (
+                        timestamp, ledger_index, amm_address,
+                        asset1_id, asset1_amount, asset2_id, asset2_amount,
+                        lp_token_currency, lp_token_supply, trading_fee,
+                        k_constant, price_asset2_per_asset1, tvl_xrp
+                    )
+                    SELECT p.timestamp, 0, p.amm_address,
+                           xrp.id, p.xrp_reserve,
+                           (SELECT min(a.id) FROM assets a WHERE a.currency_code = p.token),
+                           p.token_reserve,
+                           '', COALESCE(p.lp_token_supply, 0), p.trading_fee,
+                           p.k_constant, p.token_reserve / NULLIF(p.xrp_reserve, 0), p.tvl_xrp
+                    FROM amm_pool_states p
+                    CROSS JOIN (
+                        SELECT min(id) AS id FROM assets
+                        WHERE currency_code = 'XRP' AND issuer IS NULL
+                    ) xrp
+                    ON CONFLICT DO NOTHING
+                """))
+                print(f"✓ Copied {result.rowcount} pool states into amm_snapshots")
+                
+                conn.execute(text("DROP TABLE amm_pool_states"))
+                print("✓ Dropped amm_pool_states table")
+            
+            conn.execute(text(AMM_POOL_STATES_VIEW))
+            print("✓ Created amm_pool_states view")
+            
+            conn.commit()
+            
+        print("\n✓ Database migration complete!")
+        
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        print("\nYou may need to manually update the schema or drop/recreate the table")
+
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,85 @@
+"""
+Replace repeated currency/issuer strings with interned asset ids
+
+dex_trades, amm_snapshots and token_transactions reference assets.id
+instead of carrying 40-char currency codes and 34-char issuers per row.
+"""
+
+from sqlalchemy import create_engine, text
+from src.config.settings import get_settings
+
+
+# table -> {id column: (currency column, issuer column)}
+ASSET_COLUMNS = {
+    "dex_trades": {
+        "gets_asset_id": ("gets_currency", "gets_issuer"),
+        "pays_asset_id": ("pays_currency", "pays_issuer"),
+    },
+    "amm_snapshots": {
+        "asset1_id": ("asset1_currency", "asset1_issuer"),
+        "asset2_id": ("asset2_currency", "asset2_issuer"),
+    },
+    "token_transactions": {
+        "asset_id": ("currency", "issuer"),
+    },
+}
+
+
+def migrate_database():
+    """Backfill asset id columns and drop the string columns they replace"""
+    settings = get_settings()
+    engine = create_engine(settings.database_url)
+    
+    print("Migrating currency/issuer columns to asset ids...")
+    
+    try:
+        with engine.connect() as conn:
+            for table, columns in ASSET_COLUMNS.items():
+                for id_column, (currency, issuer) in columns.items():
+                    # Intern every distinct asset first
+                    conn.execute(text(f"""
+                        INSERT INTO assets (currency_code, issuer, symbol)
+                        SELECT DISTINCT t.{currency}, t.{issuer}, t.{currency}
+                        FROM {table} t
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM assets a
+                            WHERE a.currency_code = t.{currency}
+                              AND a.issuer IS NOT DISTINCT FROM t.{issuer}
+                        )
+                    """))
+                    
+                    conn.execute(text(f"""
+                        ALTER TABLE {table}
+                        ADD COLUMN IF NOT EXISTS {id_column} INTEGER REFERENCES assets(id)
+                    """))
+                    conn.execute(text(f"""
+                        UPDATE {table} t SET {id_column} = a.id
+                        FROM assets a
+                        WHERE a.currency_code = t.{currency}
+                          AND a.issuer IS NOT DISTINCT FROM t.{issuer}
+                    """))
+                    conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {id_column} SET NOT NULL"))
+                    conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{id_column} ON {table} ({id_column})"))
+                    conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {currency}, DROP COLUMN {issuer}"))
+                    print(f"✓ {table}.{currency}/{issuer} -> {id_column}")
+            
+            conn.execute(text("DROP INDEX IF EXISTS idx_dex_pair"))
+            conn.execute(text(
+                "CREATE INDEX idx_dex_pair ON dex_trades (gets_asset_id, pays_asset_id, timestamp)"
+            ))
+            conn.execute(text("DROP INDEX IF EXISTS idx_token_tx_currency"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_token_tx_asset ON token_transactions (asset_id, timestamp)"
+            ))
+            
+            conn.commit()
+            
+        print("\n✓ Database migration complete!")
+        
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        print("\nYou may need to manually update the schema or drop/recreate the table")
+
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,50 @@
+"""
+Move audit timestamps to TIMESTAMPTZ with server-side now() defaults
+"""
+
+from sqlalchemy import create_engine, text
+from src.config.settings import get_settings
+
+
+# table -> {column: server default or None}
+AUDIT_COLUMNS = {
+    "assets": {"created_at": "now()", "updated_at": "now()"},
+    "amm_positions": {"created_at": "now()", "updated_at": "now()"},
+    "data_collection_logs": {"started_at": "now()", "completed_at": None, "last_run": None},
+    "backtest_results": {"run_date": "now()"},
+}
+
+
+def migrate_database():
+    """Convert audit columns and set their defaults"""
+    settings = get_settings()
+    engine = create_engine(settings.database_url)
+    
+    print("Migrating audit timestamps...")
+    
+    try:
+        with engine.connect() as conn:
+            for table, columns in AUDIT_COLUMNS.items():
+                for column, default in columns.items():
+                    # Existing values were written as naive UTC
+                    conn.execute(text(
+                        f"ALTER TABLE {table} ALTER COLUMN {column} "
+                        f"TYPE TIMESTAMPTZ USING {column} AT TIME ZONE 'UTC'"
+                    ))
+                    if default:
+                        conn.execute(text(
+                            f"ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT {default}"
+                        ))
+                    print(f"✓ {table}.{column}")
+            
+            conn.commit()
+            
+        print("\n✓ Database migration complete!")
+        
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        print("\nYou may need to manually update the schema or drop/recreate the table")
+
+
+if __name__ == "__main__":
+    migrate_database()
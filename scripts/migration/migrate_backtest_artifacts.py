@@ -0,0 +1,75 @@
+"""
+Move backtest trades, equity curves and parameters into backtest_artifacts
+"""
+
+from sqlalchemy import create_engine, text
+from src.config.settings import get_settings
+from src.database.models import BacktestArtifact
+
+
+# Inline JSONB column -> artifact kind
+ARTIFACT_COLUMNS = {
+    "trades": "trades",
+    "equity_curve": "equity",
+    "parameters": "params",
+}
+
+
+def migrate_database():
+    """Create backtest_artifacts, copy compressed payloads and drop the inline columns"""
+    settings = get_settings()
+    engine = create_engine(settings.database_url)
+    
+    print("Migrating backtest payloads to backtest_artifacts...")
+    
+    try:
+        BacktestArtifact.__table__.create(engine, checkfirst=True)
+        print("✓ Created backtest_artifacts table")
+        
+        with engine.connect() as conn:
+            existing = {
+                row[0] for row in conn.execute(text(
+                    "SELECT column_name FROM information_schema.columns "
+                    "WHERE table_name = 'backtest_results'"
+                ))
+            }
+            columns = [column for column in ARTIFACT_COLUMNS if column in existing]
+            
+            if columns:
+                rows = conn.execute(text(
+                    f"SELECT id, {', '.join(columns)} FROM backtest_results"
+                )).all()
+                
+                artifacts = [
+                    {
+                        "result_id": row[0],
+                        "kind": ARTIFACT_COLUMNS[column],
+                        "payload": BacktestArtifact.pack(value)
+                    }
+                    for row in rows
+                    for column, value in zip(columns, row[1:])
+                    if value is not None
+                ]
+                if artifacts:
+                    conn.execute(text(
+                        "INSERT INTO backtest_artifacts (result_id, kind, payload) "
+                        "VALUES (:result_id, :kind, :payload) "
+                        "ON CONFLICT (result_id, kind) DO NOTHING"
+                    ), artifacts)
+                print(f"✓ Copied {len(artifacts)} artifacts from {len(rows)} results")
+                
+                for column in columns:
+                    conn.execute(text(f"ALTER TABLE backtest_results DROP COLUMN {column}"))
+                    print(f"✓ Dropped backtest_results.{column}")
+            
+            conn.commit()
+            
+        print("\n✓ Database migration complete!")
+        
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        print("\nYou may need to manually update the schema or drop/recreate the table")
+
+
+if __name__ == "__main__":
+    migrate_database()
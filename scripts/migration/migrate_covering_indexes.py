@@ -0,0 +1,56 @@
+"""
+Replace hot lookup indexes with covering (INCLUDE) indexes
+
+Price-history reads on dex_trades and price_data become index-only scans,
+and single-column indexes made redundant by the composites are dropped.
+"""
+
+from sqlalchemy import create_engine, text
+from src.config.settings import get_settings
+
+
+STATEMENTS = [
+    """CREATE INDEX IF NOT EXISTS idx_dex_pair_covering
+       ON dex_trades (gets_asset_id, pays_asset_id, timestamp)
+       INCLUDE (price, gets_amount, pays_amount)""",
+    "DROP INDEX IF EXISTS idx_dex_pair",
+    "DROP INDEX IF EXISTS idx_dex_timestamp",
+    "DROP INDEX IF EXISTS ix_dex_trades_timestamp",
+    "DROP INDEX IF EXISTS ix_dex_trades_ledger_index",
+    "DROP INDEX IF EXISTS ix_dex_trades_gets_asset_id",
+    """CREATE INDEX IF NOT EXISTS idx_pair_timestamp_cov
+       ON price_data (pair, timestamp)
+       INCLUDE (open, high, low, close, volume)""",
+    "DROP INDEX IF EXISTS idx_pair_timestamp",
+    "DROP INDEX IF EXISTS ix_price_data_pair",
+]
+
+
+def migrate_database():
+    """Create covering indexes and drop the ones they supersede"""
+    settings = get_settings()
+    engine = create_engine(settings.database_url)
+    
+    print("Migrating price-history indexes...")
+    
+    try:
+        with engine.connect() as conn:
+            for statement in STATEMENTS:
+                conn.execute(text(statement))
+            
+            conn.commit()
+            
+            # Refresh the visibility map so index-only scans can skip the heap
+            conn.execution_options(isolation_level="AUTOCOMMIT")
+            conn.execute(text("VACUUM ANALYZE dex_trades"))
+            conn.execute(text("VACUUM ANALYZE price_data"))
+            
+        print("\n✓ Database migration complete!")
+        
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        print("\nYou may need to manually update the schema or drop/recreate the table")
+
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,49 @@
+"""
+Store derived AMM snapshot metrics as DOUBLE PRECISION
+
+k_constant and price_asset2_per_asset1 are computed from the exact pool
+amounts and only feed analytics, so they do not need NUMERIC. The
+amm_pool_states view reads k_constant and has to be dropped while the
+column type changes.
+"""
+
+from sqlalchemy import create_engine, text
+from src.config.settings import get_settings
+from src.database.models import AMM_POOL_STATES_VIEW
+
+
+FLOAT_COLUMNS = ["k_constant", "price_asset2_per_asset1"]
+
+
+def migrate_database():
+    """Alter the derived metric columns to float8 and recreate the pool-state view"""
+    settings = get_settings()
+    engine = create_engine(settings.database_url)
+    
+    print("Migrating AMM snapshot metrics to DOUBLE PRECISION...")
+    
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("DROP VIEW IF EXISTS amm_pool_states"))
+            
+            for column in FLOAT_COLUMNS:
+                conn.execute(text(
+                    f"ALTER TABLE amm_snapshots ALTER COLUMN {column} "
+                    f"TYPE DOUBLE PRECISION USING {column}::double precision"
+                ))
+                print(f"✓ amm_snapshots.{column} -> DOUBLE PRECISION")
+            
+            conn.execute(text(AMM_POOL_STATES_VIEW))
+            print("✓ Recreated amm_pool_states view")
+            
+            conn.commit()
+            
+        print("\n✓ Database migration complete!")
+        
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        print("\nYou may need to manually update the schema or drop/recreate the table")
+
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,51 @@
+"""
+Store OHLCV price columns as DOUBLE PRECISION
+
+price_data only feeds analytics and backtests, which convert every value to
+float on read, so NUMERIC buys nothing but Decimal decoding. The
+amm_pool_states view is rebuilt because Postgres cannot change the type of an
+existing view column in place.
+"""
+
+from sqlalchemy import create_engine, text
+from src.config.settings import get_settings
+from src.database.models import AMM_POOL_STATES_VIEW
+
+
+FLOAT_COLUMNS = {
+    "price_data": ["open", "high", "low", "close", "volume", "vwap"],
+}
+
+
+def migrate_database():
+    """Alter price columns to float8 and recreate the pool-state view"""
+    settings = get_settings()
+    engine = create_engine(settings.database_url)
+    
+    print("Migrating price columns to DOUBLE PRECISION...")
+    
+    try:
+        with engine.connect() as conn:
+            for table, columns in FLOAT_COLUMNS.items():
+                for column in columns:
+                    conn.execute(text(
+                        f"ALTER TABLE {table} ALTER COLUMN {column} "
+                        f"TYPE DOUBLE PRECISION USING {column}::double precision"
+                    ))
+                    print(f"✓ {table}.{column} -> DOUBLE PRECISION")
+            
+            conn.execute(text("DROP VIEW IF EXISTS amm_pool_states"))
+            conn.execute(text(AMM_POOL_STATES_VIEW))
+            print("✓ Recreated amm_pool_states view with float8 reserves")
+            
+            conn.commit()
+        
+        print("\n✓ Database migration complete!")
+    
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        print("\nYou may need to manually update the schema or drop/recreate the table")
+
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,57 @@
+"""
+Migrate time-series tables to TimescaleDB hypertables
+
+Hypertables require the partitioning column in every unique index, so the
+primary keys and dedup constraints are re-keyed on timestamp before
+conversion.
+"""
+
+from sqlalchemy import create_engine, text
+from src.config.settings import get_settings
+from src.database.models import create_hypertables
+
+
+# table -> (existing constraint, replacement constraint, replacement columns)
+UNIQUE_CONSTRAINTS = {
+    "dex_trades": ("dex_trades_transaction_hash_key", "_dex_tx_uc", "transaction_hash, timestamp"),
+    "amm_snapshots": ("_amm_ledger_uc", "_amm_ledger_uc", "amm_address, ledger_index, timestamp"),
+}
+
+
+def migrate_database():
+    """Re-key time-series tables on timestamp and convert them to hypertables"""
+    settings = get_settings()
+    engine = create_engine(settings.database_url)
+    
+    print("Migrating time-series tables to hypertables...")
+    
+    try:
+        with engine.connect() as conn:
+            for table in ("dex_trades", "amm_snapshots", "token_transactions", "price_data"):
+                try:
+                    conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_pkey"))
+                    conn.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY (id, timestamp)"))
+                    print(f"✓ Re-keyed {table} on (id, timestamp)")
+                except Exception as e:
+                    print(f"  Primary key may already include timestamp on {table}: {e}")
+                    conn.rollback()
+                    continue
+                
+                if table in UNIQUE_CONSTRAINTS:
+                    old_name, new_name, columns = UNIQUE_CONSTRAINTS[table]
+                    conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {old_name}"))
+                    conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {new_name} UNIQUE ({columns})"))
+                    print(f"✓ Updated unique constraint on {table}")
+                
+                conn.commit()
+        
+        create_hypertables(engine)
+        print("\n✓ Database migration complete!")
+        
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        print("\nYou may need to manually update the schema or drop/recreate the table")
+
+
+if __name__ == "__main__":
+    migrate_database()
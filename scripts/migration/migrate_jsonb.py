@@ -0,0 +1,55 @@
+"""
+Convert JSON payload columns to JSONB and add GIN indexes
+"""
+
+from sqlalchemy import create_engine, text
+from src.config.settings import get_settings
+
+
+JSONB_COLUMNS = {
+    "orderbook_snapshots": ["bids", "asks"],
+    "trading_signals": ["indicators"],
+    "backtest_results": ["trades", "equity_curve", "parameters"],
+    "ml_predictions": ["features"],
+}
+
+
+def migrate_database():
+    """Alter JSON columns to JSONB"""
+    settings = get_settings()
+    engine = create_engine(settings.database_url)
+    
+    print("Migrating JSON columns to JSONB...")
+    
+    try:
+        with engine.connect() as conn:
+            for table, columns in JSONB_COLUMNS.items():
+                for column in columns:
+                    conn.execute(text(
+                        f"ALTER TABLE {table} ALTER COLUMN {column} TYPE JSONB USING {column}::jsonb"
+                    ))
+                    print(f"✓ {table}.{column} -> JSONB")
+            
+            conn.execute(text("ALTER TABLE orderbook_snapshots ADD COLUMN IF NOT EXISTS bids_raw BYTEA"))
+            conn.execute(text("ALTER TABLE orderbook_snapshots ADD COLUMN IF NOT EXISTS asks_raw BYTEA"))
+            print("✓ Added compressed order book columns")
+            
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_signal_indicators ON trading_signals USING gin (indicators)"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_ml_features ON ml_predictions USING gin (features)"
+            ))
+            print("✓ Added GIN indexes")
+            
+            conn.commit()
+            
+        print("\n✓ Database migration complete!")
+        
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        print("\nYou may need to manually update the schema or drop/recreate the table")
+
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,49 @@
+"""
+Add a partial unique index on native (issuer-less) assets
+
+NULL issuers never conflict on _currency_issuer_uc, so native currencies
+need their own unique index before they can be upserted with ON CONFLICT.
+Existing duplicates are reported instead of being merged automatically.
+"""
+
+from sqlalchemy import create_engine, text
+from src.config.settings import get_settings
+
+
+def migrate_database():
+    """Create _currency_native_uc on assets(currency_code) WHERE issuer IS NULL"""
+    settings = get_settings()
+    engine = create_engine(settings.database_url)
+    
+    print("Adding native asset unique index...")
+    
+    try:
+        with engine.connect() as conn:
+            duplicates = conn.execute(text(
+                "SELECT currency_code, count(*) FROM assets "
+                "WHERE issuer IS NULL GROUP BY currency_code HAVING count(*) > 1"
+            )).all()
+            
+            if duplicates:
+                for currency, count in duplicates:
+                    print(f"  {currency}: {count} rows with NULL issuer")
+                print("\n✗ Merge duplicate native assets before creating the index")
+                return
+            
+            conn.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS _currency_native_uc "
+                "ON assets (currency_code) WHERE issuer IS NULL"
+            ))
+            print("✓ Created _currency_native_uc")
+            
+            conn.commit()
+            
+        print("\n✓ Database migration complete!")
+        
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        print("\nYou may need to manually update the schema or drop/recreate the table")
+
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,69 @@
+"""
+Narrow token amount columns from NUMERIC(40,20) to NUMERIC(30,15)
+
+XRPL amounts carry a 16-digit significand, so the wider type only costs row
+width. Existing data is checked against the new bounds before altering.
+"""
+
+from sqlalchemy import create_engine, text
+from src.config.settings import get_settings
+
+
+AMOUNT_TYPE = "NUMERIC(30, 15)"
+AMOUNT_LIMIT = 10 ** 15
+
+# table -> {column: new type}
+NARROWED_COLUMNS = {
+    "dex_trades": {"gets_amount": AMOUNT_TYPE, "pays_amount": AMOUNT_TYPE},
+    "amm_snapshots": {
+        "asset1_amount": AMOUNT_TYPE,
+        "asset2_amount": AMOUNT_TYPE,
+        "lp_token_supply": AMOUNT_TYPE,
+        "k_constant": "NUMERIC(38, 12)",
+    },
+    "token_transactions": {"amount": AMOUNT_TYPE},
+    "amm_positions": {
+        "initial_token": AMOUNT_TYPE,
+        "lp_tokens_received": AMOUNT_TYPE,
+        "current_lp_tokens": AMOUNT_TYPE,
+    },
+}
+
+
+def migrate_database():
+    """Alter amount columns to the narrower numeric types"""
+    settings = get_settings()
+    engine = create_engine(settings.database_url)
+    
+    print("Narrowing numeric amount columns...")
+    
+    try:
+        with engine.connect() as conn:
+            for table, columns in NARROWED_COLUMNS.items():
+                for column, new_type in columns.items():
+                    limit = 10 ** 26 if column == "k_constant" else AMOUNT_LIMIT
+                    max_value = conn.execute(
+                        text(f"SELECT max(abs({column})) FROM {table}")
+                    ).scalar()
+                    
+                    if max_value is not None and max_value >= limit:
+                        print(f"  Skipping {table}.{column}: max value {max_value} exceeds {new_type}")
+                        continue
+                    
+                    conn.execute(text(
+                        f"ALTER TABLE {table} ALTER COLUMN {column} "
+                        f"TYPE {new_type} USING {column}::{new_type}"
+                    ))
+                    print(f"✓ {table}.{column} -> {new_type}")
+            
+            conn.commit()
+            
+        print("\n✓ Database migration complete!")
+        
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        print("\nYou may need to manually update the schema or drop/recreate the table")
+
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,42 @@
+"""
+Add partial indexes for the hot subsets of skewed tables
+"""
+
+from sqlalchemy import create_engine, text
+from src.config.settings import get_settings
+
+
+STATEMENTS = [
+    """CREATE INDEX IF NOT EXISTS idx_positions_active
+       ON amm_positions (wallet_address) WHERE is_active = true""",
+    """CREATE INDEX IF NOT EXISTS idx_logs_running
+       ON data_collection_logs (collection_type, target)
+       WHERE status IN ('running', 'active')""",
+    """CREATE INDEX IF NOT EXISTS idx_ml_pending
+       ON ml_predictions (timestamp) WHERE actual_price IS NULL""",
+]
+
+
+def migrate_database():
+    """Create partial indexes"""
+    settings = get_settings()
+    engine = create_engine(settings.database_url)
+    
+    print("Adding partial indexes...")
+    
+    try:
+        with engine.connect() as conn:
+            for statement in STATEMENTS:
+                conn.execute(text(statement))
+            
+            conn.commit()
+            
+        print("\n✓ Database migration complete!")
+        
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        print("\nYou may need to manually update the schema or drop/recreate the table")
+
+
+if __name__ == "__main__":
+    migrate_database()
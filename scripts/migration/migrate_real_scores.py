@@ -0,0 +1,52 @@
+"""
+Store score and ratio columns as 4-byte REAL
+"""
+
+from sqlalchemy import create_engine, text
+from src.config.settings import get_settings
+
+
+REAL_COLUMNS = {
+    "trading_signals": ["confidence"],
+    "backtest_results": ["total_pnl_percent", "max_drawdown_percent", "sharpe_ratio", "win_rate"],
+    "ml_predictions": ["confidence", "error"],
+}
+
+CHECK_CONSTRAINTS = {
+    "trading_signals": "_signal_confidence_ck",
+    "ml_predictions": "_prediction_confidence_ck",
+}
+
+
+def migrate_database():
+    """Alter double precision columns to REAL and add confidence range checks"""
+    settings = get_settings()
+    engine = create_engine(settings.database_url)
+    
+    print("Migrating score columns to REAL...")
+    
+    try:
+        with engine.connect() as conn:
+            for table, columns in REAL_COLUMNS.items():
+                for column in columns:
+                    conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE REAL"))
+                    print(f"✓ {table}.{column} -> REAL")
+            
+            for table, name in CHECK_CONSTRAINTS.items():
+                conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}"))
+                conn.execute(text(
+                    f"ALTER TABLE {table} ADD CONSTRAINT {name} CHECK (confidence BETWEEN 0 AND 1)"
+                ))
+                print(f"✓ Added {name}")
+            
+            conn.commit()
+            
+        print("\n✓ Database migration complete!")
+        
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        print("\nYou may need to manually update the schema or drop/recreate the table")
+
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,49 @@
+"""
+Drop indexes duplicated by a composite or unique index on the same prefix
+
+Each of these columns already leads an index that the lookups use, so the
+single-column copies only cost write amplification and buffer cache.
+"""
+
+from sqlalchemy import create_engine, text
+from src.config.settings import get_settings
+
+
+# index -> index that already covers its lookups
+REDUNDANT_INDEXES = {
+    "idx_collection_target": "_collection_target_uc",
+    "ix_amm_snapshots_amm_address": "_amm_ledger_uc",
+    "ix_amm_positions_wallet_address": "_position_uc",
+    "ix_orderbook_snapshots_pair": "idx_orderbook_pair_time",
+}
+
+ANALYZE_TABLES = ["data_collection_logs", "amm_snapshots", "amm_positions", "orderbook_snapshots"]
+
+
+def migrate_database():
+    """Drop the redundant indexes and refresh planner statistics"""
+    settings = get_settings()
+    engine = create_engine(settings.database_url)
+    
+    print("Dropping redundant indexes...")
+    
+    try:
+        with engine.connect() as conn:
+            for index, covered_by in REDUNDANT_INDEXES.items():
+                conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+                print(f"✓ Dropped {index} (covered by {covered_by})")
+            
+            for table in ANALYZE_TABLES:
+                conn.execute(text(f"ANALYZE {table}"))
+            
+            conn.commit()
+            
+        print("\n✓ Database migration complete!")
+        
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        print("\nYou may need to manually update the schema or drop/recreate the table")
+
+
+if __name__ == "__main__":
+    migrate_database()
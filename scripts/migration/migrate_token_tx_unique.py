@@ -0,0 +1,56 @@
+"""
+Add a unique key on token_transactions so replayed transfers are skipped
+
+Backfills restart at the last processed ledger, so transfers from that
+ledger can be stored twice. Existing duplicates are removed, keeping the
+earliest row, before the constraint is added.
+"""
+
+from sqlalchemy import create_engine, text
+from src.config.settings import get_settings
+
+
+def migrate_database():
+    """Create _token_tx_transfer_uc on token_transactions"""
+    settings = get_settings()
+    engine = create_engine(settings.database_url)
+    
+    print("Adding token transaction unique key...")
+    
+    try:
+        with engine.connect() as conn:
+            exists = conn.scalar(text(
+                "SELECT 1 FROM pg_constraint WHERE conname = '_token_tx_transfer_uc'"
+            ))
+            if exists:
+                print("✓ _token_tx_transfer_uc already present")
+                return
+            
+            removed = conn.execute(text(
+                "DELETE FROM token_transactions a USING token_transactions b "
+                "WHERE a.id > b.id "
+                "AND a.transaction_hash = b.transaction_hash "
+                "AND a.wallet_address = b.wallet_address "
+                "AND a.asset_id = b.asset_id "
+                "AND a.is_receive = b.is_receive "
+                "AND a.timestamp = b.timestamp"
+            )).rowcount
+            print(f"✓ Removed {removed} duplicate transfers")
+            
+            conn.execute(text(
+                "ALTER TABLE token_transactions ADD CONSTRAINT _token_tx_transfer_uc "
+                "UNIQUE (transaction_hash, wallet_address, asset_id, is_receive, timestamp)"
+            ))
+            print("✓ Created _token_tx_transfer_uc")
+            
+            conn.commit()
+        
+        print("\n✓ Database migration complete!")
+        
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        print("\nYou may need to manually update the schema or drop/recreate the table")
+
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,42 @@
+"""
+Maintain updated_at with a BEFORE UPDATE trigger instead of ORM onupdate
+"""
+
+from sqlalchemy import create_engine, text
+from src.config.settings import get_settings
+from src.database.models import Base, SET_UPDATED_AT_FUNCTION
+
+
+def migrate_database():
+    """Install set_updated_at() and (re)attach it to every table with updated_at
+    
+    Startup only creates missing triggers, so changes to existing ones are
+    applied here.
+    """
+    settings = get_settings()
+    engine = create_engine(settings.database_url)
+    
+    print("Installing updated_at triggers...")
+    
+    try:
+        tables = [table.name for table in Base.metadata.sorted_tables if "updated_at" in table.c]
+        
+        with engine.begin() as conn:
+            conn.execute(text(SET_UPDATED_AT_FUNCTION))
+            for table in tables:
+                conn.execute(text(f"DROP TRIGGER IF EXISTS trg_{table}_updated ON {table}"))
+                conn.execute(text(
+                    f"CREATE TRIGGER trg_{table}_updated BEFORE UPDATE ON {table} "
+                    "FOR EACH ROW EXECUTE FUNCTION set_updated_at()"
+                ))
+        print("✓ Attached set_updated_at() to every table with updated_at")
+        
+        print("\n✓ Database migration complete!")
+        
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        print("\nYou may need to manually update the schema or drop/recreate the table")
+
+
+if __name__ == "__main__":
+    migrate_database()
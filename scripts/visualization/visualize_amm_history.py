@@ -3,20 +3,128 @@ Visualize AMM pool history
 """
 
 import json
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Charts are only written to files
 import matplotlib.pyplot as plt
 from pathlib import Path
 from datetime import datetime, timedelta
-from src.database.models import AMMSnapshot, get_session, init_database
+from src.database.models import AMMSnapshot, get_engine
 from src.config.settings import get_settings
 from sqlalchemy import select
 
 
+SNAPSHOT_COLUMNS = {
+    'timestamp': AMMSnapshot.timestamp,
+    'xrp_reserve': AMMSnapshot.asset1_amount,
+    'token_reserve': AMMSnapshot.asset2_amount,
+    'price': AMMSnapshot.price_asset2_per_asset1,
+    'k_constant': AMMSnapshot.k_constant,
+    'tvl_xrp': AMMSnapshot.tvl_xrp,
+}
+NUMERIC_COLUMNS = [name for name in SNAPSHOT_COLUMNS if name != 'timestamp']
+
+# Rows pulled from the server-side cursor at a time
+SNAPSHOT_BATCH_SIZE = 10_000
+
+
+def load_snapshots(conn, amm_address: str) -> pd.DataFrame:
+    """Snapshot history for one pool, selecting plain columns instead of ORM objects"""
+    stmt = select(*SNAPSHOT_COLUMNS.values()).where(
+        AMMSnapshot.amm_address == amm_address
+    ).order_by(AMMSnapshot.timestamp)
+    
+    # Stream rows in batches so only one batch of Decimal tuples is alive
+    # while each is converted to float columns
+    result = conn.execute(stmt.execution_options(yield_per=SNAPSHOT_BATCH_SIZE))
+    frames = [
+        pd.DataFrame.from_records(rows, columns=list(SNAPSHOT_COLUMNS))
+        for rows in result.partitions()
+    ]
+    if not frames:
+        frames = [pd.DataFrame(columns=list(SNAPSHOT_COLUMNS))]
+        
+    for frame in frames:
+        frame[NUMERIC_COLUMNS] = frame[NUMERIC_COLUMNS].astype(float)
+    return pd.concat(frames, ignore_index=True)
+
+
+# Detail figure and axes reused for every token a process renders
+_detail_figure = None
+
+
+def get_detail_figure():
+    """Return the process's detail figure with all axes cleared"""
+    global _detail_figure
+    if _detail_figure is None:
+        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
+        _detail_figure = (fig, ax1, ax1.twinx(), ax2, ax3, ax4)
+    else:
+        for ax in _detail_figure[1:]:
+            ax.cla()
+        # Clearing moves the twin axis label back to the left
+        _detail_figure[2].yaxis.set_label_position('right')
+    return _detail_figure
+
+
+def render_token(token_name: str, df: pd.DataFrame, output_dir: Path) -> list:
+    """Write one token's detail chart and CSV, returning progress lines to print"""
+    fig, ax1, ax1_2, ax2, ax3, ax4 = get_detail_figure()
+    fig.suptitle(f'{token_name} AMM Pool Analysis', fontsize=16)
+    
+    # 1. Reserves over time
+    ax1.plot(df['timestamp'], df['xrp_reserve'], 'b-', label='XRP')
+    ax1_2.plot(df['timestamp'], df['token_reserve'], 'r-', label=token_name)
+    ax1.set_title('Pool Reserves')
+    ax1.set_ylabel('XRP Reserve', color='b')
+    ax1_2.set_ylabel(f'{token_name} Reserve', color='r')
+    ax1.grid(True, alpha=0.3)
+    
+    # 2. Price over time
+    ax2.plot(df['timestamp'], df['price'], 'g-', linewidth=2)
+    ax2.set_title(f'Price ({token_name}/XRP)')
+    ax2.set_ylabel('Price')
+    ax2.grid(True, alpha=0.3)
+    
+    # 3. K constant (should be relatively stable)
+    if df['k_constant'].notna().any():
+        ax3.plot(df['timestamp'], df['k_constant'], 'm-')
+        ax3.set_title('K Constant (x*y)')
+        ax3.set_ylabel('K Value')
+        ax3.grid(True, alpha=0.3)
+    
+    # 4. TVL in XRP
+    if df['tvl_xrp'].notna().any():
+        ax4.plot(df['timestamp'], df['tvl_xrp'], 'orange', linewidth=2)
+        ax4.set_title('Total Value Locked (XRP)')
+        ax4.set_ylabel('TVL (XRP)')
+        ax4.grid(True, alpha=0.3)
+        
+    # Format all x-axes
+    for ax in [ax1, ax2, ax3, ax4]:
+        ax.tick_params(axis='x', rotation=45)
+        
+    fig.tight_layout()
+    output_file = output_dir / f'{token_name}_amm_analysis.png'
+    fig.savefig(output_file, dpi=150, bbox_inches='tight')
+    
+    # Also save data as CSV
+    csv_file = output_dir / f'{token_name}_amm_history.csv'
+    df.to_csv(csv_file, index=False)
+    
+    return [
+        f"Saved {token_name} analysis to {output_file}",
+        f"Saved {token_name} data to {csv_file}"
+    ]
+
+
 def visualize_amm_history():
     """Create visualizations of AMM pool history"""
     settings = get_settings()
-    engine = init_database(settings.database_url)
-    session = get_session(engine)
+    engine = get_engine(settings.database_url)
     
     # Load token config
     tokens_file = Path("src/config/tokens.json")
@@ -27,6 +135,17 @@ def visualize_amm_history():
     output_dir = Path("data/amm_visualizations")
     output_dir.mkdir(parents=True, exist_ok=True)
     
+    # Load every pool's history once; charts and statistics reuse it. Only
+    # rows are read, so skip schema setup and the ORM session
+    with engine.connect().execution_options(postgresql_readonly=True) as conn:
+        histories = {
+            token_name: load_snapshots(conn, token_info["amm_address"])
+            for token_name, token_info in tokens.items()
+        }
+    
+    # Close pooled connections so forked chart workers do not inherit them
+    engine.dispose()
+    
     try:
         # Create a figure with subplots for top tokens
         fig, axes = plt.subplots(2, 2, figsize=(15, 10))
@@ -39,22 +158,17 @@ def visualize_amm_history():
             if token_name not in tokens:
                 continue
                 
-            amm_address = tokens[token_name]["amm_address"]
+            df = histories[token_name]
             
-            # Get snapshots
-            snapshots = session.query(AMMSnapshot).filter(
-                AMMSnapshot.amm_address == amm_address
-            ).order_by(AMMSnapshot.timestamp).all()
-            
-            if not snapshots:
+            if df.empty:
                 ax.text(0.5, 0.5, f'No data for {token_name}', 
                        ha='center', va='center', transform=ax.transAxes)
                 continue
                 
             # Prepare data
-            timestamps = [s.timestamp for s in snapshots]
-            xrp_reserves = [float(s.asset1_amount) for s in snapshots]
-            token_reserves = [float(s.asset2_amount) for s in snapshots]
+            timestamps = df['timestamp']
+            xrp_reserves = df['xrp_reserve']
+            token_reserves = df['token_reserve']
             
             # Create dual y-axis plot
             ax2 = ax.twinx()
@@ -86,107 +200,35 @@ def visualize_amm_history():
         plt.savefig(output_dir / 'amm_reserves_overview.png', dpi=300, bbox_inches='tight')
         print(f"Saved overview chart to {output_dir / 'amm_reserves_overview.png'}")
         
-        # Create detailed charts for each token
-        for token_name, token_info in tokens.items():
-            amm_address = token_info["amm_address"]
-            
-            # Get snapshots
-            snapshots = session.query(AMMSnapshot).filter(
-                AMMSnapshot.amm_address == amm_address
-            ).order_by(AMMSnapshot.timestamp).all()
-            
-            if len(snapshots) < 2:
-                continue
-                
-            # Create detailed figure
-            fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
-            fig.suptitle(f'{token_name} AMM Pool Analysis', fontsize=16)
-            
-            # Prepare data
-            df = pd.DataFrame([{
-                'timestamp': s.timestamp,
-                'xrp_reserve': float(s.asset1_amount),
-                'token_reserve': float(s.asset2_amount),
-                'price': float(s.price_asset2_per_asset1),
-                'k_constant': float(s.k_constant) if s.k_constant else None,
-                'tvl_xrp': float(s.tvl_xrp) if s.tvl_xrp else None
-            } for s in snapshots])
-            
-            # 1. Reserves over time
-            ax1_2 = ax1.twinx()
-            ax1.plot(df['timestamp'], df['xrp_reserve'], 'b-', label='XRP')
-            ax1_2.plot(df['timestamp'], df['token_reserve'], 'r-', label=token_name)
-            ax1.set_title('Pool Reserves')
-            ax1.set_ylabel('XRP Reserve', color='b')
-            ax1_2.set_ylabel(f'{token_name} Reserve', color='r')
-            ax1.grid(True, alpha=0.3)
-            
-            # 2. Price over time
-            ax2.plot(df['timestamp'], df['price'], 'g-', linewidth=2)
-            ax2.set_title(f'Price ({token_name}/XRP)')
-            ax2.set_ylabel('Price')
-            ax2.grid(True, alpha=0.3)
-            
-            # 3. K constant (should be relatively stable)
-            if df['k_constant'].notna().any():
-                ax3.plot(df['timestamp'], df['k_constant'], 'm-')
-                ax3.set_title('K Constant (x*y)')
-                ax3.set_ylabel('K Value')
-                ax3.grid(True, alpha=0.3)
-            
-            # 4. TVL in XRP
-            if df['tvl_xrp'].notna().any():
-                ax4.plot(df['timestamp'], df['tvl_xrp'], 'orange', linewidth=2)
-                ax4.set_title('Total Value Locked (XRP)')
-                ax4.set_ylabel('TVL (XRP)')
-                ax4.grid(True, alpha=0.3)
-                
-            # Format all x-axes
-            for ax in [ax1, ax2, ax3, ax4]:
-                ax.tick_params(axis='x', rotation=45)
-                
-            plt.tight_layout()
-            output_file = output_dir / f'{token_name}_amm_analysis.png'
-            plt.savefig(output_file, dpi=300, bbox_inches='tight')
-            print(f"Saved {token_name} analysis to {output_file}")
-            
-            # Also save data as CSV
-            csv_file = output_dir / f'{token_name}_amm_history.csv'
-            df.to_csv(csv_file, index=False)
-            print(f"Saved {token_name} data to {csv_file}")
+        # Render detailed charts for each token in parallel
+        jobs = {name: df for name, df in histories.items() if len(df) >= 2}
+        with ProcessPoolExecutor() as pool:
+            for lines in pool.map(render_token, jobs.keys(), jobs.values(), repeat(output_dir)):
+                for line in lines:
+                    print(line)
             
         # Create summary statistics
         print("\n=== AMM Pool Statistics ===")
-        for token_name, token_info in tokens.items():
-            amm_address = token_info["amm_address"]
-            
-            snapshots = session.query(AMMSnapshot).filter(
-                AMMSnapshot.amm_address == amm_address
-            ).all()
-            
-            if not snapshots:
+        for token_name, df in histories.items():
+            if df.empty:
                 continue
                 
-            xrp_reserves = [float(s.asset1_amount) for s in snapshots]
-            token_reserves = [float(s.asset2_amount) for s in snapshots]
-            prices = [float(s.price_asset2_per_asset1) for s in snapshots]
+            xrp_reserves = df['xrp_reserve']
+            token_reserves = df['token_reserve']
+            prices = df['price'].to_numpy()
             
             print(f"\n{token_name}:")
-            print(f"  Snapshots: {len(snapshots)}")
-            print(f"  XRP Reserve: {min(xrp_reserves):,.2f} - {max(xrp_reserves):,.2f} (avg: {sum(xrp_reserves)/len(xrp_reserves):,.2f})")
-            print(f"  Token Reserve: {min(token_reserves):,.2f} - {max(token_reserves):,.2f}")
-            print(f"  Price Range: {min(prices):.6f} - {max(prices):.6f} {token_name}/XRP")
+            print(f"  Snapshots: {len(df)}")
+            print(f"  XRP Reserve: {xrp_reserves.min():,.2f} - {xrp_reserves.max():,.2f} (avg: {xrp_reserves.mean():,.2f})")
+            print(f"  Token Reserve: {token_reserves.min():,.2f} - {token_reserves.max():,.2f}")
+            print(f"  Price Range: {prices.min():.6f} - {prices.max():.6f} {token_name}/XRP")
             
             # Calculate volatility
             if len(prices) > 1:
-                price_changes = [(prices[i] - prices[i-1]) / prices[i-1] * 100 
-                               for i in range(1, len(prices))]
-                if price_changes:
-                    avg_change = sum(abs(c) for c in price_changes) / len(price_changes)
-                    print(f"  Avg Price Change: {avg_change:.2f}% between snapshots")
+                avg_change = np.abs(np.diff(prices) / prices[:-1]).mean() * 100
+                print(f"  Avg Price Change: {avg_change:.2f}% between snapshots")
                     
     finally:
-        session.close()
         plt.close('all')
 
 
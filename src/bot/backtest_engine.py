@@ -7,6 +7,7 @@ from loguru import logger
 from dataclasses import dataclass, field
 
 from src.config.settings import Settings
+from src.exchanges.order_book import OrderEntry
 from src.strategies.base import BaseStrategy
 from src.config.constants import (
     SIGNAL_BUY, SIGNAL_SELL, ORDER_STATUS_FILLED,
@@ -54,6 +55,10 @@ class BacktestEngine:
         self.equity_curve: List[Dict[str, Any]] = []
         self.pending_orders: Dict[str, Dict[str, Any]] = {}
         
+        # Signals are stamped with the candle being replayed, not wall time
+        self._current_time: Optional[datetime] = None
+        self.strategy.clock = lambda: self._current_time
+        
     async def run_backtest(
         self,
         historical_data: pd.DataFrame,
@@ -100,6 +105,8 @@ class BacktestEngine:
     
     async def _process_candle(self, candle: pd.Series):
         """Process a single candle"""
+        self._current_time = candle['timestamp']
+        
         # Check pending orders
         await self._check_pending_orders(candle)
         
@@ -124,19 +131,22 @@ class BacktestEngine:
         spread_percent = Decimal("0.001")  # 0.1% spread
         mid_price = Decimal(str(candle['close']))
         half_spread = mid_price * spread_percent / 2
+        best_bid = mid_price - half_spread
+        best_ask = mid_price + half_spread
+        depth = Decimal("10000")
         
         return {
             "timestamp": candle['timestamp'],
             "pair": self.settings.trading_pair,
-            "best_bid": mid_price - half_spread,
-            "best_ask": mid_price + half_spread,
+            "best_bid": best_bid,
+            "best_ask": best_ask,
             "mid_price": mid_price,
             "spread": half_spread * 2,
             "spread_percentage": spread_percent * 100,
             "volume_24h": Decimal(str(candle.get('volume', 0))),
             "order_book": {
-                "bids": [{"price": float(mid_price - half_spread), "amount": 10000}],
-                "asks": [{"price": float(mid_price + half_spread), "amount": 10000}]
+                "bids": [OrderEntry(best_bid, depth, best_bid * depth)],
+                "asks": [OrderEntry(best_ask, depth, best_ask * depth)]
             }
         }
     
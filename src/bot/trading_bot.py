@@ -96,8 +96,8 @@ class TradingBot:
             order_book = await self.xrpl_client.get_order_book(base, quote)
             
             # Calculate mid price
-            best_bid = Decimal(order_book["bids"][0]["price"]) if order_book["bids"] else Decimal("0")
-            best_ask = Decimal(order_book["asks"][0]["price"]) if order_book["asks"] else Decimal("0")
+            best_bid = order_book["bids"][0].price if order_book["bids"] else Decimal("0")
+            best_ask = order_book["asks"][0].price if order_book["asks"] else Decimal("0")
             mid_price = (best_bid + best_ask) / 2 if best_bid and best_ask else Decimal("0")
             
             # Calculate spread
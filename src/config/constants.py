@@ -3,6 +3,8 @@ from decimal import Decimal
 # XRPL Constants
 XRP_DECIMAL_PLACES = 6
 DROPS_PER_XRP = 1_000_000
+RIPPLE_EPOCH = 946_684_800  # 2000-01-01T00:00:00Z as a Unix timestamp
+OFFER_SELL_FLAG = 0x00020000  # lsfSell on Offer ledger entries
 
 # Trading Constants
 DEFAULT_SLIPPAGE_TOLERANCE = Decimal("0.01")  # 1%
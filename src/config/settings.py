@@ -1,4 +1,6 @@
-from typing import Optional, List
+from pathlib import Path
+from typing import Any, Dict, Optional, List
+import orjson
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, field_validator
 from enum import Enum
@@ -21,6 +23,27 @@ class Strategy(str, Enum):
     MARKET_MAKING = "market_making"
 
 
+TOKENS_FILE = Path(__file__).with_name("tokens.json")
+
+
+def load_tokens() -> Dict[str, Dict[str, Any]]:
+    """Token name -> token config from tokens.json
+
+    Blocking; async callers should run it in an executor, e.g.
+    ``loop.run_in_executor(None, load_tokens)``.
+    """
+    return orjson.loads(TOKENS_FILE.read_bytes())
+
+
+def load_token_issuers() -> Dict[str, str]:
+    """Currency code -> issuer account for the tokens in tokens.json"""
+    try:
+        tokens = load_tokens()
+    except (OSError, ValueError):
+        return {}
+    return {token["token_code"]: token["token_address"] for token in tokens.values()}
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -40,6 +63,8 @@ class Settings(BaseSettings):
     
     # Trading Configuration
     trading_pair: str = Field(default="XRP/USDT")
+    # Issuer per currency code for order-book lookups; ISSUER_MAP takes JSON
+    issuer_map: Dict[str, str] = Field(default_factory=load_token_issuers)
     min_trade_amount: float = Field(default=10.0, gt=0)
     max_trade_amount: float = Field(default=1000.0, gt=0)
     stop_loss_percentage: float = Field(default=5.0, ge=0, le=100)
@@ -0,0 +1,101 @@
+"""
+On-disk cache for third-party API responses
+
+Historical endpoints return largely identical payloads from one run to the
+next, so raw responses are kept in a small SQLite file keyed by
+(source, pair, day) and reused until they expire.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from loguru import logger
+
+
+class APIResponseCache:
+    """SQLite-backed cache of raw JSON API responses"""
+
+    def __init__(
+        self,
+        path: str = "data/cache/api_cache.sqlite",
+        ttl_seconds: int = 24 * 60 * 60
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Open the cache database on first use"""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS api_cache ("
+                "key TEXT PRIMARY KEY, "
+                "payload TEXT NOT NULL, "
+                "fetched_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def make_key(source: str, *parts: Any) -> str:
+        """Build a cache key from a source name and request identifiers"""
+        return "|".join([source] + [str(part) for part in parts])
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a cached payload if present and not expired"""
+        row = self.conn.execute(
+            "SELECT payload FROM api_cache WHERE key = ? AND fetched_at > ?",
+            (key, time.time() - self.ttl_seconds)
+        ).fetchone()
+
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, payload: Any):
+        """Store a payload, replacing any previous entry"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO api_cache (key, payload, fetched_at) VALUES (?, ?, ?)",
+            (key, json.dumps(payload), time.time())
+        )
+        self.conn.commit()
+
+    async def cached_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Optional[Any]]]
+    ) -> Optional[Any]:
+        """Serve ``key`` from cache, calling ``fetch`` and storing the result on a miss"""
+        try:
+            payload = self.get(key)
+        except sqlite3.Error as e:
+            logger.warning(f"API cache read failed: {e}")
+            payload = None
+
+        if payload is not None:
+            logger.debug(f"API cache hit for {key}")
+            return payload
+
+        payload = await fetch()
+
+        if payload is not None:
+            try:
+                self.set(key, payload)
+            except sqlite3.Error as e:
+                logger.warning(f"API cache write failed: {e}")
+
+        return payload
+
+    def close(self):
+        """Close the cache database"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
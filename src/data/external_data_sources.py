@@ -6,14 +6,19 @@ this module interfaces with various third-party services.
 """
 
 import asyncio
-from typing import Dict, List, Any, Optional
+from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 from decimal import Decimal
+import numpy as np
 import pandas as pd
-import aiohttp
+from aiolimiter import AsyncLimiter
 from loguru import logger
 import json
 
+from src.data.api_cache import APIResponseCache
+from src.utils.frames import downcast_floats
+from src.utils.http import get_json, new_session
+
 
 class XRPLDataSources:
     """Interface to various XRPL data providers"""
@@ -32,6 +37,10 @@ class XRPLDataSources:
             "xrplorer": {
                 "base_url": "https://api.xrplorer.com",
                 "requires_auth": False
+            },
+            "xrptoolkit": {
+                "base_url": "https://api.xrptoolkit.com/v1",
+                "requires_auth": False
             }
         }
         
@@ -39,18 +48,34 @@ class XRPLDataSources:
         self.rate_limits = {
             "bithomp": {"calls": 10, "period": 60},  # 10 calls per minute
             "xrpscan": {"calls": 30, "period": 60},  # 30 calls per minute
-            "xrplorer": {"calls": 60, "period": 60}   # 60 calls per minute
+            "xrplorer": {"calls": 60, "period": 60},  # 60 calls per minute
+            "xrptoolkit": {"calls": 60, "period": 60}  # 60 calls per minute
+        }
+        
+        # Token bucket per source so each API is throttled to its own limit
+        self.limiters = {
+            source: AsyncLimiter(limit["calls"], limit["period"])
+            for source, limit in self.rate_limits.items()
         }
+        
+        # Raw responses are cached on disk so reruns only hit the API for
+        # windows that have not been fetched today
+        self.cache = APIResponseCache()
     
     async def fetch_bithomp_data(
         self,
         token_currency: str,
         token_issuer: str,
-        days: int = 30
+        days: int = 30,
+        columns: Optional[Dict[str, Any]] = None
     ) -> pd.DataFrame:
-        """Fetch data from Bithomp API"""
+        """Fetch data from Bithomp API
+        
+        ``columns`` holds per-token scalars (token, issuer, metrics) that are
+        attached to every row while the frame is built.
+        """
         try:
-            async with aiohttp.ClientSession() as session:
+            async with new_session() as session:
                 # Get price history
                 url = f"{self.sources['bithomp']['base_url']}/price"
                 params = {
@@ -59,32 +84,42 @@ class XRPLDataSources:
                     "days": days
                 }
                 
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._parse_bithomp_data(data)
-                    else:
-                        logger.warning(f"Bithomp API returned {response.status}")
-                        return pd.DataFrame()
+                key = self.cache.make_key(
+                    "bithomp", token_currency, token_issuer, days, datetime.now().date()
+                )
+                data = await self.cache.cached_fetch(
+                    key, lambda: get_json(session, self.limiters["bithomp"], "bithomp", url, params)
+                )
+                if data is None:
+                    return pd.DataFrame()
+                
+                return self._parse_bithomp_data(data, columns)
                         
         except Exception as e:
             logger.error(f"Error fetching Bithomp data: {e}")
             return pd.DataFrame()
     
-    def _parse_bithomp_data(self, data: Dict) -> pd.DataFrame:
-        """Parse Bithomp response into DataFrame"""
-        if "price" not in data:
+    def _parse_bithomp_data(
+        self,
+        data: Dict,
+        columns: Optional[Dict[str, Any]] = None
+    ) -> pd.DataFrame:
+        """Parse Bithomp response into long-form DataFrame"""
+        if "price" not in data or not data["price"]:
             return pd.DataFrame()
         
-        prices = []
-        for point in data["price"]:
-            prices.append({
-                "timestamp": datetime.fromtimestamp(point["t"]),
-                "price": float(point["v"]),
-                "volume": float(point.get("vol", 0))
-            })
+        points = data["price"]
+        frame = {
+            "timestamp": [datetime.fromtimestamp(point["t"]) for point in points],
+            "price": [float(point["v"]) for point in points],
+            "volume": [float(point.get("vol", 0)) for point in points]
+        }
+        
+        # Scalars broadcast to every row at construction time
+        if columns:
+            frame.update(columns)
         
-        return pd.DataFrame(prices)
+        return pd.DataFrame(frame)
     
     async def fetch_xrpl_orderbook_data(
         self,
@@ -96,20 +131,17 @@ class XRPLDataSources:
         """Fetch current orderbook data"""
         try:
             # Use XRP Toolkit API or similar
-            async with aiohttp.ClientSession() as session:
+            async with new_session() as session:
                 # Construct pair identifier
                 base = f"{base_currency}+{base_issuer}" if base_issuer else "XRP"
                 quote = f"{quote_currency}+{quote_issuer}" if quote_issuer else "XRP"
                 
                 # This is a placeholder - actual implementation would use real endpoints
-                url = f"https://api.xrptoolkit.com/v1/orderbook/{base}/{quote}"
+                url = f"{self.sources['xrptoolkit']['base_url']}/orderbook/{base}/{quote}"
                 
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        return {}
-                        
+                data = await get_json(session, self.limiters["xrptoolkit"], "xrptoolkit", url)
+                return data or {}
+
         except Exception as e:
             logger.error(f"Error fetching orderbook: {e}")
             return {}
@@ -140,64 +172,48 @@ class XRPLDataSources:
         days: int = 180
     ) -> pd.DataFrame:
         """Create comprehensive dataset from multiple sources"""
-        all_data = []
-        
-        for token_name, token_info in tokens.items():
-            logger.info(f"Fetching data for {token_name}")
-            
-            # Fetch from different sources
-            token_data = {
-                "token": token_name,
-                "issuer": token_info["token_address"],
-                "amm_address": token_info["amm_address"]
-            }
-            
-            # Get price data
-            price_data = await self.fetch_bithomp_data(
-                token_info["token_code"],
-                token_info["token_address"],
-                days
-            )
-            
-            if not price_data.empty:
-                token_data["price_history"] = price_data
-            
-            # Get on-chain metrics
-            metrics = await self.fetch_onchain_metrics(
-                token_info["token_address"],
-                token_info["amm_address"]
-            )
-            token_data.update(metrics)
-            
-            all_data.append(token_data)
-            
-            # Rate limiting
-            await asyncio.sleep(6)  # 10 requests per minute for Bithomp
+        # Per-source limiters throttle the fan-out, so tokens can be fetched
+        # concurrently
+        frames = await asyncio.gather(*(
+            self._fetch_token_dataset(token_name, token_info, days)
+            for token_name, token_info in tokens.items()
+        ))
         
-        return self._combine_data(all_data)
+        frames = [df for df in frames if not df.empty]
+        if frames:
+            return pd.concat(frames, ignore_index=True)
+        else:
+            return pd.DataFrame()
     
-    def _combine_data(self, data_list: List[Dict]) -> pd.DataFrame:
-        """Combine data from multiple sources into single DataFrame"""
-        combined = []
+    async def _fetch_token_dataset(
+        self,
+        token_name: str,
+        token_info: Dict[str, Any],
+        days: int
+    ) -> pd.DataFrame:
+        """Fetch long-form rows for a single token"""
+        logger.info(f"Fetching data for {token_name}")
         
-        for token_data in data_list:
-            if "price_history" in token_data and isinstance(token_data["price_history"], pd.DataFrame):
-                df = token_data["price_history"].copy()
-                df["token"] = token_data["token"]
-                df["issuer"] = token_data["issuer"]
-                df["amm_address"] = token_data["amm_address"]
-                
-                # Add metrics
-                for key, value in token_data.items():
-                    if key not in ["price_history", "token", "issuer", "amm_address"]:
-                        df[key] = value
-                
-                combined.append(df)
+        # Get on-chain metrics
+        metrics = await self.fetch_onchain_metrics(
+            token_info["token_address"],
+            token_info["amm_address"]
+        )
         
-        if combined:
-            return pd.concat(combined, ignore_index=True)
-        else:
-            return pd.DataFrame()
+        columns = {
+            "token": token_name,
+            "issuer": token_info["token_address"],
+            "amm_address": token_info["amm_address"],
+            **metrics
+        }
+        
+        # Get price data with token columns attached
+        return await self.fetch_bithomp_data(
+            token_info["token_code"],
+            token_info["token_address"],
+            days,
+            columns=columns
+        )
 
 
 class DataAggregator:
@@ -224,15 +240,13 @@ class DataAggregator:
             logger.warning("No data fetched")
             return {}
         
-        # Process data for each token
+        # Process data for each token (single grouping pass over the dataset)
         training_data = {}
-        
-        for token in tokens.keys():
-            token_data = raw_data[raw_data["token"] == token].copy()
-            
+
+        for token, token_data in raw_data.groupby("token", sort=False, observed=True):
             if token_data.empty:
                 continue
-            
+
             # Add technical indicators
             token_data = self._add_features(token_data)
             
@@ -250,7 +264,7 @@ class DataAggregator:
         
         # Price-based features
         df["returns"] = df["price"].pct_change()
-        df["log_returns"] = df["price"].apply(lambda x: pd.np.log(x) if x > 0 else 0).diff()
+        df["log_returns"] = np.log(df["price"].where(df["price"] > 0, 1.0)).diff()
         
         # Moving averages
         for window in [7, 14, 30]:
@@ -267,11 +281,11 @@ class DataAggregator:
             df["volume_ratio"] = df["volume"] / df["volume_ma_7"]
         
         # Time features
-        df["hour"] = df["timestamp"].dt.hour
-        df["day_of_week"] = df["timestamp"].dt.dayofweek
-        df["month"] = df["timestamp"].dt.month
+        df["hour"] = df["timestamp"].dt.hour.astype(np.int8)
+        df["day_of_week"] = df["timestamp"].dt.dayofweek.astype(np.int8)
+        df["month"] = df["timestamp"].dt.month.astype(np.int8)
         
-        return df
+        return downcast_floats(df)
     
     def _create_sequences(
         self,
@@ -1,19 +1,50 @@
 import asyncio
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, NamedTuple, Optional, Tuple
 from datetime import datetime, timedelta
 from decimal import Decimal
+import numpy as np
 import pandas as pd
 import json
 from loguru import logger
 from xrpl.asyncio.clients import AsyncWebsocketClient, AsyncJsonRpcClient
 from xrpl.models.requests import Ledger, AccountOffers, BookOffers
 from xrpl.models import LedgerClosed, Subscribe, Unsubscribe
-import aiohttp
+from aiolimiter import AsyncLimiter
 
 from src.config.settings import Settings
+from src.data.api_cache import APIResponseCache
+from src.utils.frames import downcast_floats
+from src.utils.http import get_json, new_session
 import os
 
 
+MEME_TOKENS = frozenset({"BEAR", "FML", "CULT", "OBEY", "POSSE", "XJOY"})
+STABLECOINS = frozenset({"RLUSD", "USD", "USDT"})
+
+
+class PairSpec(NamedTuple):
+    """Trading pair discovered on the XRPL DEX"""
+    symbol: str
+    base: str
+    quote: str
+    kind: str
+    base_currency: Optional[str] = None
+    base_issuer: Optional[str] = None
+    quote_issuer: Optional[str] = None
+    amm_address: Optional[str] = None
+    amm_code: Optional[str] = None
+    issuer_name: Optional[str] = None
+    
+    @property
+    def key(self) -> str:
+        """Identifier used for file names and result dictionaries"""
+        if self.quote_issuer:
+            return f"{self.base}/{self.quote}:{self.quote_issuer[-8:]}"
+        if self.base_issuer:
+            return f"{self.base}:{self.base_issuer[-8:]}/{self.quote}"
+        return f"{self.base}/{self.quote}"
+
+
 class XRPLDexDataFetcher:
     """Fetches historical DEX and AMM data from XRPL"""
     
@@ -47,6 +78,18 @@ class XRPLDexDataFetcher:
                 "issuer": "rcoreNywaoz2ZCQ8Lg2EbSLnGuRBmun6D"
             }
         }
+        
+        # Rate limiting (token bucket per data source)
+        self.rate_limits = {
+            "data_api": {"calls": 60, "period": 60}  # 60 calls per minute
+        }
+        self.limiters = {
+            source: AsyncLimiter(limit["calls"], limit["period"])
+            for source, limit in self.rate_limits.items()
+        }
+        
+        # On-disk cache of raw API responses keyed by (source, pair, day)
+        self.cache = APIResponseCache()
     
     def _load_token_config(self) -> Dict[str, Any]:
         """Load token configuration from JSON file"""
@@ -126,7 +169,7 @@ class XRPLDexDataFetcher:
         # Example using a hypothetical XRPL data service
         # Replace with actual API endpoints
         
-        async with aiohttp.ClientSession() as session:
+        async with new_session() as session:
             # Construct API request
             base = f"{base_currency}+{base_issuer}" if base_issuer else "XRP"
             quote = f"{quote_currency}+{quote_issuer}" if quote_issuer else "XRP"
@@ -140,13 +183,16 @@ class XRPLDexDataFetcher:
             }
             
             try:
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._parse_exchange_data(data)
-                    else:
-                        logger.warning(f"API returned status {response.status}")
-                        return pd.DataFrame()
+                key = self.cache.make_key(
+                    "data_api", base, quote, start_time.date(), end_time.date()
+                )
+                data = await self.cache.cached_fetch(
+                    key, lambda: get_json(session, self.limiters["data_api"], "data_api", url, params)
+                )
+                if data is None:
+                    return pd.DataFrame()
+                
+                return self._parse_exchange_data(data)
             except Exception as e:
                 logger.error(f"Error fetching from data API: {e}")
                 return pd.DataFrame()
@@ -265,48 +311,43 @@ class XRPLDexDataFetcher:
         
         return pd.DataFrame(amm_data)
     
-    async def discover_active_pairs(self) -> List[Dict[str, Any]]:
+    async def discover_active_pairs(self) -> List[PairSpec]:
         """Discover active trading pairs on XRPL DEX"""
         active_pairs = []
         
         # Add pairs from tokens.json (all AMM pools with XRP)
         for token_name, token_info in self.tokens.items():
-            pair_info = {
-                "symbol": token_name,
-                "base": token_name,
-                "base_currency": token_info["token_code"],
-                "base_issuer": token_info["token_address"],
-                "quote": "XRP",
-                "amm_address": token_info["amm_address"],
-                "amm_code": token_info["amm_code"],
-                "type": self._classify_token(token_name)
-            }
-            active_pairs.append(pair_info)
+            active_pairs.append(PairSpec(
+                symbol=token_name,
+                base=token_name,
+                quote="XRP",
+                kind=self._classify_token(token_name),
+                base_currency=token_info["token_code"],
+                base_issuer=token_info["token_address"],
+                amm_address=token_info["amm_address"],
+                amm_code=token_info["amm_code"]
+            ))
         
         # Add stablecoin pairs
         for token, issuers in self.additional_tokens.items():
-            if token in ["USD", "USDT"]:  # Stablecoins
+            if token in STABLECOINS:
                 for issuer_name, issuer_address in issuers.items():
-                    pair_info = {
-                        "symbol": f"{token}-{issuer_name}",
-                        "base": "XRP",
-                        "quote": token,
-                        "quote_issuer": issuer_address,
-                        "issuer_name": issuer_name,
-                        "type": "stablecoin"
-                    }
-                    active_pairs.append(pair_info)
+                    active_pairs.append(PairSpec(
+                        symbol=f"{token}-{issuer_name}",
+                        base="XRP",
+                        quote=token,
+                        kind="stablecoin",
+                        quote_issuer=issuer_address,
+                        issuer_name=issuer_name
+                    ))
         
         return active_pairs
     
     def _classify_token(self, token_name: str) -> str:
         """Classify token type based on name"""
-        meme_tokens = ["BEAR", "FML", "CULT", "OBEY", "POSSE", "XJOY"]
-        stablecoins = ["RLUSD", "USD", "USDT"]
-        
-        if token_name in meme_tokens:
+        if token_name in MEME_TOKENS:
             return "meme"
-        elif token_name in stablecoins:
+        elif token_name in STABLECOINS:
             return "stablecoin"
         else:
             return "token"
@@ -314,7 +355,7 @@ class XRPLDexDataFetcher:
     async def fetch_all_pairs_data(
         self,
         days: int = 180,  # 6 months
-        pairs: Optional[List[Dict]] = None
+        pairs: Optional[List[PairSpec]] = None
     ) -> Dict[str, pd.DataFrame]:
         """Fetch data for all specified pairs"""
         if pairs is None:
@@ -326,22 +367,12 @@ class XRPLDexDataFetcher:
         
         for pair in pairs:
             try:
-                base = pair.get("base", "XRP")
-                base_issuer = pair.get("base_issuer")
-                quote = pair.get("quote", "XRP")
-                quote_issuer = pair.get("quote_issuer")
-                
-                pair_key = f"{base}/{quote}"
-                if base_issuer:
-                    pair_key = f"{base}:{base_issuer[-8:]}/{quote}"
-                if quote_issuer:
-                    pair_key = f"{base}/{quote}:{quote_issuer[-8:]}"
-                
+                pair_key = pair.key
                 logger.info(f"Fetching data for {pair_key}")
                 
                 df = await self.fetch_dex_trades(
-                    base, base_issuer,
-                    quote, quote_issuer,
+                    pair.base, pair.base_issuer,
+                    pair.quote, pair.quote_issuer,
                     start_time, end_time
                 )
                 
@@ -349,11 +380,8 @@ class XRPLDexDataFetcher:
                     all_data[pair_key] = df
                     logger.info(f"Fetched {len(df)} records for {pair_key}")
                 
-                # Rate limiting
-                await asyncio.sleep(1)
-                
             except Exception as e:
-                logger.error(f"Error fetching pair {pair}: {e}")
+                logger.error(f"Error fetching pair {pair.symbol}: {e}")
         
         return all_data
     
@@ -452,7 +480,7 @@ class XRPLDexDataFetcher:
         df["volume_sma"] = df["base_volume"].rolling(window=20).mean()
         df["volume_ratio"] = df["base_volume"] / df["volume_sma"]
         
-        return df
+        return downcast_floats(df)
     
     def _create_ml_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Create features for machine learning"""
@@ -472,6 +500,6 @@ class XRPLDexDataFetcher:
         df["target"] = df["returns_1h"].shift(-1)
         
         # Classification target (up/down)
-        df["target_class"] = (df["target"] > 0).astype(int)
+        df["target_class"] = (df["target"] > 0).astype(np.int8)
         
-        return df
\ No newline at end of file
+        return downcast_floats(df)
\ No newline at end of file
@@ -2,12 +2,37 @@
 Database models for storing XRPL trading data
 """
 
-from sqlalchemy import create_engine, Column, String, DateTime, Numeric, Integer, JSON, Index, Float, Boolean, ForeignKey, UniqueConstraint, Text, func
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy import create_engine, insert, select, text, Column, String, DateTime, Numeric, Integer, Index, LargeBinary, REAL, DOUBLE_PRECISION, Boolean, CheckConstraint, FetchedValue, ForeignKey, UniqueConstraint, Text, func
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column, sessionmaker, relationship
+from loguru import logger
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+import csv
+import io
+import threading
 from datetime import datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
-Base = declarative_base()
+import orjson
+import zstandard
+from xrpl.core.addresscodec import decode_classic_address
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+def address_bytes(address: Optional[str]) -> Optional[bytes]:
+    """Decode a classic r-address to its 20-byte AccountID for fixed-width keys"""
+    if not address:
+        return None
+    try:
+        return decode_classic_address(address)
+    except Exception:
+        return None
 
 
 class Asset(Base):
@@ -24,8 +49,8 @@ class Asset(Base):
     asset_type = Column(String(20), default='token')  # 'token', 'lp_token'
     pool_asset1_id = Column(Integer, ForeignKey('assets.id'))  # For LP tokens
     pool_asset2_id = Column(Integer, ForeignKey('assets.id'))  # For LP tokens
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), server_onupdate=FetchedValue())  # set_updated_at trigger
     
     # Relationships for LP tokens
     pool_asset1 = relationship("Asset", foreign_keys=[pool_asset1_id], remote_side=[id])
@@ -33,6 +58,11 @@ class Asset(Base):
     
     __table_args__ = (
         UniqueConstraint('currency_code', 'issuer', name='_currency_issuer_uc'),
+        # NULL issuers never conflict on the constraint above
+        Index(
+            "_currency_native_uc", "currency_code",
+            unique=True, postgresql_where=text("issuer IS NULL")
+        ),
     )
 
 
@@ -40,35 +70,40 @@ class DEXTrade(Base):
     """DEX trade history"""
     __tablename__ = "dex_trades"
     
-    id = Column(Integer, primary_key=True)
-    timestamp = Column(DateTime, nullable=False, index=True)
-    ledger_index = Column(Integer, nullable=False, index=True)
-    transaction_hash = Column(String(64), nullable=False, unique=True)
+    # Time column is part of the key so the table can be partitioned by time
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    timestamp: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    ledger_index: Mapped[int] = mapped_column(Integer)
+    transaction_hash: Mapped[str] = mapped_column(String(64))
     
     # Trade details
-    account = Column(String(34), nullable=False)
-    offer_sequence = Column(Integer)
+    account: Mapped[str] = mapped_column(String(34))
+    account_bytes: Mapped[Optional[bytes]] = mapped_column(LargeBinary(20))
+    offer_sequence: Mapped[Optional[int]] = mapped_column(Integer)
     
     # Assets traded
-    gets_currency = Column(String(40), nullable=False)
-    gets_issuer = Column(String(34))
-    gets_amount = Column(Numeric(40, 20), nullable=False)
+    gets_asset_id: Mapped[int] = mapped_column(Integer, ForeignKey('assets.id'))
+    gets_amount: Mapped[Decimal] = mapped_column(Numeric(30, 15))
     
-    pays_currency = Column(String(40), nullable=False)
-    pays_issuer = Column(String(34))
-    pays_amount = Column(Numeric(40, 20), nullable=False)
+    pays_asset_id: Mapped[int] = mapped_column(Integer, ForeignKey('assets.id'), index=True)
+    pays_amount: Mapped[Decimal] = mapped_column(Numeric(30, 15))
     
     # Calculated fields
-    price = Column(Numeric(20, 8))
-    quality = Column(Numeric(20, 8))
+    price: Mapped[Optional[Decimal]] = mapped_column(Numeric(20, 8))
+    quality: Mapped[Optional[Decimal]] = mapped_column(Numeric(20, 8))
     
     # Metadata
-    flags = Column(Integer)
-    fee_xrp = Column(Numeric(20, 6))
+    flags: Mapped[Optional[int]] = mapped_column(Integer)
+    fee_xrp: Mapped[Optional[Decimal]] = mapped_column(Numeric(20, 6))
     
     __table_args__ = (
-        Index("idx_dex_timestamp", "timestamp"),
-        Index("idx_dex_pair", "gets_currency", "pays_currency", "timestamp"),
+        UniqueConstraint('transaction_hash', 'timestamp', name='_dex_tx_uc'),
+        # Covers OHLCV reads so they are served by index-only scans
+        Index(
+            "idx_dex_pair_covering", "gets_asset_id", "pays_asset_id", "timestamp",
+            postgresql_include=["price", "gets_amount", "pays_amount"]
+        ),
+        Index("idx_dex_account", "account_bytes", "timestamp"),
     )
 
 
@@ -76,33 +111,33 @@ class AMMSnapshot(Base):
     """Historical AMM pool snapshots"""
     __tablename__ = "amm_snapshots"
     
-    id = Column(Integer, primary_key=True)
-    timestamp = Column(DateTime, nullable=False, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    timestamp = Column(DateTime, primary_key=True)
     ledger_index = Column(Integer, nullable=False)
-    amm_address = Column(String(34), nullable=False, index=True)
+    amm_address = Column(String(34), nullable=False)
+    amm_address_bytes = Column(LargeBinary(20))
     
     # Pool assets
-    asset1_currency = Column(String(40), nullable=False)
-    asset1_issuer = Column(String(34))
-    asset1_amount = Column(Numeric(40, 20), nullable=False)
+    asset1_id = Column(Integer, ForeignKey('assets.id'), nullable=False, index=True)
+    asset1_amount = Column(Numeric(30, 15), nullable=False)
     
-    asset2_currency = Column(String(40), nullable=False)
-    asset2_issuer = Column(String(34))
-    asset2_amount = Column(Numeric(40, 20), nullable=False)
+    asset2_id = Column(Integer, ForeignKey('assets.id'), nullable=False, index=True)
+    asset2_amount = Column(Numeric(30, 15), nullable=False)
     
     # LP token info
     lp_token_currency = Column(String(40), nullable=False)
-    lp_token_supply = Column(Numeric(40, 20), nullable=False)
+    lp_token_supply = Column(Numeric(30, 15), nullable=False)
     
     # Pool metrics
     trading_fee = Column(Integer)  # In basis points
-    k_constant = Column(Numeric(80, 20))
-    price_asset2_per_asset1 = Column(Numeric(20, 8))
+    # Derived analytics, so float8; the pool amounts above stay exact
+    k_constant = Column(DOUBLE_PRECISION)
+    price_asset2_per_asset1 = Column(DOUBLE_PRECISION)
     tvl_xrp = Column(Numeric(20, 6))
     
     __table_args__ = (
-        Index("idx_amm_snapshot", "amm_address", "timestamp"),
-        UniqueConstraint('amm_address', 'ledger_index', name='_amm_ledger_uc'),
+        Index("idx_amm_snapshot", "amm_address_bytes", "timestamp"),
+        UniqueConstraint('amm_address', 'ledger_index', 'timestamp', name='_amm_ledger_uc'),
     )
 
 
@@ -110,34 +145,39 @@ class TokenTransaction(Base):
     """Token transfers extracted from transaction metadata"""
     __tablename__ = "token_transactions"
     
-    id = Column(Integer, primary_key=True)
-    transaction_hash = Column(String(64), nullable=False)
-    ledger_index = Column(Integer, nullable=False)
-    timestamp = Column(DateTime, nullable=False, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    transaction_hash: Mapped[str] = mapped_column(String(64))
+    ledger_index: Mapped[int] = mapped_column(Integer)
+    timestamp: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
     
     # Transaction parties
-    wallet_address = Column(String(34), nullable=False, index=True)
-    counterparty = Column(String(34))
+    wallet_address: Mapped[str] = mapped_column(String(34))
+    wallet_address_bytes: Mapped[Optional[bytes]] = mapped_column(LargeBinary(20))
+    counterparty: Mapped[Optional[str]] = mapped_column(String(34))
     
     # Token details
-    currency = Column(String(40), nullable=False)
-    issuer = Column(String(34))
-    amount = Column(Numeric(40, 20), nullable=False)
+    asset_id: Mapped[int] = mapped_column(Integer, ForeignKey('assets.id'), index=True)
+    amount: Mapped[Decimal] = mapped_column(Numeric(30, 15))
     
     # Transaction type and direction
-    transaction_type = Column(String(20), nullable=False)  # payment, dex_trade, amm_deposit, etc.
-    is_receive = Column(Boolean, nullable=False)
+    transaction_type: Mapped[str] = mapped_column(String(20))  # payment, dex_trade, amm_deposit, etc.
+    is_receive: Mapped[bool] = mapped_column(Boolean)
     
     # Price data (if available)
-    xrp_price = Column(Numeric(20, 8))
-    xrp_value = Column(Numeric(20, 8))
+    xrp_price: Mapped[Optional[Decimal]] = mapped_column(Numeric(20, 8))
+    xrp_value: Mapped[Optional[Decimal]] = mapped_column(Numeric(20, 8))
     
     # Metadata
-    fee_xrp = Column(Numeric(20, 6))
+    fee_xrp: Mapped[Optional[Decimal]] = mapped_column(Numeric(20, 6))
     
     __table_args__ = (
-        Index("idx_token_tx_wallet", "wallet_address", "timestamp"),
-        Index("idx_token_tx_currency", "currency", "issuer", "timestamp"),
+        # One row per transfer, so replayed ledgers are skipped on insert
+        UniqueConstraint(
+            "transaction_hash", "wallet_address", "asset_id", "is_receive", "timestamp",
+            name="_token_tx_transfer_uc"
+        ),
+        Index("idx_token_tx_wallet", "wallet_address_bytes", "timestamp"),
+        Index("idx_token_tx_asset", "asset_id", "timestamp"),
     )
 
 
@@ -146,21 +186,21 @@ class AMMPosition(Base):
     __tablename__ = "amm_positions"
     
     id = Column(Integer, primary_key=True)
-    wallet_address = Column(String(34), nullable=False, index=True)
+    wallet_address = Column(String(34), nullable=False)
     amm_address = Column(String(34), nullable=False, index=True)
     
     # Initial deposit
     deposit_tx_hash = Column(String(64), nullable=False)
     deposit_timestamp = Column(DateTime, nullable=False)
     initial_xrp = Column(Numeric(20, 6))
-    initial_token = Column(Numeric(40, 20))
+    initial_token = Column(Numeric(30, 15))
     initial_token_currency = Column(String(40), nullable=False)
     initial_token_issuer = Column(String(34))
     
     # LP token details
-    lp_tokens_received = Column(Numeric(40, 20), nullable=False)
+    lp_tokens_received = Column(Numeric(30, 15), nullable=False)
     initial_pool_share = Column(Numeric(10, 8))
-    current_lp_tokens = Column(Numeric(40, 20), nullable=False)
+    current_lp_tokens = Column(Numeric(30, 15), nullable=False)
     
     # P&L tracking
     fees_earned_xrp = Column(Numeric(20, 6), default=0)
@@ -171,11 +211,12 @@ class AMMPosition(Base):
     is_active = Column(Boolean, default=True)
     last_update_timestamp = Column(DateTime)
     
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), server_onupdate=FetchedValue())  # set_updated_at trigger
     
     __table_args__ = (
         UniqueConstraint('wallet_address', 'amm_address', 'deposit_tx_hash', name='_position_uc'),
+        Index("idx_positions_active", "wallet_address", postgresql_where=text("is_active = true")),
     )
 
 
@@ -197,16 +238,30 @@ class DataCollectionLog(Base):
     error_message = Column(Text)
     
     # Timing
-    started_at = Column(DateTime, nullable=False, default=func.now())
-    completed_at = Column(DateTime)
-    last_run = Column(DateTime)  # Last time the collector ran
+    started_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    completed_at = Column(DateTime(timezone=True))
+    last_run = Column(DateTime(timezone=True))  # Last time the collector ran
     
     # Metrics
     records_collected = Column(Integer, default=0)
     
+    @classmethod
+    def increment_statement(cls, log_id: int, records: int, last_processed_ledger: int):
+        """Single UPDATE adding a batch of collected records and advancing progress"""
+        return text(
+            "UPDATE data_collection_logs "
+            "SET records_collected = COALESCE(records_collected, 0) + :n, "
+            "last_run = now(), last_processed_ledger = :ledger "
+            "WHERE id = :id"
+        ).bindparams(n=records, ledger=last_processed_ledger, id=log_id)
+    
     __table_args__ = (
+        # Its unique index also serves (collection_type, target) lookups
         UniqueConstraint('collection_type', 'target', name='_collection_target_uc'),
-        Index("idx_collection_target", "collection_type", "target"),
+        Index(
+            "idx_logs_running", "collection_type", "target",
+            postgresql_where=text("status IN ('running', 'active')")
+        ),
     )
 
 
@@ -214,52 +269,28 @@ class PriceData(Base):
     """Historical price data for trading pairs"""
     __tablename__ = "price_data"
     
-    id = Column(Integer, primary_key=True)
-    timestamp = Column(DateTime, nullable=False, index=True)
-    pair = Column(String(50), nullable=False, index=True)
-    token = Column(String(20), nullable=False)
-    issuer = Column(String(64))
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    timestamp: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    pair: Mapped[str] = mapped_column(String(50))
+    token: Mapped[str] = mapped_column(String(20))
+    issuer: Mapped[Optional[str]] = mapped_column(String(64))
     
-    # OHLCV data
-    open = Column(Numeric(20, 8), nullable=False)
-    high = Column(Numeric(20, 8), nullable=False)
-    low = Column(Numeric(20, 8), nullable=False)
-    close = Column(Numeric(20, 8), nullable=False)
-    volume = Column(Numeric(20, 8))
+    # OHLCV data (analytics only, so stored as float8 rather than NUMERIC)
+    open: Mapped[float] = mapped_column(DOUBLE_PRECISION)
+    high: Mapped[float] = mapped_column(DOUBLE_PRECISION)
+    low: Mapped[float] = mapped_column(DOUBLE_PRECISION)
+    close: Mapped[float] = mapped_column(DOUBLE_PRECISION)
+    volume: Mapped[Optional[float]] = mapped_column(DOUBLE_PRECISION)
     
     # Additional metrics
-    trades_count = Column(Integer)
-    vwap = Column(Numeric(20, 8))  # Volume weighted average price
-    
-    __table_args__ = (
-        Index("idx_pair_timestamp", "pair", "timestamp"),
-    )
-
-
-class AMMPoolState(Base):
-    """AMM pool state snapshots"""
-    __tablename__ = "amm_pool_states"
-    
-    id = Column(Integer, primary_key=True)
-    timestamp = Column(DateTime, nullable=False, index=True)
-    amm_address = Column(String(64), nullable=False, index=True)
-    token = Column(String(20), nullable=False)
-    
-    # Pool reserves
-    xrp_reserve = Column(Numeric(20, 6), nullable=False)
-    token_reserve = Column(Numeric(20, 6), nullable=False)
-    
-    # Calculated metrics
-    price = Column(Numeric(20, 8), nullable=False)
-    k_constant = Column(Numeric(40, 6))
-    tvl_xrp = Column(Numeric(20, 6))
-    
-    # Pool parameters
-    trading_fee = Column(Float)
-    lp_token_supply = Column(Numeric(20, 6))
+    trades_count: Mapped[Optional[int]] = mapped_column(Integer)
+    vwap: Mapped[Optional[float]] = mapped_column(DOUBLE_PRECISION)  # Volume weighted average price
     
     __table_args__ = (
-        Index("idx_amm_timestamp", "amm_address", "timestamp"),
+        Index(
+            "idx_pair_timestamp_cov", "pair", "timestamp",
+            postgresql_include=["open", "high", "low", "close", "volume"]
+        ),
     )
 
 
@@ -269,7 +300,7 @@ class OrderBookSnapshot(Base):
     
     id = Column(Integer, primary_key=True)
     timestamp = Column(DateTime, nullable=False, index=True)
-    pair = Column(String(50), nullable=False, index=True)
+    pair = Column(String(50), nullable=False)
     
     # Aggregated data
     best_bid = Column(Numeric(20, 8))
@@ -278,9 +309,13 @@ class OrderBookSnapshot(Base):
     ask_volume = Column(Numeric(20, 8))
     spread = Column(Numeric(20, 8))
     
-    # Full order book (JSON)
-    bids = Column(JSON)
-    asks = Column(JSON)
+    # Top of book levels (queryable)
+    bids = Column(JSONB)
+    asks = Column(JSONB)
+    
+    # Full order book, zstd-compressed JSON
+    bids_raw = Column(LargeBinary)
+    asks_raw = Column(LargeBinary)
     
     __table_args__ = (
         Index("idx_orderbook_pair_time", "pair", "timestamp"),
@@ -298,7 +333,7 @@ class TradingSignal(Base):
     
     # Signal details
     action = Column(String(10), nullable=False)  # buy, sell, hold
-    confidence = Column(Float)
+    confidence = Column(REAL)
     price = Column(Numeric(20, 8))
     
     # Risk parameters
@@ -307,8 +342,13 @@ class TradingSignal(Base):
     position_size = Column(Numeric(20, 8))
     
     # Additional context
-    indicators = Column(JSON)
+    indicators = Column(JSONB)
     reason = Column(String(500))
+    
+    __table_args__ = (
+        Index("idx_signal_indicators", "indicators", postgresql_using="gin"),
+        CheckConstraint("confidence BETWEEN 0 AND 1", name="_signal_confidence_ck"),
+    )
 
 
 class BacktestResult(Base):
@@ -316,7 +356,7 @@ class BacktestResult(Base):
     __tablename__ = "backtest_results"
     
     id = Column(Integer, primary_key=True)
-    run_date = Column(DateTime, nullable=False, default=datetime.now)
+    run_date = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     strategy = Column(String(50), nullable=False)
     pair = Column(String(50), nullable=False)
     
@@ -333,16 +373,55 @@ class BacktestResult(Base):
     
     # Performance metrics
     total_pnl = Column(Numeric(20, 8))
-    total_pnl_percent = Column(Float)
+    total_pnl_percent = Column(REAL)
     max_drawdown = Column(Numeric(20, 8))
-    max_drawdown_percent = Column(Float)
-    sharpe_ratio = Column(Float)
-    win_rate = Column(Float)
+    max_drawdown_percent = Column(REAL)
+    sharpe_ratio = Column(REAL)
+    win_rate = Column(REAL)
+    
+    # Detailed results (trades, equity curve, parameters) live in
+    # backtest_artifacts so scans of the metrics above stay narrow
+    artifacts = relationship(
+        "BacktestArtifact",
+        back_populates="result",
+        lazy="select",
+        cascade="all, delete-orphan"
+    )
     
-    # Detailed results
-    trades = Column(JSON)
-    equity_curve = Column(JSON)
-    parameters = Column(JSON)
+    def artifact(self, kind: str) -> Any:
+        """Decoded payload of one artifact kind, or None if absent"""
+        for artifact in self.artifacts:
+            if artifact.kind == kind:
+                return artifact.data
+        return None
+
+
+class BacktestArtifact(Base):
+    """Compressed bulk payloads attached to a backtest result"""
+    __tablename__ = "backtest_artifacts"
+    
+    KINDS = ("trades", "equity", "params")
+    
+    id = Column(Integer, primary_key=True)
+    result_id = Column(Integer, ForeignKey('backtest_results.id', ondelete='CASCADE'), nullable=False)
+    kind = Column(String(20), nullable=False)  # trades, equity, params
+    payload = Column(LargeBinary, nullable=False)  # zstd-compressed JSON
+    
+    result = relationship("BacktestResult", back_populates="artifacts")
+    
+    __table_args__ = (
+        UniqueConstraint('result_id', 'kind', name='_backtest_artifact_uc'),
+    )
+    
+    @staticmethod
+    def pack(data: Any) -> bytes:
+        """Serialise and compress a payload for storage"""
+        return zstandard.ZstdCompressor(level=9).compress(orjson.dumps(data, default=str))
+    
+    @property
+    def data(self) -> Any:
+        """Decompressed payload"""
+        return orjson.loads(zstandard.ZstdDecompressor().decompress(self.payload))
 
 
 class MLPrediction(Base):
@@ -357,36 +436,677 @@ class MLPrediction(Base):
     # Predictions
     predicted_price = Column(Numeric(20, 8))
     predicted_direction = Column(String(10))  # up, down
-    confidence = Column(Float)
+    confidence = Column(REAL)
     
     # Actual outcomes (filled later)
     actual_price = Column(Numeric(20, 8))
     actual_direction = Column(String(10))
-    error = Column(Float)
+    error = Column(REAL)
     
     # Features used
-    features = Column(JSON)
+    features = Column(JSONB)
+    
+    __table_args__ = (
+        Index("idx_ml_features", "features", postgresql_using="gin"),
+        # Predictions still waiting for their outcome to be filled in
+        Index("idx_ml_pending", "timestamp", postgresql_where=text("actual_price IS NULL")),
+        CheckConstraint("confidence BETWEEN 0 AND 1", name="_prediction_confidence_ck"),
+    )
 
 
 # Database connection management
-def get_engine(database_url: str):
-    """Create database engine"""
-    return create_engine(
-        database_url,
-        pool_size=10,
-        max_overflow=20,
-        pool_pre_ping=True
-    )
+def _json_serializer(obj: Any) -> str:
+    """Serialize JSON columns with orjson (numpy arrays included)"""
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+# Engines built with default options, one per URL, so every caller shares a pool
+_engines: Dict[str, Any] = {}
+_async_engines: Dict[str, AsyncEngine] = {}
+_initialized_urls: set = set()
+_engines_lock = threading.Lock()
+
+
+# Per-process connection budget: both pools together peak at 60 connections,
+# leaving headroom under PostgreSQL's default max_connections of 100
+SYNC_POOL_SIZE = 20
+SYNC_MAX_OVERFLOW = 10
+ASYNC_POOL_SIZE = 20
+ASYNC_MAX_OVERFLOW = 10
+
+
+def get_engine(database_url: str, **kwargs):
+    """Create database engine
+    
+    Defaults are tuned for long-running PostgreSQL collectors; any keyword
+    argument overrides the corresponding ``create_engine`` option. Without
+    overrides the engine is cached and reused for the same URL.
+    """
+    if not kwargs:
+        engine = _engines.get(database_url)
+        if engine is None:
+            with _engines_lock:
+                engine = _engines.get(database_url)
+                if engine is None:
+                    engine = _engines[database_url] = _create_engine(database_url)
+        return engine
+    
+    return _create_engine(database_url, **kwargs)
+
+
+def _create_engine(database_url: str, **kwargs):
+    """Build a new engine with the collector defaults"""
+    options: Dict[str, Any] = {
+        "pool_pre_ping": True,
+        "future": True,
+        "json_serializer": _json_serializer,
+        "json_deserializer": orjson.loads,
+        "insertmanyvalues_page_size": 1000,
+    }
+    
+    if database_url.startswith("postgresql"):
+        options.update(
+            pool_size=SYNC_POOL_SIZE,
+            max_overflow=SYNC_MAX_OVERFLOW,
+            pool_recycle=1800,
+            pool_timeout=30,
+        )
+        if "+" not in database_url.split("://", 1)[0] or "+psycopg2" in database_url:
+            options["executemany_mode"] = "values_plus_batch"
+    
+    options.update(kwargs)
+    return create_engine(database_url, **options)
+
+
+def get_async_engine(database_url: str, **kwargs) -> AsyncEngine:
+    """Create an asyncpg-backed engine for the coroutine storage paths
+    
+    Accepts the same URL as ``get_engine``; the driver is swapped for asyncpg.
+    Like ``get_engine``, engines built without overrides are cached per URL.
+    """
+    if not kwargs:
+        engine = _async_engines.get(database_url)
+        if engine is None:
+            with _engines_lock:
+                engine = _async_engines.get(database_url)
+                if engine is None:
+                    engine = _async_engines[database_url] = _create_async_engine(database_url)
+        return engine
+    
+    return _create_async_engine(database_url, **kwargs)
+
+
+def _create_async_engine(database_url: str, **kwargs) -> AsyncEngine:
+    """Build a new asyncpg engine with the collector defaults"""
+    url = make_url(database_url).set(drivername="postgresql+asyncpg")
+    options: Dict[str, Any] = {
+        "pool_pre_ping": True,
+        "json_serializer": _json_serializer,
+        "json_deserializer": orjson.loads,
+        "pool_size": ASYNC_POOL_SIZE,
+        "max_overflow": ASYNC_MAX_OVERFLOW,
+        "pool_recycle": 1800,
+        "pool_timeout": 30,
+    }
+    
+    options.update(kwargs)
+    return create_async_engine(url, **options)
+
+
+# Legacy XRP/token pool-state shape, served from the canonical amm_snapshots
+AMM_POOL_STATES_VIEW = """
+CREATE OR REPLACE VIEW amm_pool_states AS
+SELECT s.id,
+       s.timestamp,
+       s.amm_address,
+       CASE WHEN a1.currency_code = 'XRP' THEN a2.currency_code ELSE a1.currency_code END AS token,
+       CASE WHEN a1.currency_code = 'XRP' THEN s.asset1_amount ELSE s.asset2_amount END::double precision AS xrp_reserve,
+       CASE WHEN a1.currency_code = 'XRP' THEN s.asset2_amount ELSE s.asset1_amount END::double precision AS token_reserve,
+       CASE WHEN a1.currency_code = 'XRP'
+            THEN s.asset1_amount / NULLIF(s.asset2_amount, 0)
+            ELSE s.asset2_amount / NULLIF(s.asset1_amount, 0)
+       END::double precision AS price,
+       s.k_constant::double precision AS k_constant,
+       s.tvl_xrp::double precision AS tvl_xrp,
+       s.trading_fee,
+       s.lp_token_supply,
+       s.amm_address_bytes
+FROM amm_snapshots s
+JOIN assets a1 ON a1.id = s.asset1_id
+JOIN assets a2 ON a2.id = s.asset2_id
+WHERE a1.currency_code = 'XRP' OR a2.currency_code = 'XRP'
+"""
+
+
+def create_compat_views(engine):
+    """Create views that keep retired tables readable"""
+    if engine.dialect.name != "postgresql":
+        return
+    
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(AMM_POOL_STATES_VIEW))
+    except Exception as e:
+        # A physical amm_pool_states table is still present; see
+        # scripts/migration/migrate_amm_pool_states.py
+        logger.warning(f"Could not create amm_pool_states view: {e}")
+
+
+SET_UPDATED_AT_FUNCTION = """
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.updated_at = now();
+    RETURN NEW;
+END;
+$$
+"""
+
+
+def create_updated_at_triggers(engine):
+    """Stamp updated_at in the database so Core bulk UPDATEs keep it current
+    
+    Only triggers missing from ``pg_trigger`` are created, so a normal start
+    takes no DDL locks; changing an existing trigger is a migration's job.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    
+    triggers = {
+        f"trg_{table.name}_updated": table.name
+        for table in Base.metadata.sorted_tables
+        if "updated_at" in table.c
+    }
+    
+    with engine.begin() as conn:
+        existing = set(conn.scalars(
+            text("SELECT tgname FROM pg_trigger WHERE NOT tgisinternal AND tgname = ANY(:names)"),
+            {"names": list(triggers)}
+        ))
+        missing = [table for name, table in triggers.items() if name not in existing]
+        if not missing:
+            return
+        
+        conn.execute(text(SET_UPDATED_AT_FUNCTION))
+        for table in missing:
+            conn.execute(text(
+                f"CREATE TRIGGER trg_{table}_updated BEFORE UPDATE ON {table} "
+                "FOR EACH ROW EXECUTE FUNCTION set_updated_at()"
+            ))
+
+
+# Time-series tables converted to TimescaleDB hypertables, with chunk size
+TIME_SERIES_TABLES = {
+    "dex_trades": "1 day",
+    "amm_snapshots": "1 day",
+    "token_transactions": "1 day",
+    "price_data": "7 days",
+}
+
+# Columns each hypertable's compressed chunks are segmented by
+COMPRESSION_SEGMENT_BY = {
+    "dex_trades": "gets_asset_id, pays_asset_id",
+    "amm_snapshots": "amm_address",
+    "token_transactions": "wallet_address",
+    "price_data": "pair",
+}
 
 
 def init_database(database_url: str):
-    """Initialize database tables"""
+    """Initialize database tables
+    
+    Schema setup runs once per URL per process; later calls just return the
+    shared engine.
+    """
     engine = get_engine(database_url)
-    Base.metadata.create_all(engine)
+    if database_url in _initialized_urls:
+        return engine
+    
+    with _engines_lock:
+        if database_url not in _initialized_urls:
+            Base.metadata.create_all(engine)
+            create_compat_views(engine)
+            create_updated_at_triggers(engine)
+            if create_hypertables(engine):
+                enable_compression(engine)
+                create_continuous_aggregates(engine)
+            _initialized_urls.add(database_url)
     return engine
 
 
-def get_session(engine):
+def create_hypertables(engine) -> bool:
+    """Partition time-series tables by timestamp when TimescaleDB is available
+    
+    Returns whether TimescaleDB is enabled on the database.
+    """
+    if engine.dialect.name != "postgresql":
+        return False
+    
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS timescaledb"))
+    except Exception as e:
+        logger.warning(f"TimescaleDB unavailable, time-series tables stay unpartitioned: {e}")
+        return False
+    
+    for table, chunk_interval in TIME_SERIES_TABLES.items():
+        try:
+            with engine.begin() as conn:
+                conn.execute(
+                    text(
+                        "SELECT create_hypertable(:table, 'timestamp', "
+                        "chunk_time_interval => CAST(:chunk AS INTERVAL), "
+                        "if_not_exists => TRUE, migrate_data => TRUE)"
+                    ),
+                    {"table": table, "chunk": chunk_interval}
+                )
+        except Exception as e:
+            # Tables created before timestamp joined the primary key need
+            # scripts/migration/migrate_hypertables.py first
+            logger.warning(f"Could not convert {table} to a hypertable: {e}")
+    
+    return True
+
+
+def enable_compression(engine, compress_after: str = "7 days"):
+    """Compress hypertable chunks older than ``compress_after``"""
+    for table, segment_by in COMPRESSION_SEGMENT_BY.items():
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(
+                    f"ALTER TABLE {table} SET ("
+                    f"timescaledb.compress, "
+                    f"timescaledb.compress_segmentby = '{segment_by}', "
+                    f"timescaledb.compress_orderby = 'timestamp DESC')"
+                ))
+                conn.execute(
+                    text(
+                        "SELECT add_compression_policy(:table, CAST(:after AS INTERVAL), "
+                        "if_not_exists => TRUE)"
+                    ),
+                    {"table": table, "after": compress_after}
+                )
+        except Exception as e:
+            logger.warning(f"Could not enable compression on {table}: {e}")
+
+
+# One-minute OHLCV roll-up of DEX trades, refreshed incrementally by TimescaleDB
+DEX_OHLCV_VIEW = "dex_ohlcv_1m"
+
+_CONTINUOUS_AGGREGATE_DDL = (
+    f"""
+    CREATE MATERIALIZED VIEW IF NOT EXISTS {DEX_OHLCV_VIEW}
+    WITH (timescaledb.continuous) AS
+    SELECT time_bucket(INTERVAL '1 minute', timestamp) AS bucket,
+           gets_asset_id,
+           pays_asset_id,
+           first(price, timestamp) AS open,
+           max(price) AS high,
+           min(price) AS low,
+           last(price, timestamp) AS close,
+           sum(gets_amount) AS volume,
+           count(*) AS trades_count
+    FROM dex_trades
+    GROUP BY bucket, gets_asset_id, pays_asset_id
+    WITH NO DATA
+    """,
+    f"""
+    SELECT add_continuous_aggregate_policy('{DEX_OHLCV_VIEW}',
+        start_offset => INTERVAL '3 days',
+        end_offset => INTERVAL '1 minute',
+        schedule_interval => INTERVAL '1 minute',
+        if_not_exists => TRUE)
+    """,
+)
+
+
+def create_continuous_aggregates(engine):
+    """Create the OHLCV continuous aggregate over dex_trades"""
+    try:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for statement in _CONTINUOUS_AGGREGATE_DDL:
+                conn.execute(text(statement))
+    except Exception as e:
+        logger.warning(f"Could not create {DEX_OHLCV_VIEW} continuous aggregate: {e}")
+
+
+def _begin(bind):
+    """Transaction scope for ``bind``: an Engine commits here, a Connection's
+    already-open transaction is joined and left to its owner
+    """
+    if isinstance(bind, Connection):
+        return nullcontext(bind)
+    return bind.begin()
+
+
+@contextmanager
+def _raw_connection(bind) -> Iterator[Any]:
+    """DBAPI connection for ``bind``, with the same transaction rules as ``_begin``"""
+    if isinstance(bind, Connection):
+        yield bind.connection
+        return
+    
+    conn = bind.raw_connection()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def bulk_insert(engine, model, rows: List[Dict[str, Any]], batch_size: int = 10_000) -> int:
+    """Insert plain dict rows through Core executemany, bypassing the ORM unit of work
+    
+    ``engine`` may also be a Connection, in which case the rows join its
+    open transaction.
+    """
+    if not rows:
+        return 0
+    
+    stmt = insert(model.__table__)
+    with _begin(engine) as conn:
+        for i in range(0, len(rows), batch_size):
+            conn.execute(stmt, rows[i:i + batch_size])
+    
+    return len(rows)
+
+
+def bulk_upsert(
+    engine,
+    model,
+    rows: List[Dict[str, Any]],
+    index_elements: List[str],
+    update_cols: Optional[List[str]] = None,
+    batch_size: int = 10_000
+) -> int:
+    """Batched INSERT ... ON CONFLICT keyed on ``index_elements``
+    
+    Conflicting rows are skipped, or have ``update_cols`` overwritten when
+    given, so idempotent ingest needs no read-before-write.
+    """
+    if not rows:
+        return 0
+    
+    stmt = pg_insert(model.__table__)
+    if update_cols:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={column: stmt.excluded[column] for column in update_cols}
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+    
+    with _begin(engine) as conn:
+        for i in range(0, len(rows), batch_size):
+            conn.execute(stmt, rows[i:i + batch_size])
+    
+    return len(rows)
+
+
+def _copy_value(value: Any, integer: bool = False) -> Any:
+    """Render one value for a CSV-format COPY stream
+    
+    ``integer`` marks an INTEGER column: pandas upcasts int columns holding
+    NaN to float, and COPY rejects ``5.0`` for an integer field.
+    """
+    if value is None or (isinstance(value, float) and value != value):
+        return "\\N"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "\\x" + bytes(value).hex()
+    if integer:
+        return int(value)
+    return value
+
+
+def _copy_buffer(model, columns: List[str], rows: List[Dict[str, Any]]) -> io.StringIO:
+    """Render ``rows`` as the CSV body of a COPY into ``model``'s table"""
+    integer_columns = {
+        column for column in columns if isinstance(model.__table__.c[column].type, Integer)
+    }
+    
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerows(
+        [_copy_value(row.get(column), column in integer_columns) for column in columns]
+        for row in rows
+    )
+    buf.seek(0)
+    return buf
+
+
+def bulk_copy(
+    engine,
+    model,
+    rows: List[Dict[str, Any]],
+    conflict_columns: Optional[List[str]] = None
+) -> int:
+    """Stream rows into ``model``'s table with COPY ... FROM STDIN
+    
+    With ``conflict_columns`` the rows are copied into a temporary staging
+    table first and moved over with INSERT ... ON CONFLICT DO NOTHING, since
+    COPY itself cannot skip duplicates. Non-psycopg2 engines fall back to
+    ``bulk_insert`` / ``bulk_upsert``. As with ``bulk_insert``, passing a
+    Connection writes inside its open transaction.
+    """
+    if not rows:
+        return 0
+    
+    if engine.dialect.driver != "psycopg2":
+        if conflict_columns:
+            return bulk_upsert(engine, model, rows, index_elements=conflict_columns)
+        return bulk_insert(engine, model, rows)
+    
+    table = model.__tablename__
+    columns = list(rows[0].keys())
+    column_list = ", ".join(columns)
+    
+    buf = _copy_buffer(model, columns, rows)
+    
+    with _raw_connection(engine) as conn, conn.cursor() as cur:
+        target = table
+        if conflict_columns:
+            target = f"_stage_{table}"
+            cur.execute(
+                f"CREATE TEMP TABLE {target} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+        
+        cur.copy_expert(
+            f"COPY {target} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buf
+        )
+        
+        if conflict_columns:
+            cur.execute(
+                f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {target} "
+                f"ON CONFLICT ({', '.join(conflict_columns)}) DO NOTHING"
+            )
+            # Dropped now rather than at commit, so a later copy in the same
+            # transaction can stage again
+            cur.execute(f"DROP TABLE {target}")
+    
+    return len(rows)
+
+
+# Column order of the tuples written by ``fast_insert_dex``
+DEX_TRADE_COLUMNS = (
+    "timestamp", "ledger_index", "transaction_hash", "account", "account_bytes", "offer_sequence",
+    "gets_asset_id", "gets_amount", "pays_asset_id", "pays_amount",
+    "price", "quality", "flags", "fee_xrp"
+)
+
+
+def fast_insert_dex(engine, rows: List[Dict[str, Any]], page_size: int = 1000) -> int:
+    """Insert DEX trades as multi-row VALUES statements via psycopg2 ``execute_values``
+    
+    Rows go to the driver as plain tuples, skipping SQLAlchemy statement
+    compilation entirely. Engines on other drivers fall back to ``bulk_upsert``.
+    """
+    if not rows:
+        return 0
+    
+    if engine.dialect.driver != "psycopg2":
+        return bulk_upsert(engine, DEXTrade, rows, index_elements=["transaction_hash", "timestamp"])
+    
+    from psycopg2.extras import execute_values
+    
+    values = [tuple(row.get(column) for column in DEX_TRADE_COLUMNS) for row in rows]
+    sql = (
+        f"INSERT INTO {DEXTrade.__tablename__} ({', '.join(DEX_TRADE_COLUMNS)}) VALUES %s "
+        "ON CONFLICT (transaction_hash, timestamp) DO NOTHING"
+    )
+    
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cur:
+            execute_values(cur, sql, values, page_size=page_size)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    
+    return len(rows)
+
+
+def bulk_create_returning(session, model, rows: List[Dict[str, Any]]) -> List[int]:
+    """Insert rows and return their ids in a single round trip"""
+    if not rows:
+        return []
+    
+    stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+    return list(session.scalars(stmt, rows))
+
+
+# Database URL -> (currency, issuer) -> assets.id; primed from the assets table
+# at startup and filled as ingest resolves new assets
+_asset_ids: Dict[Any, Dict[Tuple[str, Optional[str]], int]] = {}
+_asset_ids_lock = threading.Lock()
+
+
+def _asset_id_cache(bind) -> Dict[Tuple[str, Optional[str]], int]:
+    """Asset id cache for the database an engine or connection points at"""
+    url = bind.engine.url
+    cache = _asset_ids.get(url)
+    if cache is None:
+        cache = _asset_ids.setdefault(url, {})
+    return cache
+
+
+def preload_asset_ids(engine) -> int:
+    """Load every known asset id into the cache in a single round trip"""
+    with engine.connect() as conn:
+        rows = conn.execute(select(Asset.id, Asset.currency_code, Asset.issuer)).all()
+    
+    with _asset_ids_lock:
+        _asset_id_cache(engine).update(
+            {(currency, issuer): asset_id for asset_id, currency, issuer in rows}
+        )
+    
+    return len(rows)
+
+
+def asset_conflict_target(issuer: Optional[str]) -> Dict[str, Any]:
+    """ON CONFLICT arguments for an asset upsert
+    
+    Native assets (NULL issuer) conflict on the partial ``_currency_native_uc``
+    index rather than ``_currency_issuer_uc``.
+    """
+    if issuer is None:
+        return {"index_elements": ["currency_code"], "index_where": Asset.issuer.is_(None)}
+    return {"index_elements": ["currency_code", "issuer"]}
+
+
+def get_or_create_asset_id(session, currency: str, issuer: Optional[str] = None) -> int:
+    """Resolve a currency/issuer pair to its interned ``assets.id``
+    
+    New assets are committed on their own connection so cached ids stay
+    valid even if the caller's transaction rolls back.
+    """
+    key = (currency, issuer)
+    asset_ids = _asset_id_cache(session.get_bind())
+    asset_id = asset_ids.get(key)
+    if asset_id is not None:
+        return asset_id
+    
+    with _asset_ids_lock:
+        asset_id = asset_ids.get(key)
+        if asset_id is not None:
+            return asset_id
+        
+        with session.get_bind().begin() as conn:
+            # The no-op update makes RETURNING yield the id of an existing row
+            stmt = pg_insert(Asset).values(currency_code=currency, issuer=issuer, symbol=currency)
+            asset_id = conn.scalar(
+                stmt.on_conflict_do_update(
+                    **asset_conflict_target(issuer),
+                    set_={"currency_code": stmt.excluded.currency_code}
+                ).returning(Asset.id)
+            )
+        
+        asset_ids[key] = asset_id
+    
+    return asset_id
+
+
+# Session factories are built once per engine and reused for every session
+_session_factories: Dict[Any, sessionmaker] = {}
+_Session: Optional[sessionmaker] = None
+
+
+def configure_sessions(engine) -> sessionmaker:
+    """Build (or reuse) the session factory for ``engine`` and make it the default"""
+    global _Session
+    factory = _session_factories.get(engine)
+    if factory is None:
+        factory = sessionmaker(bind=engine, expire_on_commit=False, class_=Session)
+        _session_factories[engine] = factory
+    _Session = factory
+    return factory
+
+
+def get_session(engine=None) -> Session:
     """Get database session"""
-    Session = sessionmaker(bind=engine)
-    return Session()
\ No newline at end of file
+    if engine is not None:
+        factory = _session_factories.get(engine) or configure_sessions(engine)
+    elif _Session is not None:
+        factory = _Session
+    else:
+        raise RuntimeError("No engine configured; call configure_sessions(engine) first")
+    return factory()
+
+
+@contextmanager
+def session_scope(engine=None) -> Iterator[Session]:
+    """Transactional scope: commit on success, roll back on error, always close"""
+    session = get_session(engine)
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+_async_session_factories: Dict[Any, async_sessionmaker] = {}
+
+
+@asynccontextmanager
+async def async_session_scope(async_engine: AsyncEngine) -> AsyncIterator[AsyncSession]:
+    """Async counterpart of ``session_scope``: commit on success, roll back on error"""
+    factory = _async_session_factories.get(async_engine)
+    if factory is None:
+        factory = async_sessionmaker(async_engine, expire_on_commit=False)
+        _async_session_factories[async_engine] = factory
+    
+    async with factory() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
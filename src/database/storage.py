@@ -2,123 +2,332 @@
 Data storage utilities for persisting collected data
 """
 
+import asyncio
+import functools
+import orjson
 import pandas as pd
-from typing import Dict, List, Any, Optional, Tuple
+import zstandard
+from cachetools import TTLCache
+from typing import Awaitable, Callable, Dict, List, Any, Optional, Tuple
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, aliased
 from loguru import logger
 
 from src.database.models import (
-    PriceData, AMMPoolState, OrderBookSnapshot,
-    TradingSignal, BacktestResult, MLPrediction,
+    PriceData, OrderBookSnapshot,
+    TradingSignal, BacktestResult, BacktestArtifact, MLPrediction,
     Asset, DEXTrade, AMMSnapshot, TokenTransaction,
     AMMPosition, DataCollectionLog,
-    get_engine, init_database, get_session
+    get_engine, get_async_engine, init_database, session_scope, async_session_scope,
+    bulk_insert, bulk_upsert, bulk_copy, bulk_create_returning, fast_insert_dex,
+    address_bytes, asset_conflict_target, get_or_create_asset_id, preload_asset_ids,
+    DEX_OHLCV_VIEW
 )
 from src.config.settings import get_settings
 
 
+# Asset FK column -> (currency field, issuer field) in incoming records
+DEX_TRADE_ASSETS = {
+    "gets_asset_id": ("gets_currency", "gets_issuer"),
+    "pays_asset_id": ("pays_currency", "pays_issuer"),
+}
+AMM_SNAPSHOT_ASSETS = {
+    "asset1_id": ("asset1_currency", "asset1_issuer"),
+    "asset2_id": ("asset2_currency", "asset2_issuer"),
+}
+TOKEN_TRANSACTION_ASSETS = {
+    "asset_id": ("currency", "issuer"),
+}
+
+# Unique key of a token transfer; re-stored transfers are skipped
+TOKEN_TRANSACTION_KEY = ["transaction_hash", "wallet_address", "asset_id", "is_receive", "timestamp"]
+
+# Address column -> 20-byte AccountID column filled at ingest for joins/filters
+ADDRESS_COLUMNS = {
+    "account": "account_bytes",
+    "wallet_address": "wallet_address_bytes",
+    "amm_address": "amm_address_bytes",
+}
+
+# Numeric columns returned as float64 by the history and snapshot getters
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+AMM_HISTORY_COLUMNS = ["xrp_reserve", "token_reserve", "price", "tvl_xrp", "k_constant"]
+AMM_SNAPSHOT_FLOAT_COLUMNS = [
+    "asset1_amount", "asset2_amount", "lp_token_supply",
+    "k_constant", "price_asset2_per_asset1", "tvl_xrp"
+]
+
+# Collection log fields read by the progress getters
+COLLECTION_LOG_COLUMNS = [
+    DataCollectionLog.id,
+    DataCollectionLog.collection_type,
+    DataCollectionLog.target,
+    DataCollectionLog.start_ledger,
+    DataCollectionLog.end_ledger,
+    DataCollectionLog.last_processed_ledger,
+    DataCollectionLog.status,
+    DataCollectionLog.records_collected
+]
+
+# Rows buffered by the per-record async writers before one bulk flush
+WRITE_BATCH_SIZE = 500
+
+# Seconds a queued AMM pool state may wait before it is flushed
+AMM_STATE_FLUSH_INTERVAL = 0.25
+
+# Streamed AMM snapshots are flushed in small batches so pool history lags
+# the ledger by well under a close
+AMM_SNAPSHOT_BATCH_SIZE = 100
+AMM_SNAPSHOT_FLUSH_INTERVAL = 0.2
+
+# Rows fetched per server-side cursor round trip by the streaming getters
+STREAM_CHUNK_SIZE = 5000
+
+# Seconds a latest-timestamp / collection-log lookup is served from memory
+LATEST_TIMESTAMP_TTL = 5
+COLLECTION_LOG_TTL = 5
+
+# Batches at least this large are written with COPY rather than INSERTs
+COPY_THRESHOLD = 100
+
+# Price frame rows turned into records and copied per round trip
+PRICE_CHUNK_SIZE = 5000
+
+# Order book levels kept queryable in JSONB; the full book is stored compressed
+ORDERBOOK_DEPTH = 20
+
+
+async def _to_thread(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking call in the default executor (``asyncio.to_thread`` is 3.9+)"""
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args))
+
+
 class DataStorage:
     """Handles data persistence to PostgreSQL"""
     
     def __init__(self):
         self.settings = get_settings()
         self.engine = get_engine(self.settings.database_url)
+        # Coroutine methods use asyncpg so DB round trips do not block the loop;
+        # bulk writes stay on psycopg2 (COPY/execute_values) in worker threads
+        self.async_engine = get_async_engine(self.settings.database_url)
         init_database(self.settings.database_url)
+        preload_asset_ids(self.engine)
+        
+        # Per-record writes queue here and go out as bulk inserts
+        self._dex_queue: List[Dict[str, Any]] = []
+        self._token_tx_queue: List[Dict[str, Any]] = []
+        self._amm_snapshot_queue: List[Dict[str, Any]] = []
+        self._amm_state_queue: List[Dict[str, Any]] = []
+        # Background tasks that drain timed queues; stopped by flush_all
+        self._flushers: Dict[str, asyncio.Task] = {}
+        # Held by a flusher for a whole batch, so stopping it never drops one
+        self._flush_locks: Dict[str, asyncio.Lock] = {}
+        
+        # Short-lived caches for lookups polled in tight loops; writers evict
+        self._latest_ts_cache = TTLCache(maxsize=1024, ttl=LATEST_TIMESTAMP_TTL)
+        self._collection_log_cache = TTLCache(maxsize=1024, ttl=COLLECTION_LOG_TTL)
+    
+    def _resolve_rows(
+        self,
+        records: List[Dict[str, Any]],
+        asset_fields: Dict[str, Tuple[str, str]]
+    ) -> List[Dict[str, Any]]:
+        """Blocking ``_resolve_assets`` over a batch, for use from worker threads"""
+        with session_scope(self.engine) as session:
+            return [self._resolve_assets(session, record, asset_fields) for record in records]
+    
+    def _resolve_assets(
+        self,
+        session: Session,
+        data: Dict[str, Any],
+        asset_fields: Dict[str, Tuple[str, str]]
+    ) -> Dict[str, Any]:
+        """Replace currency/issuer fields with their interned asset ids
+        
+        Account addresses also get their decoded byte form alongside.
+        """
+        record = dict(data)
+        for id_column, (currency_field, issuer_field) in asset_fields.items():
+            currency = record.pop(currency_field)
+            issuer = record.pop(issuer_field, None)
+            record[id_column] = get_or_create_asset_id(session, currency, issuer)
+        for column, bytes_column in ADDRESS_COLUMNS.items():
+            if column in record:
+                record[bytes_column] = address_bytes(record[column])
+        return record
+    
+    @staticmethod
+    def _upsert(model, values: Dict[str, Any], index_elements: List[str], index_where=None):
+        """INSERT ... ON CONFLICT that overwrites every non-key column supplied"""
+        stmt = pg_insert(model).values(**values)
+        update_cols = {
+            key: stmt.excluded[key] for key in values if key not in index_elements
+        }
+        if not update_cols:
+            return stmt.on_conflict_do_nothing(
+                index_elements=index_elements, index_where=index_where
+            )
+        return stmt.on_conflict_do_update(
+            index_elements=index_elements, index_where=index_where, set_=update_cols
+        )
+    
+    @staticmethod
+    def _price_frame(df: pd.DataFrame) -> pd.DataFrame:
+        """Resolve OHLCV column fallbacks once for a whole frame
+        
+        Frames that only carry ``price`` use it for every OHLC column.
+        """
+        price = df["price"] if "price" in df.columns else 0
+        defaults = {
+            "open": price, "high": price, "low": price, "close": price,
+            "volume": 0, "trades_count": None, "vwap": None
+        }
+        
+        # Built in one constructor call rather than column-by-column inserts
+        return pd.DataFrame(
+            {
+                "timestamp": df["timestamp"],
+                **{
+                    column: df[column] if column in df.columns else default
+                    for column, default in defaults.items()
+                }
+            },
+            index=df.index
+        )
     
     def store_price_data(self, df: pd.DataFrame, pair: str, token: str, issuer: Optional[str] = None):
         """Store price data to database"""
-        session = get_session(self.engine)
-        
         try:
-            records = []
-            for _, row in df.iterrows():
-                record = PriceData(
-                    timestamp=row["timestamp"],
-                    pair=pair,
-                    token=token,
-                    issuer=issuer,
-                    open=row.get("open", row.get("price", 0)),
-                    high=row.get("high", row.get("price", 0)),
-                    low=row.get("low", row.get("price", 0)),
-                    close=row.get("close", row.get("price", 0)),
-                    volume=row.get("volume", 0),
-                    trades_count=row.get("trades_count"),
-                    vwap=row.get("vwap")
-                )
-                records.append(record)
+            frame = self._price_frame(df).assign(pair=pair, token=token, issuer=issuer)
             
-            session.bulk_save_objects(records)
-            session.commit()
-            logger.info(f"Stored {len(records)} price records for {pair}")
+            # Only one chunk of row dicts is alive at a time, so long
+            # backfills stream through with flat memory; every chunk goes
+            # through one connection and is committed together
+            with self.engine.begin() as conn:
+                for start in range(0, len(frame), PRICE_CHUNK_SIZE):
+                    rows = frame.iloc[start:start + PRICE_CHUNK_SIZE].to_dict("records")
+                    if len(rows) >= COPY_THRESHOLD:
+                        bulk_copy(conn, PriceData, rows)
+                    else:
+                        bulk_insert(conn, PriceData, rows)
+            
+            self._latest_ts_cache.pop(pair, None)
+            logger.info(f"Stored {len(frame)} price records for {pair}")
             
         except Exception as e:
-            session.rollback()
             logger.error(f"Error storing price data: {e}")
             raise
-        finally:
-            session.close()
+    
+    def _pool_state_to_snapshot(self, session: Session, state_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Map an XRP/token pool state onto an amm_snapshots row"""
+        xrp_reserve = state_data["xrp_reserve"]
+        token_reserve = state_data["token_reserve"]
+        
+        return {
+            "timestamp": state_data["timestamp"],
+            "ledger_index": state_data.get("ledger_index", 0),
+            "amm_address": state_data.get("amm_address", ""),
+            "amm_address_bytes": address_bytes(state_data.get("amm_address")),
+            "asset1_id": get_or_create_asset_id(session, "XRP"),
+            "asset1_amount": xrp_reserve,
+            "asset2_id": get_or_create_asset_id(
+                session, state_data["token"], state_data.get("issuer")
+            ),
+            "asset2_amount": token_reserve,
+            "lp_token_currency": state_data.get("lp_token_currency", ""),
+            "lp_token_supply": state_data.get("lp_token_supply") or 0,
+            "trading_fee": state_data.get("trading_fee"),
+            "k_constant": state_data.get("k_constant"),
+            "price_asset2_per_asset1": token_reserve / xrp_reserve if xrp_reserve else None,
+            "tvl_xrp": state_data.get("tvl_xrp")
+        }
     
     def store_amm_state(self, state_data: Dict[str, Any]):
-        """Store AMM pool state"""
-        session = get_session(self.engine)
+        """Store AMM pool state
+        
+        Writes through synchronously; coroutines should use ``enqueue_amm_state``.
+        """
+        self.store_amm_states_bulk([state_data])
+    
+    async def enqueue_amm_state(self, state_data: Dict[str, Any]):
+        """Queue an AMM pool state, flushing at once on a full batch
         
+        Anything short of a batch is written by a background flusher every
+        ``AMM_STATE_FLUSH_INTERVAL`` seconds.
+        """
+        self._amm_state_queue.append(state_data)
+        if len(self._amm_state_queue) >= WRITE_BATCH_SIZE:
+            await self._flush_amm_states()
+        else:
+            self._start_flusher("AMM states", self._flush_amm_states, AMM_STATE_FLUSH_INTERVAL)
+    
+    async def _flush_amm_states(self):
+        """Write queued AMM pool states in one batch off the event loop"""
+        batch, self._amm_state_queue = self._amm_state_queue, []
+        if batch:
+            await _to_thread(self.store_amm_states_bulk, batch)
+    
+    def store_amm_states_bulk(self, states: List[Dict[str, Any]]):
+        """Store multiple AMM states efficiently"""
         try:
-            state = AMMPoolState(
-                timestamp=state_data["timestamp"],
-                amm_address=state_data["amm_address"],
-                token=state_data["token"],
-                xrp_reserve=state_data["xrp_reserve"],
-                token_reserve=state_data["token_reserve"],
-                price=state_data["price"],
-                k_constant=state_data.get("k_constant"),
-                tvl_xrp=state_data.get("tvl_xrp"),
-                trading_fee=state_data.get("trading_fee"),
-                lp_token_supply=state_data.get("lp_token_supply")
-            )
+            with session_scope(self.engine) as session:
+                records = [self._pool_state_to_snapshot(session, state_data) for state_data in states]
+            records = self._drop_stored_ledgers(records)
             
-            session.add(state)
-            session.commit()
+            conflict_columns = ["amm_address", "ledger_index", "timestamp"]
+            if len(records) >= COPY_THRESHOLD:
+                bulk_copy(self.engine, AMMSnapshot, records, conflict_columns=conflict_columns)
+            else:
+                bulk_upsert(self.engine, AMMSnapshot, records, index_elements=conflict_columns)
+            logger.info(f"Stored {len(records)} AMM states")
             
         except Exception as e:
-            session.rollback()
-            logger.error(f"Error storing AMM state: {e}")
+            logger.error(f"Error storing AMM states: {e}")
             raise
-        finally:
-            session.close()
     
-    def store_amm_states_bulk(self, states: List[Dict[str, Any]]):
-        """Store multiple AMM states efficiently"""
-        session = get_session(self.engine)
+    def store_orderbook_snapshot(
+        self,
+        snapshot_data: Dict[str, Any],
+        depth: int = ORDERBOOK_DEPTH
+    ):
+        """Store order book snapshot with top levels in JSONB and the full book compressed"""
+        compressor = zstandard.ZstdCompressor(level=9)
         
         try:
-            records = []
-            for state_data in states:
-                state = AMMPoolState(
-                    timestamp=state_data["timestamp"],
-                    amm_address=state_data.get("amm_address", ""),
-                    token=state_data["token"],
-                    xrp_reserve=state_data["xrp_reserve"],
-                    token_reserve=state_data["token_reserve"],
-                    price=state_data["price"],
-                    k_constant=state_data.get("k_constant"),
-                    tvl_xrp=state_data.get("tvl_xrp"),
-                    trading_fee=state_data.get("trading_fee"),
-                    lp_token_supply=state_data.get("lp_token_supply")
+            with session_scope(self.engine) as session:
+                bids = snapshot_data.get("bids", [])
+                asks = snapshot_data.get("asks", [])
+                
+                snapshot = OrderBookSnapshot(
+                    timestamp=snapshot_data["timestamp"],
+                    pair=snapshot_data["pair"],
+                    best_bid=snapshot_data.get("best_bid"),
+                    best_ask=snapshot_data.get("best_ask"),
+                    bid_volume=snapshot_data.get("bid_volume"),
+                    ask_volume=snapshot_data.get("ask_volume"),
+                    spread=snapshot_data.get("spread"),
+                    bids=bids[:depth],
+                    asks=asks[:depth],
+                    bids_raw=compressor.compress(orjson.dumps(bids, default=str)),
+                    asks_raw=compressor.compress(orjson.dumps(asks, default=str))
                 )
-                records.append(state)
-            
-            session.bulk_save_objects(records)
-            session.commit()
-            logger.info(f"Stored {len(records)} AMM states")
-            
+                
+                session.add(snapshot)
+                
         except Exception as e:
-            session.rollback()
-            logger.error(f"Error storing AMM states: {e}")
+            logger.error(f"Error storing order book snapshot: {e}")
             raise
-        finally:
-            session.close()
+    
+    @staticmethod
+    def load_orderbook_levels(raw: Optional[bytes]) -> List[Dict[str, Any]]:
+        """Decompress a full order book side stored by ``store_orderbook_snapshot``"""
+        if not raw:
+            return []
+        return orjson.loads(zstandard.ZstdDecompressor().decompress(raw))
     
     def get_price_history(
         self,
@@ -128,42 +337,70 @@ class DataStorage:
         limit: Optional[int] = None
     ) -> pd.DataFrame:
         """Retrieve price history from database"""
-        session = get_session(self.engine)
+        stmt = select(
+            PriceData.timestamp, PriceData.open, PriceData.high,
+            PriceData.low, PriceData.close, PriceData.volume
+        ).where(PriceData.pair == pair)
         
-        try:
-            query = session.query(PriceData).filter(PriceData.pair == pair)
-            
-            if start_date:
-                query = query.filter(PriceData.timestamp >= start_date)
-            if end_date:
-                query = query.filter(PriceData.timestamp <= end_date)
-            
-            query = query.order_by(PriceData.timestamp)
-            
-            if limit:
-                query = query.limit(limit)
-            
-            results = query.all()
-            
-            if not results:
-                return pd.DataFrame()
-            
-            # Convert to DataFrame
-            data = []
-            for r in results:
-                data.append({
-                    "timestamp": r.timestamp,
-                    "open": float(r.open),
-                    "high": float(r.high),
-                    "low": float(r.low),
-                    "close": float(r.close),
-                    "volume": float(r.volume) if r.volume else 0
-                })
-            
-            return pd.DataFrame(data)
-            
-        finally:
-            session.close()
+        if start_date:
+            stmt = stmt.where(PriceData.timestamp >= start_date)
+        if end_date:
+            stmt = stmt.where(PriceData.timestamp <= end_date)
+        
+        stmt = stmt.order_by(PriceData.timestamp)
+        
+        if limit:
+            stmt = stmt.limit(limit)
+        
+        with self.engine.connect() as conn:
+            df = pd.read_sql(stmt, conn, parse_dates=["timestamp"])
+        
+        if df.empty:
+            return pd.DataFrame()
+        
+        df = df.astype({column: "float64" for column in PRICE_COLUMNS})
+        return df.fillna({"volume": 0})
+    
+    def get_dex_ohlcv(
+        self,
+        pair: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        """Retrieve one-minute OHLCV bars for a ``GETS/PAYS`` currency pair
+        
+        Reads the continuous aggregate instead of re-bucketing dex_trades.
+        """
+        gets_currency, pays_currency = pair.split("/", 1)
+        query = (
+            f"SELECT v.bucket AS timestamp, v.open, v.high, v.low, v.close, "
+            f"v.volume, v.trades_count "
+            f"FROM {DEX_OHLCV_VIEW} v "
+            f"JOIN assets g ON g.id = v.gets_asset_id "
+            f"JOIN assets p ON p.id = v.pays_asset_id "
+            f"WHERE g.currency_code = :gets_currency AND p.currency_code = :pays_currency"
+        )
+        params: Dict[str, Any] = {
+            "gets_currency": gets_currency,
+            "pays_currency": pays_currency
+        }
+        
+        if start_date:
+            query += " AND v.bucket >= :start_date"
+            params["start_date"] = start_date
+        if end_date:
+            query += " AND v.bucket <= :end_date"
+            params["end_date"] = end_date
+        
+        query += " ORDER BY v.bucket"
+        
+        with self.engine.connect() as conn:
+            df = pd.read_sql(
+                text(query), conn, params=params,
+                coerce_float=False, parse_dates=["timestamp"]
+            )
+        
+        return df.astype({column: "float64" for column in PRICE_COLUMNS})
     
     def get_amm_history(
         self,
@@ -172,231 +409,250 @@ class DataStorage:
         end_date: Optional[datetime] = None
     ) -> pd.DataFrame:
         """Retrieve AMM state history"""
-        session = get_session(self.engine)
+        query = (
+            "SELECT timestamp, xrp_reserve, token_reserve, price, tvl_xrp, k_constant "
+            "FROM amm_pool_states WHERE amm_address_bytes = :amm_address"
+        )
+        params: Dict[str, Any] = {"amm_address": address_bytes(amm_address)}
         
-        try:
-            query = session.query(AMMPoolState).filter(
-                AMMPoolState.amm_address == amm_address
-            )
-            
-            if start_date:
-                query = query.filter(AMMPoolState.timestamp >= start_date)
-            if end_date:
-                query = query.filter(AMMPoolState.timestamp <= end_date)
-            
-            query = query.order_by(AMMPoolState.timestamp)
-            results = query.all()
-            
-            if not results:
-                return pd.DataFrame()
-            
-            # Convert to DataFrame
-            data = []
-            for r in results:
-                data.append({
-                    "timestamp": r.timestamp,
-                    "xrp_reserve": float(r.xrp_reserve),
-                    "token_reserve": float(r.token_reserve),
-                    "price": float(r.price),
-                    "tvl_xrp": float(r.tvl_xrp) if r.tvl_xrp else 0,
-                    "k_constant": float(r.k_constant) if r.k_constant else 0
-                })
-            
-            return pd.DataFrame(data)
-            
-        finally:
-            session.close()
+        if start_date:
+            query += " AND timestamp >= :start_date"
+            params["start_date"] = start_date
+        if end_date:
+            query += " AND timestamp <= :end_date"
+            params["end_date"] = end_date
+        
+        query += " ORDER BY timestamp"
+        
+        with self.engine.connect() as conn:
+            df = pd.read_sql(text(query), conn, params=params, parse_dates=["timestamp"])
+        
+        if df.empty:
+            return pd.DataFrame()
+        
+        # Missing price/TVL/k values read as zero
+        df = df.astype({column: "float64" for column in AMM_HISTORY_COLUMNS})
+        return df.fillna({"price": 0, "tvl_xrp": 0, "k_constant": 0})
     
     def store_backtest_result(self, result_data: Dict[str, Any]):
         """Store backtest results"""
-        session = get_session(self.engine)
-        
         try:
-            result = BacktestResult(
-                strategy=result_data["strategy"],
-                pair=result_data["pair"],
-                start_date=result_data["start_date"],
-                end_date=result_data["end_date"],
-                initial_balance=result_data["initial_balance"],
-                final_balance=result_data["final_balance"],
-                total_trades=result_data["total_trades"],
-                winning_trades=result_data["winning_trades"],
-                losing_trades=result_data["losing_trades"],
-                total_pnl=result_data["total_pnl"],
-                total_pnl_percent=result_data["total_pnl_percent"],
-                max_drawdown=result_data["max_drawdown"],
-                max_drawdown_percent=result_data["max_drawdown_percent"],
-                sharpe_ratio=result_data["sharpe_ratio"],
-                win_rate=result_data["win_rate"],
-                trades=result_data.get("trades", []),
-                equity_curve=result_data.get("equity_curve", []),
-                parameters=result_data.get("parameters", {})
-            )
+            with session_scope(self.engine) as session:
+                row = {
+                    "strategy": result_data["strategy"],
+                    "pair": result_data["pair"],
+                    "start_date": result_data["start_date"],
+                    "end_date": result_data["end_date"],
+                    "initial_balance": result_data["initial_balance"],
+                    "final_balance": result_data["final_balance"],
+                    "total_trades": result_data["total_trades"],
+                    "winning_trades": result_data["winning_trades"],
+                    "losing_trades": result_data["losing_trades"],
+                    "total_pnl": result_data["total_pnl"],
+                    "total_pnl_percent": result_data["total_pnl_percent"],
+                    "max_drawdown": result_data["max_drawdown"],
+                    "max_drawdown_percent": result_data["max_drawdown_percent"],
+                    "sharpe_ratio": result_data["sharpe_ratio"],
+                    "win_rate": result_data["win_rate"]
+                }
+                
+                result_id = bulk_create_returning(session, BacktestResult, [row])[0]
+                
+                artifacts = {
+                    "trades": result_data.get("trades", []),
+                    "equity": result_data.get("equity_curve", []),
+                    "params": result_data.get("parameters", {})
+                }
+                session.add_all([
+                    BacktestArtifact(result_id=result_id, kind=kind, payload=BacktestArtifact.pack(data))
+                    for kind, data in artifacts.items()
+                ])
             
-            session.add(result)
-            session.commit()
             logger.info(f"Stored backtest result for {result_data['strategy']}")
-            
-            return result.id
+            return result_id
             
         except Exception as e:
-            session.rollback()
             logger.error(f"Error storing backtest result: {e}")
             raise
-        finally:
-            session.close()
     
     def get_latest_data_timestamp(self, pair: str) -> Optional[datetime]:
         """Get the most recent data timestamp for a pair"""
-        session = get_session(self.engine)
+        if pair in self._latest_ts_cache:
+            return self._latest_ts_cache[pair]
         
-        try:
+        with session_scope(self.engine) as session:
             result = session.query(PriceData.timestamp)\
                 .filter(PriceData.pair == pair)\
                 .order_by(PriceData.timestamp.desc())\
                 .first()
             
-            return result[0] if result else None
-            
-        finally:
-            session.close()
+            timestamp = result[0] if result else None
+        
+        self._latest_ts_cache[pair] = timestamp
+        return timestamp
     
     async def store_asset(self, asset_data: Dict[str, Any]):
         """Store asset information including LP tokens"""
-        session = get_session(self.engine)
-        
         try:
-            # Check if asset already exists
-            existing = session.query(Asset).filter(
-                Asset.currency_code == asset_data["currency_code"],
-                Asset.issuer == asset_data.get("issuer")
-            ).first()
-            
-            if existing:
-                # Update existing asset
-                for key, value in asset_data.items():
-                    setattr(existing, key, value)
-            else:
-                # Create new asset
-                asset = Asset(**asset_data)
-                session.add(asset)
-                
-            session.commit()
+            stmt = self._upsert(Asset, asset_data, **asset_conflict_target(asset_data.get("issuer")))
             
+            async with async_session_scope(self.async_engine) as session:
+                await session.execute(stmt)
+                
         except Exception as e:
-            session.rollback()
             logger.error(f"Error storing asset: {e}")
             raise
-        finally:
-            session.close()
             
     async def store_dex_trade(self, trade_data: Dict[str, Any]):
-        """Store DEX trade"""
-        session = get_session(self.engine)
-        
+        """Queue a DEX trade, flushing once a full batch has accumulated"""
+        self._dex_queue.append(trade_data)
+        if len(self._dex_queue) >= WRITE_BATCH_SIZE:
+            await self._flush_dex_trades()
+    
+    async def _flush_dex_trades(self):
+        """Write queued DEX trades in one batch"""
+        batch, self._dex_queue = self._dex_queue, []
+        if batch:
+            await self.store_dex_trades_bulk(batch)
+            
+    async def store_dex_trades_bulk(self, trades: List[Dict[str, Any]]) -> int:
+        """Store DEX trades in batches, skipping ones already persisted"""
         try:
-            # Check if trade already exists
-            existing = session.query(DEXTrade).filter(
-                DEXTrade.transaction_hash == trade_data["transaction_hash"]
-            ).first()
-            
-            if not existing:
-                trade = DEXTrade(**trade_data)
-                session.add(trade)
-                session.commit()
-                
+            rows = await _to_thread(self._resolve_rows, trades, DEX_TRADE_ASSETS)
+            return await _to_thread(fast_insert_dex, self.engine, rows)
         except Exception as e:
-            session.rollback()
-            logger.error(f"Error storing DEX trade: {e}")
+            logger.error(f"Error storing DEX trades: {e}")
             raise
-        finally:
-            session.close()
-            
-    async def store_amm_snapshot(self, snapshot_data: Dict[str, Any]):
-        """Store AMM pool snapshot"""
-        session = get_session(self.engine)
+    
+    def _drop_stored_ledgers(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep one snapshot per (amm_address, ledger_index) not yet in the table
+        
+        The unique constraint has to include the hypertable's ``timestamp``,
+        so ON CONFLICT alone lets two rows for the same ledger through when
+        their timestamps differ. Rows without a ledger index pass through.
+        """
+        keyed: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        unkeyed = []
+        for row in rows:
+            if row.get("ledger_index"):
+                keyed.setdefault((row["amm_address"], row["ledger_index"]), row)
+            else:
+                unkeyed.append(row)
+        
+        if keyed:
+            with self.engine.connect() as conn:
+                stored = conn.execute(
+                    select(AMMSnapshot.amm_address, AMMSnapshot.ledger_index).where(
+                        tuple_(AMMSnapshot.amm_address, AMMSnapshot.ledger_index).in_(list(keyed))
+                    )
+                ).all()
+            for key in stored:
+                keyed.pop(tuple(key), None)
         
+        return list(keyed.values()) + unkeyed
+    
+    def _insert_amm_snapshots(self, rows: List[Dict[str, Any]]) -> int:
+        """Blocking ledger-deduplicated snapshot insert, for use from worker threads"""
+        return bulk_upsert(
+            self.engine, AMMSnapshot, self._drop_stored_ledgers(rows),
+            ["amm_address", "ledger_index", "timestamp"]
+        )
+    
+    async def store_amm_snapshots_bulk(self, snapshots: List[Dict[str, Any]]) -> int:
+        """Store AMM snapshots in batches, skipping ledgers already captured"""
         try:
-            # Check if snapshot already exists for this ledger
-            existing = session.query(AMMSnapshot).filter(
-                AMMSnapshot.amm_address == snapshot_data["amm_address"],
-                AMMSnapshot.ledger_index == snapshot_data["ledger_index"]
-            ).first()
-            
-            if not existing:
-                snapshot = AMMSnapshot(**snapshot_data)
-                session.add(snapshot)
-                session.commit()
-                
+            rows = await _to_thread(self._resolve_rows, snapshots, AMM_SNAPSHOT_ASSETS)
+            return await _to_thread(self._insert_amm_snapshots, rows)
         except Exception as e:
-            session.rollback()
-            logger.error(f"Error storing AMM snapshot: {e}")
+            logger.error(f"Error storing AMM snapshots: {e}")
             raise
-        finally:
-            session.close()
-            
-    async def store_token_transaction(self, tx_data: Dict[str, Any]):
-        """Store token transaction from metadata"""
-        session = get_session(self.engine)
+    
+    async def store_amm_snapshot(self, snapshot_data: Dict[str, Any]):
+        """Queue an AMM pool snapshot, flushing at once on a full batch
         
+        Anything short of a batch is written by a background flusher every
+        ``AMM_SNAPSHOT_FLUSH_INTERVAL`` seconds. Snapshots for a ledger that
+        is already stored are skipped at flush time.
+        """
+        self._amm_snapshot_queue.append({"timestamp": datetime.utcnow(), **snapshot_data})
+        if len(self._amm_snapshot_queue) >= AMM_SNAPSHOT_BATCH_SIZE:
+            await self._flush_amm_snapshots()
+        else:
+            self._start_flusher("AMM snapshots", self._flush_amm_snapshots, AMM_SNAPSHOT_FLUSH_INTERVAL)
+    
+    async def _flush_amm_snapshots(self):
+        """Write queued AMM snapshots in one batch"""
+        batch, self._amm_snapshot_queue = self._amm_snapshot_queue, []
+        if batch:
+            await self.store_amm_snapshots_bulk(batch)
+    
+    async def store_token_transaction(self, tx_data: Dict[str, Any]):
+        """Queue a token transaction, flushing once a full batch has accumulated"""
+        self._token_tx_queue.append(tx_data)
+        if len(self._token_tx_queue) >= WRITE_BATCH_SIZE:
+            await self._flush_token_transactions()
+    
+    async def _flush_token_transactions(self):
+        """Write queued token transactions in one batch"""
+        batch, self._token_tx_queue = self._token_tx_queue, []
+        if batch:
+            await self.store_token_transactions_bulk(batch)
+    
+    async def store_token_transactions_bulk(self, transactions: List[Dict[str, Any]]) -> int:
+        """Store token transactions extracted from metadata in batches"""
         try:
-            transaction = TokenTransaction(**tx_data)
-            session.add(transaction)
-            session.commit()
-            
+            rows = await _to_thread(
+                self._resolve_rows, transactions, TOKEN_TRANSACTION_ASSETS
+            )
+            return await _to_thread(
+                bulk_upsert, self.engine, TokenTransaction, rows, TOKEN_TRANSACTION_KEY
+            )
         except Exception as e:
-            session.rollback()
-            logger.error(f"Error storing token transaction: {e}")
+            logger.error(f"Error storing token transactions: {e}")
             raise
-        finally:
-            session.close()
             
     async def store_amm_position(self, position_data: Dict[str, Any]):
         """Store or update AMM position"""
-        session = get_session(self.engine)
-        
         try:
-            # Check if position exists
-            existing = session.query(AMMPosition).filter(
-                AMMPosition.wallet_address == position_data["wallet_address"],
-                AMMPosition.amm_address == position_data["amm_address"],
-                AMMPosition.deposit_tx_hash == position_data["deposit_tx_hash"]
-            ).first()
-            
-            if existing:
-                # Update existing position
-                for key, value in position_data.items():
-                    if key not in ["id", "created_at"]:
-                        setattr(existing, key, value)
-            else:
-                # Create new position
-                position = AMMPosition(**position_data)
-                session.add(position)
+            async with async_session_scope(self.async_engine) as session:
+                await session.execute(self._upsert(
+                    AMMPosition,
+                    {key: value for key, value in position_data.items() if key not in ("id", "created_at")},
+                    ["wallet_address", "amm_address", "deposit_tx_hash"]
+                ))
                 
-            session.commit()
-            
         except Exception as e:
-            session.rollback()
             logger.error(f"Error storing AMM position: {e}")
             raise
-        finally:
-            session.close()
             
-    async def create_collection_log(self, log_data: Dict[str, Any]):
-        """Create data collection log entry"""
-        session = get_session(self.engine)
-        
+    async def create_collection_log(self, log_data: Dict[str, Any]) -> int:
+        """Create data collection log entry, or refresh it if one already exists"""
         try:
-            log = DataCollectionLog(**log_data)
-            session.add(log)
-            session.commit()
+            async with async_session_scope(self.async_engine) as session:
+                stmt = pg_insert(DataCollectionLog).values(**log_data)
+                progress_fields = {
+                    key: stmt.excluded[key]
+                    for key in log_data
+                    if key not in ("collection_type", "target")
+                }
+                if progress_fields:
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=["collection_type", "target"],
+                        set_=progress_fields
+                    )
+                else:
+                    stmt = stmt.on_conflict_do_nothing(
+                        index_elements=["collection_type", "target"]
+                    )
+                
+                log_id = await session.scalar(stmt.returning(DataCollectionLog.id))
             
+            self._evict_collection_log(log_data["collection_type"], log_data["target"])
+            return log_id
+                
         except Exception as e:
-            session.rollback()
             logger.error(f"Error creating collection log: {e}")
             raise
-        finally:
-            session.close()
             
     async def get_collection_log(
         self, 
@@ -404,30 +660,73 @@ class DataStorage:
         target: str
     ) -> Optional[Dict[str, Any]]:
         """Get collection log for specific type and target"""
-        session = get_session(self.engine)
+        key = (collection_type, target)
+        if key in self._collection_log_cache:
+            cached = self._collection_log_cache[key]
+            return dict(cached) if cached else None
         
-        try:
-            log = session.query(DataCollectionLog).filter(
-                DataCollectionLog.collection_type == collection_type,
-                DataCollectionLog.target == target
-            ).first()
-            
-            if log:
-                return {
-                    "id": log.id,
-                    "collection_type": log.collection_type,
-                    "target": log.target,
-                    "start_ledger": log.start_ledger,
-                    "end_ledger": log.end_ledger,
-                    "last_processed_ledger": log.last_processed_ledger,
-                    "status": log.status,
-                    "records_collected": log.records_collected
-                }
-                
-            return None
+        async with async_session_scope(self.async_engine) as session:
+            row = (await session.execute(
+                select(*COLLECTION_LOG_COLUMNS).where(
+                    DataCollectionLog.collection_type == collection_type,
+                    DataCollectionLog.target == target
+                )
+            )).mappings().first()
+        
+        result = dict(row) if row else None
+        self._collection_log_cache[key] = result
+        return dict(result) if result else None
+    
+    async def get_collection_logs_bulk(
+        self,
+        collection_type: str,
+        targets: List[str]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Collection logs for many targets in one query, keyed by target
+        
+        Targets without a log map to None. Results also warm the cache used by
+        ``get_collection_log``.
+        """
+        logs: Dict[str, Optional[Dict[str, Any]]] = {}
+        missing = []
+        for target in targets:
+            key = (collection_type, target)
+            if key in self._collection_log_cache:
+                cached = self._collection_log_cache[key]
+                logs[target] = dict(cached) if cached else None
+            else:
+                missing.append(target)
+        
+        if missing:
+            async with async_session_scope(self.async_engine) as session:
+                rows = (await session.execute(
+                    select(*COLLECTION_LOG_COLUMNS).where(
+                        DataCollectionLog.collection_type == collection_type,
+                        DataCollectionLog.target.in_(missing)
+                    )
+                )).mappings().all()
             
-        finally:
-            session.close()
+            found = {row["target"]: dict(row) for row in rows}
+            for target in missing:
+                result = found.get(target)
+                self._collection_log_cache[(collection_type, target)] = result
+                logs[target] = dict(result) if result else None
+        
+        return logs
+    
+    def _evict_collection_log(
+        self,
+        collection_type: Optional[str] = None,
+        target: Optional[str] = None,
+        log_id: Optional[int] = None
+    ):
+        """Drop cached collection logs matching a key or a log id"""
+        if collection_type is not None:
+            self._collection_log_cache.pop((collection_type, target), None)
+        if log_id is not None:
+            for key, cached in list(self._collection_log_cache.items()):
+                if cached and cached["id"] == log_id:
+                    self._collection_log_cache.pop(key, None)
             
     async def update_collection_log(
         self,
@@ -437,32 +736,119 @@ class DataStorage:
         records_collected: int
     ):
         """Update collection progress"""
-        session = get_session(self.engine)
-        
         try:
-            log = session.query(DataCollectionLog).filter(
+            # Completed once progress reaches the log's end ledger
+            completed = and_(
+                DataCollectionLog.end_ledger.isnot(None),
+                DataCollectionLog.end_ledger <= last_processed_ledger
+            )
+            stmt = update(DataCollectionLog).where(
                 DataCollectionLog.collection_type == collection_type,
                 DataCollectionLog.target == target
-            ).first()
+            ).values(
+                last_processed_ledger=last_processed_ledger,
+                records_collected=records_collected,
+                status=case((completed, "completed"), else_=DataCollectionLog.status),
+                completed_at=case((completed, func.now()), else_=DataCollectionLog.completed_at)
+            )
             
-            if log:
-                log.last_processed_ledger = last_processed_ledger
-                log.records_collected = records_collected
-                
-                # Check if completed
-                if log.end_ledger and last_processed_ledger >= log.end_ledger:
-                    log.status = 'completed'
-                    log.completed_at = datetime.utcnow()
-                    
-                session.commit()
+            async with async_session_scope(self.async_engine) as session:
+                await session.execute(stmt)
+            
+            self._evict_collection_log(collection_type, target)
                 
         except Exception as e:
-            session.rollback()
             logger.error(f"Error updating collection log: {e}")
             raise
-        finally:
-            session.close()
             
+    async def increment_collection_log(
+        self,
+        log_id: int,
+        records: int,
+        last_processed_ledger: int
+    ):
+        """Flush a batch of collected records to a collection log"""
+        try:
+            async with async_session_scope(self.async_engine) as session:
+                await session.execute(
+                    DataCollectionLog.increment_statement(log_id, records, last_processed_ledger)
+                )
+            
+            self._evict_collection_log(log_id=log_id)
+                
+        except Exception as e:
+            logger.error(f"Error incrementing collection log: {e}")
+            raise
+            
+    async def bulk_upsert_collection_progress(
+        self,
+        collection_type: str,
+        progress: Dict[str, Tuple[int, int]],
+        status: str
+    ):
+        """Create or advance many collection logs in one statement
+        
+        ``progress`` maps target -> (last processed ledger, records collected
+        since the previous save); record counts are added server-side.
+        """
+        if not progress:
+            return
+        
+        try:
+            stmt = pg_insert(DataCollectionLog).values([
+                {
+                    "collection_type": collection_type,
+                    "target": target,
+                    "last_processed_ledger": ledger,
+                    "records_collected": records,
+                    "status": status,
+                    "last_run": func.now()
+                }
+                for target, (ledger, records) in progress.items()
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["collection_type", "target"],
+                set_={
+                    "last_processed_ledger": stmt.excluded.last_processed_ledger,
+                    "records_collected": (
+                        func.coalesce(DataCollectionLog.records_collected, 0)
+                        + stmt.excluded.records_collected
+                    ),
+                    "status": stmt.excluded.status,
+                    "last_run": stmt.excluded.last_run
+                }
+            )
+            
+            async with async_session_scope(self.async_engine) as session:
+                await session.execute(stmt)
+            
+            for target in progress:
+                self._evict_collection_log(collection_type, target)
+                
+        except Exception as e:
+            logger.error(f"Error saving collection progress: {e}")
+            raise
+            
+    async def _stream_records(self, stmt, float_columns: List[str]) -> List[Dict[str, Any]]:
+        """Stream ``stmt`` through a server-side cursor into row dicts
+        
+        Rows arrive in chunks that are framed as they come in; numeric columns
+        are converted to float once over the combined frame and NULLs map to None.
+        """
+        frames = []
+        async with async_session_scope(self.async_engine) as session:
+            result = await session.stream(stmt.execution_options(yield_per=STREAM_CHUNK_SIZE))
+            columns = list(result.keys())
+            async for partition in result.partitions():
+                frames.append(pd.DataFrame(partition, columns=columns))
+        
+        if not frames:
+            return []
+        
+        df = pd.concat(frames, ignore_index=True)
+        df = df.astype({column: "float64" for column in float_columns})
+        return df.astype(object).where(df.notna(), None).to_dict("records")
+    
     async def get_dex_trades(
         self,
         start_date: Optional[datetime] = None,
@@ -471,46 +857,44 @@ class DataStorage:
         limit: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """Get DEX trades with filters"""
-        session = get_session(self.engine)
+        gets_asset = aliased(Asset)
+        pays_asset = aliased(Asset)
+        stmt = select(
+            DEXTrade.timestamp,
+            DEXTrade.ledger_index,
+            DEXTrade.transaction_hash,
+            DEXTrade.account,
+            gets_asset.currency_code.label("gets_currency"),
+            gets_asset.issuer.label("gets_issuer"),
+            DEXTrade.gets_amount,
+            pays_asset.currency_code.label("pays_currency"),
+            pays_asset.issuer.label("pays_issuer"),
+            DEXTrade.pays_amount,
+            DEXTrade.price
+        ).join(
+            gets_asset, DEXTrade.gets_asset_id == gets_asset.id
+        ).join(
+            pays_asset, DEXTrade.pays_asset_id == pays_asset.id
+        )
         
-        try:
-            query = session.query(DEXTrade)
-            
-            if start_date:
-                query = query.filter(DEXTrade.timestamp >= start_date)
-            if end_date:
-                query = query.filter(DEXTrade.timestamp <= end_date)
-                
-            if currency_pair:
-                gets_currency, pays_currency = currency_pair
-                query = query.filter(
-                    DEXTrade.gets_currency == gets_currency,
-                    DEXTrade.pays_currency == pays_currency
-                )
-                
-            query = query.order_by(DEXTrade.timestamp.desc())
-            
-            if limit:
-                query = query.limit(limit)
-                
-            trades = query.all()
-            
-            return [{
-                "timestamp": t.timestamp,
-                "ledger_index": t.ledger_index,
-                "transaction_hash": t.transaction_hash,
-                "account": t.account,
-                "gets_currency": t.gets_currency,
-                "gets_issuer": t.gets_issuer,
-                "gets_amount": float(t.gets_amount),
-                "pays_currency": t.pays_currency,
-                "pays_issuer": t.pays_issuer,
-                "pays_amount": float(t.pays_amount),
-                "price": float(t.price) if t.price else None
-            } for t in trades]
-            
-        finally:
-            session.close()
+        if start_date:
+            stmt = stmt.where(DEXTrade.timestamp >= start_date)
+        if end_date:
+            stmt = stmt.where(DEXTrade.timestamp <= end_date)
+        
+        if currency_pair:
+            gets_currency, pays_currency = currency_pair
+            stmt = stmt.where(
+                gets_asset.currency_code == gets_currency,
+                pays_asset.currency_code == pays_currency
+            )
+        
+        stmt = stmt.order_by(DEXTrade.timestamp.desc())
+        
+        if limit:
+            stmt = stmt.limit(limit)
+        
+        return await self._stream_records(stmt, ["gets_amount", "pays_amount", "price"])
             
     async def get_amm_snapshots(
         self,
@@ -520,38 +904,30 @@ class DataStorage:
         limit: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """Get AMM snapshots for analysis"""
-        session = get_session(self.engine)
+        stmt = select(
+            AMMSnapshot.timestamp,
+            AMMSnapshot.ledger_index,
+            AMMSnapshot.asset1_amount,
+            AMMSnapshot.asset2_amount,
+            AMMSnapshot.lp_token_supply,
+            AMMSnapshot.k_constant,
+            AMMSnapshot.price_asset2_per_asset1,
+            AMMSnapshot.tvl_xrp
+        ).where(
+            AMMSnapshot.amm_address_bytes == address_bytes(amm_address)
+        )
         
-        try:
-            query = session.query(AMMSnapshot).filter(
-                AMMSnapshot.amm_address == amm_address
-            )
-            
-            if start_date:
-                query = query.filter(AMMSnapshot.timestamp >= start_date)
-            if end_date:
-                query = query.filter(AMMSnapshot.timestamp <= end_date)
-                
-            query = query.order_by(AMMSnapshot.timestamp)
-            
-            if limit:
-                query = query.limit(limit)
-                
-            snapshots = query.all()
-            
-            return [{
-                "timestamp": s.timestamp,
-                "ledger_index": s.ledger_index,
-                "asset1_amount": float(s.asset1_amount),
-                "asset2_amount": float(s.asset2_amount),
-                "lp_token_supply": float(s.lp_token_supply),
-                "k_constant": float(s.k_constant) if s.k_constant else None,
-                "price_asset2_per_asset1": float(s.price_asset2_per_asset1) if s.price_asset2_per_asset1 else None,
-                "tvl_xrp": float(s.tvl_xrp) if s.tvl_xrp else None
-            } for s in snapshots]
-            
-        finally:
-            session.close()
+        if start_date:
+            stmt = stmt.where(AMMSnapshot.timestamp >= start_date)
+        if end_date:
+            stmt = stmt.where(AMMSnapshot.timestamp <= end_date)
+        
+        stmt = stmt.order_by(AMMSnapshot.timestamp)
+        
+        if limit:
+            stmt = stmt.limit(limit)
+        
+        return await self._stream_records(stmt, AMM_SNAPSHOT_FLOAT_COLUMNS)
             
     async def store_amm_activity(self, activity_data: Dict[str, Any]):
         """Store AMM activity (deposits, withdrawals, etc.)"""
@@ -568,7 +944,7 @@ class DataStorage:
             }
             await self.store_amm_position(position_data)
             
-    def update_collection_progress(
+    async def update_collection_progress(
         self,
         collection_type: str,
         target: str,
@@ -577,80 +953,83 @@ class DataStorage:
         records_added: int = 0
     ):
         """Update data collection progress"""
-        session = get_session(self.engine)
-        
         try:
-            # Get or create log entry
-            log = session.query(DataCollectionLog).filter(
-                DataCollectionLog.collection_type == collection_type,
-                DataCollectionLog.target == target
-            ).first()
+            values = {
+                "collection_type": collection_type,
+                "target": target,
+                "last_processed_ledger": last_ledger,
+                "status": status,
+                "last_run": func.now(),
+                "records_collected": records_added
+            }
+            if status == "completed":
+                values["completed_at"] = func.now()
             
-            if not log:
-                log = DataCollectionLog(
-                    collection_type=collection_type,
-                    target=target,
-                    started_at=datetime.utcnow()
-                )
-                session.add(log)
-                
-            # Update fields
-            log.last_processed_ledger = last_ledger
-            log.status = status
-            log.last_run = datetime.utcnow()
-            log.records_collected = (log.records_collected or 0) + records_added
+            # Create or advance the log entry in one statement; the record
+            # count is incremented server-side so concurrent writers add up
+            stmt = pg_insert(DataCollectionLog).values(**values)
+            set_ = {
+                key: stmt.excluded[key]
+                for key in values
+                if key not in ("collection_type", "target", "records_collected")
+            }
+            set_["records_collected"] = (
+                func.coalesce(DataCollectionLog.records_collected, 0) + records_added
+            )
             
-            if status == "completed":
-                log.completed_at = datetime.utcnow()
-                
-            session.commit()
+            async with async_session_scope(self.async_engine) as session:
+                await session.execute(stmt.on_conflict_do_update(
+                    index_elements=["collection_type", "target"],
+                    set_=set_
+                ))
             
+            self._evict_collection_log(collection_type, target)
+                
         except Exception as e:
             logger.error(f"Error updating collection progress: {e}")
-            session.rollback()
-        finally:
-            session.close()
             
-    async def store_amm_snapshot(self, snapshot_data: Dict[str, Any]):
-        """Store AMM pool snapshot"""
-        session = get_session(self.engine)
-        
-        try:
-            # Check if we already have this snapshot (same AMM, same ledger)
-            existing = session.query(AMMSnapshot).filter(
-                AMMSnapshot.amm_address == snapshot_data["amm_address"],
-                AMMSnapshot.ledger_index == snapshot_data["ledger_index"]
-            ).first()
-            
-            if existing:
-                logger.debug(f"AMM snapshot already exists for {snapshot_data['amm_address']} at ledger {snapshot_data['ledger_index']}")
-                return
-                
-            snapshot = AMMSnapshot(
-                timestamp=snapshot_data.get("timestamp", datetime.utcnow()),
-                ledger_index=snapshot_data["ledger_index"],
-                amm_address=snapshot_data["amm_address"],
-                asset1_currency=snapshot_data["asset1_currency"],
-                asset1_issuer=snapshot_data.get("asset1_issuer"),
-                asset1_amount=snapshot_data["asset1_amount"],
-                asset2_currency=snapshot_data["asset2_currency"],
-                asset2_issuer=snapshot_data.get("asset2_issuer"),
-                asset2_amount=snapshot_data["asset2_amount"],
-                lp_token_currency=snapshot_data.get("lp_token_currency"),
-                lp_token_supply=snapshot_data.get("lp_token_supply", 0),
-                trading_fee=snapshot_data.get("trading_fee"),
-                k_constant=snapshot_data.get("k_constant"),
-                price_asset2_per_asset1=snapshot_data.get("price_asset2_per_asset1"),
-                tvl_xrp=snapshot_data.get("tvl_xrp")
+    def _start_flusher(self, name: str, flush: Callable[[], Awaitable[Any]], interval: float):
+        """Run ``flush`` every ``interval`` seconds in a background task until ``flush_all``"""
+        task = self._flushers.get(name)
+        if task is None or task.done():
+            lock = self._flush_locks.setdefault(name, asyncio.Lock())
+            self._flushers[name] = asyncio.create_task(
+                self._run_flusher(name, flush, interval, lock)
             )
-            
-            session.add(snapshot)
-            session.commit()
-            
-            logger.debug(f"Stored AMM snapshot for {snapshot_data['amm_address']}")
-            
-        except Exception as e:
-            logger.error(f"Error storing AMM snapshot: {e}")
-            session.rollback()
-        finally:
-            session.close()
\ No newline at end of file
+    
+    @staticmethod
+    async def _run_flusher(
+        name: str,
+        flush: Callable[[], Awaitable[Any]],
+        interval: float,
+        lock: asyncio.Lock
+    ):
+        """Timed flush loop; a failed flush is logged and the next one still runs"""
+        while True:
+            await asyncio.sleep(interval)
+            async with lock:
+                try:
+                    await flush()
+                except Exception as e:
+                    logger.error(f"Error flushing {name}: {e}")
+    
+    async def _stop_flushers(self):
+        """Cancel the background flushers between batches and wait for them to exit
+        
+        A flush swaps its queue out before writing it, so a cancel landing
+        mid-batch would drop the batch; taking the flusher's lock first means
+        the cancel only ever hits its sleep or its wait for the lock.
+        """
+        tasks, self._flushers = self._flushers, {}
+        for name, task in tasks.items():
+            async with self._flush_locks[name]:
+                task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+    
+    async def flush_all(self):
+        """Write every queued record; call before reading back or shutting down"""
+        await self._stop_flushers()
+        await self._flush_dex_trades()
+        await self._flush_token_transactions()
+        await self._flush_amm_snapshots()
+        await self._flush_amm_states()
@@ -0,0 +1,9 @@
+from decimal import Decimal
+from typing import NamedTuple
+
+
+class OrderEntry(NamedTuple):
+    """One price level of an order book side"""
+    price: Decimal
+    amount: Decimal
+    total: Decimal
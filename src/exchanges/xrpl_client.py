@@ -1,17 +1,92 @@
 import asyncio
-from typing import Optional, Dict, Any, List
+from functools import lru_cache, wraps
+from json import JSONDecodeError
+from typing import Optional, Dict, Any, List, Set, Tuple
 from decimal import Decimal
+import httpx
+import numpy as np
+import orjson
 from xrpl.asyncio.clients import AsyncWebsocketClient, AsyncJsonRpcClient
-from xrpl.models import AccountInfo, AccountTx, Subscribe, Unsubscribe
-from xrpl.models.requests import BookOffers, Transaction
+from xrpl.asyncio.clients.client import REQUEST_TIMEOUT
+from xrpl.asyncio.clients.exceptions import XRPLRequestFailureException
+from xrpl.asyncio.clients.utils import json_to_response, request_to_json_rpc
+from xrpl.models import AccountInfo, AccountTx, ServerInfo, Subscribe, Unsubscribe
+from xrpl.models.requests import BookOffers, Tx
+from xrpl.models.requests.request import Request
+from xrpl.models.response import Response
 from xrpl.models.transactions import Payment, OfferCreate, OfferCancel
 from xrpl.wallet import Wallet
 from xrpl.utils import xrp_to_drops, drops_to_xrp
-from xrpl.asyncio.transaction import safe_sign_and_autofill_transaction, send_reliable_submission
+from xrpl.asyncio.transaction import safe_sign_and_autofill_transaction, submit
 from loguru import logger
 
 from src.config.settings import Settings
-from src.config.constants import MIN_XRP_BALANCE, DROPS_PER_XRP
+from src.config.constants import MIN_XRP_BALANCE, DROPS_PER_XRP, OFFER_SELL_FLAG
+from src.exchanges.order_book import OrderEntry
+
+
+# Seconds to wait on the stream before checking a submitted transaction by
+# hash; it is only reported failed once its LastLedgerSequence has passed
+SUBMISSION_TIMEOUT = 30
+
+# Preliminary submit results after which the transaction can still validate
+PENDING_ENGINE_RESULTS = frozenset({"tesSUCCESS", "terQUEUED"})
+
+# Websocket liveness probe: a half-open socket still reports is_open(), so a
+# ServerInfo request must answer within the timeout or the socket is replaced
+HEARTBEAT_INTERVAL = 15
+HEARTBEAT_TIMEOUT = 5.0
+MAX_RECONNECT_DELAY = 30
+
+# Keep-alive pool shared by every JSON-RPC request of one XRPLClient
+JSON_RPC_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=32, keepalive_expiry=60)
+
+
+@lru_cache(maxsize=1024)
+def _drops_to_xrp(drops: str) -> Decimal:
+    """Memoized ``drops_to_xrp``; fees and round amounts repeat across transactions"""
+    return drops_to_xrp(drops)
+
+
+def log_and_reraise(action: str):
+    """Log a failed client call as ``Error <action>: ...`` and re-raise it"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                logger.error(f"Error {action}: {e}")
+                raise
+        return wrapper
+    return decorator
+
+
+class PooledJsonRpcClient(AsyncJsonRpcClient):
+    """JSON-RPC client that posts through a long-lived ``httpx.AsyncClient``
+    
+    xrpl-py opens a new HTTP client per request, paying a TCP and TLS
+    handshake every time; this keeps connections alive between requests.
+    Bodies are encoded and decoded with orjson.
+    """
+    
+    def __init__(self, url: str, http_client: httpx.AsyncClient):
+        super().__init__(url)
+        self._http = http_client
+    
+    async def _request_impl(self, request: Request, *, timeout: float = REQUEST_TIMEOUT) -> Response:
+        response = await self._http.post(
+            self.url,
+            content=orjson.dumps(request_to_json_rpc(request)),
+            headers={"Content-Type": "application/json"},
+            timeout=timeout
+        )
+        try:
+            return json_to_response(orjson.loads(response.content))
+        except JSONDecodeError:
+            raise XRPLRequestFailureException(
+                {"error": response.status_code, "error_message": response.text}
+            )
 
 
 class XRPLClient:
@@ -20,70 +95,224 @@ class XRPLClient:
         self.ws_url, self.json_rpc_url = settings.get_network_urls()
         self.ws_client: Optional[AsyncWebsocketClient] = None
         self.json_client: Optional[AsyncJsonRpcClient] = None
+        self._http: Optional[httpx.AsyncClient] = None
         self.wallet: Optional[Wallet] = None
         self._connected = False
+        self._issuer_map: Dict[str, str] = dict(settings.issuer_map)
+        # Submitted transaction hash -> future resolved by the validated stream
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._listener: Optional[asyncio.Task] = None
+        # Accounts replayed to a fresh websocket after a reconnect
+        self._subscribed_accounts: Set[str] = set()
+        self._supervisor: Optional[asyncio.Task] = None
         
+    @log_and_reraise("connecting to XRPL")
     async def connect(self) -> None:
-        try:
-            # Initialize WebSocket client
-            self.ws_client = AsyncWebsocketClient(self.ws_url)
-            await self.ws_client.open()
-            
-            # Initialize JSON-RPC client
-            self.json_client = AsyncJsonRpcClient(self.json_rpc_url)
-            
-            # Initialize wallet if seed is provided
-            if self.settings.wallet_seed:
-                self.wallet = Wallet.from_seed(self.settings.wallet_seed)
-                logger.info(f"Wallet initialized with address: {self.wallet.address}")
-            
-            self._connected = True
-            logger.info(f"Connected to XRPL network: {self.ws_url}")
+        # Initialize WebSocket client
+        self.ws_client = AsyncWebsocketClient(self.ws_url)
+        await self.ws_client.open()
+        
+        # Initialize JSON-RPC client on a pooled keep-alive HTTP client
+        self._http = httpx.AsyncClient(limits=JSON_RPC_LIMITS, timeout=REQUEST_TIMEOUT)
+        self.json_client = PooledJsonRpcClient(self.json_rpc_url, self._http)
+        
+        # Initialize wallet if seed is provided
+        if self.settings.wallet_seed:
+            self.wallet = Wallet.from_seed(self.settings.wallet_seed)
+            logger.info(f"Wallet initialized with address: {self.wallet.address}")
             
-        except Exception as e:
-            logger.error(f"Failed to connect to XRPL: {e}")
-            raise
+            # Our own transactions are pushed on validation, so submissions
+            # wait on the stream instead of polling
+            await self.subscribe_to_transactions([self.wallet.address])
+            self._listener = asyncio.create_task(self._listen())
+        
+        self._connected = True
+        self._supervisor = asyncio.create_task(self._watchdog())
+        logger.info(f"Connected to XRPL network: {self.ws_url}")
     
     async def disconnect(self) -> None:
+        if self._supervisor:
+            self._supervisor.cancel()
+            self._supervisor = None
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
         if self.ws_client and self.ws_client.is_open():
             await self.ws_client.close()
+        if self._http:
+            await self._http.aclose()
+            self._http = None
         self._connected = False
         logger.info("Disconnected from XRPL network")
     
+    async def _watchdog(self) -> None:
+        """Probe the websocket periodically and reconnect when it stops answering"""
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            try:
+                await asyncio.wait_for(self.ws_client.request(ServerInfo()), HEARTBEAT_TIMEOUT)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"XRPL websocket heartbeat failed ({e!r}), reconnecting")
+                await self._reconnect()
+    
+    async def _reconnect(self) -> None:
+        """Replace the websocket with exponential backoff and replay subscriptions"""
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+        
+        attempt = 0
+        while True:
+            try:
+                if self.ws_client and self.ws_client.is_open():
+                    await self.ws_client.close()
+            except Exception:
+                pass
+            
+            try:
+                self.ws_client = AsyncWebsocketClient(self.ws_url)
+                await self.ws_client.open()
+                
+                if self._subscribed_accounts:
+                    await self.ws_client.send(Subscribe(
+                        accounts=list(self._subscribed_accounts),
+                        streams=["transactions"]
+                    ))
+                if self.wallet:
+                    self._listener = asyncio.create_task(self._listen())
+                
+                logger.info(f"Reconnected to XRPL network: {self.ws_url}")
+                await self._settle_pending()
+                return
+                
+            except Exception as e:
+                delay = min(MAX_RECONNECT_DELAY, 0.5 * 2 ** attempt)
+                attempt += 1
+                logger.error(f"Reconnect attempt {attempt} failed: {e}; retrying in {delay}s")
+                await asyncio.sleep(delay)
+    
+    async def _listen(self) -> None:
+        """Resolve pending submissions from the validated transaction stream"""
+        try:
+            async for message in self.ws_client:
+                if message.get("type") != "transaction" or not message.get("validated"):
+                    continue
+                
+                tx_hash = message.get("hash") or message.get("transaction", {}).get("hash")
+                future = self._pending.pop(tx_hash, None)
+                if future and not future.done():
+                    future.set_result(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Pending submissions stay registered; they are settled by hash
+            # after a reconnect or by _submit_and_wait's own lookups
+            logger.error(f"Transaction stream listener stopped: {e}")
+    
+    async def _settle_pending(self) -> None:
+        """Resolve submissions whose validation arrived while the stream was down"""
+        for tx_hash, future in list(self._pending.items()):
+            try:
+                message = await self._lookup_tx(tx_hash)
+            except Exception as e:
+                logger.warning(f"Lookup of pending transaction {tx_hash} failed: {e}")
+                continue
+            
+            if message is not None and not future.done():
+                self._pending.pop(tx_hash, None)
+                future.set_result(message)
+    
+    async def _lookup_tx(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        """Validated ``tx`` result for ``tx_hash``, or None if not yet in a validated ledger"""
+        response = await self.json_client.request(Tx(transaction=tx_hash))
+        if response.is_successful() and response.result.get("validated"):
+            return response.result
+        return None
+    
+    async def _validated_ledger_index(self) -> int:
+        response = await self.json_client.request(ServerInfo())
+        if not response.is_successful():
+            raise Exception(f"Server info request failed: {response.result}")
+        return response.result["info"]["validated_ledger"]["seq"]
+    
+    async def _submit_and_wait(self, signed_tx) -> Dict[str, Any]:
+        """Submit a signed transaction once and wait until it is validated or expired
+        
+        The validated stream normally resolves the wait, including across
+        reconnects. If it stays silent, the hash is looked up directly, and failure is only reported
+        once the validated ledger is past the transaction's
+        LastLedgerSequence, so the caller can never retry an order that may
+        still land.
+        """
+        tx_hash = signed_tx.get_hash()
+        last_ledger = signed_tx.last_ledger_sequence
+        future = asyncio.get_running_loop().create_future()
+        self._pending[tx_hash] = future
+        
+        try:
+            response = await submit(signed_tx, self.json_client)
+            engine_result = response.result.get("engine_result")
+            if not response.is_successful() or engine_result not in PENDING_ENGINE_RESULTS:
+                raise Exception(f"Submission rejected: {response.result}")
+            
+            while True:
+                try:
+                    message = await asyncio.wait_for(asyncio.shield(future), SUBMISSION_TIMEOUT)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+                
+                # Read the validated ledger before the lookup: if the hash is
+                # still missing afterwards, it cannot have made that ledger
+                validated_ledger = await self._validated_ledger_index()
+                message = await self._lookup_tx(tx_hash)
+                if message is not None:
+                    break
+                if last_ledger is None or validated_ledger > last_ledger:
+                    raise Exception(
+                        f"Transaction {tx_hash} expired without validating "
+                        f"(LastLedgerSequence {last_ledger}, validated ledger {validated_ledger})"
+                    )
+        finally:
+            self._pending.pop(tx_hash, None)
+        
+        result = message.get("meta", {}).get("TransactionResult")
+        if result != "tesSUCCESS":
+            raise Exception(f"Transaction {tx_hash} failed with {result}")
+        return message
+    
     @property
     def is_connected(self) -> bool:
         return self._connected and self.ws_client and self.ws_client.is_open()
     
-    async def get_account_info(self, address: Optional[str] = None) -> Dict[str, Any]:
+    @log_and_reraise("getting account info")
+    async def _get_account_raw(self, address: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+        """Fetch ``(address, account_data)`` for ``address`` or the wallet"""
         if not address and not self.wallet:
             raise ValueError("No address provided and no wallet initialized")
         
         target_address = address or self.wallet.address
+        response = await self.json_client.request(AccountInfo(account=target_address))
         
-        try:
-            request = AccountInfo(account=target_address)
-            response = await self.json_client.request(request)
-            
-            if response.is_successful():
-                account_data = response.result["account_data"]
-                return {
-                    "address": target_address,
-                    "balance": drops_to_xrp(account_data["Balance"]),
-                    "sequence": account_data["Sequence"],
-                    "flags": account_data.get("Flags", 0),
-                    "owner_count": account_data.get("OwnerCount", 0),
-                }
-            else:
-                logger.error(f"Failed to get account info: {response.result}")
-                raise Exception(f"Account info request failed: {response.result}")
-                
-        except Exception as e:
-            logger.error(f"Error getting account info: {e}")
-            raise
+        if not response.is_successful():
+            raise Exception(f"Account info request failed: {response.result}")
+        return target_address, response.result["account_data"]
+    
+    async def get_account_info(self, address: Optional[str] = None) -> Dict[str, Any]:
+        target_address, account_data = await self._get_account_raw(address)
+        return {
+            "address": target_address,
+            "balance": drops_to_xrp(account_data["Balance"]),
+            "sequence": account_data["Sequence"],
+            "flags": account_data.get("Flags", 0),
+            "owner_count": account_data.get("OwnerCount", 0),
+        }
     
     async def get_xrp_balance(self, address: Optional[str] = None) -> Decimal:
-        account_info = await self.get_account_info(address)
-        return Decimal(str(account_info["balance"]))
+        _, account_data = await self._get_account_raw(address)
+        return drops_to_xrp(account_data["Balance"])
     
     async def subscribe_to_transactions(self, accounts: List[str]) -> None:
         if not self.ws_client:
@@ -95,6 +324,7 @@ class XRPLClient:
         )
         
         await self.ws_client.send(subscribe_request)
+        self._subscribed_accounts.update(accounts)
         logger.info(f"Subscribed to transactions for accounts: {accounts}")
     
     async def unsubscribe_from_transactions(self, accounts: List[str]) -> None:
@@ -107,24 +337,14 @@ class XRPLClient:
         )
         
         await self.ws_client.send(unsubscribe_request)
+        self._subscribed_accounts.difference_update(accounts)
         logger.info(f"Unsubscribed from transactions for accounts: {accounts}")
     
-    async def get_order_book(self, base: str, quote: str, limit: int = 20) -> Dict[str, Any]:
+    async def get_order_book(self, base: str, quote: str, limit: int = 20) -> Dict[str, List[OrderEntry]]:
         try:
-            # For XRP pairs, we need to handle the special case
-            taker_gets = {"currency": "XRP"} if base == "XRP" else {
-                "currency": base,
-                "issuer": self._get_issuer_address(base)
-            }
-            
-            taker_pays = {"currency": "XRP"} if quote == "XRP" else {
-                "currency": quote,
-                "issuer": self._get_issuer_address(quote)
-            }
-            
             request = BookOffers(
-                taker_gets=taker_gets,
-                taker_pays=taker_pays,
+                taker_gets=self._asset(base),
+                taker_pays=self._asset(quote),
                 limit=limit
             )
             
@@ -141,67 +361,68 @@ class XRPLClient:
             logger.error(f"Error getting order book: {e}")
             return {"bids": [], "asks": []}
     
-    def _format_order_book(self, offers: List[Dict]) -> Dict[str, List]:
-        bids = []
-        asks = []
+    def _format_order_book(self, offers: List[Dict]) -> Dict[str, List[OrderEntry]]:
+        entries = []
+        sort_keys = np.empty(len(offers))
+        is_ask = np.empty(len(offers), dtype=bool)
         
-        for offer in offers:
-            # Determine if this is a bid or ask based on the offer direction
-            price = self._calculate_price(offer)
-            amount = self._get_amount(offer)
+        for i, offer in enumerate(offers):
+            amount, pays_amount, _ = self._extract_gets_pays(offer)
+            price = pays_amount / amount if amount else Decimal("0")
             
-            order_entry = {
-                "price": price,
-                "amount": amount,
-                "total": price * amount
-            }
-            
-            # Add to appropriate list based on offer flags
-            if offer.get("Flags", 0) & 0x00020000:  # Sell flag
-                asks.append(order_entry)
-            else:
-                bids.append(order_entry)
+            entries.append(OrderEntry(price, amount, price * amount))
+            sort_keys[i] = price
+            # Offers with the sell flag are asks, everything else is a bid
+            is_ask[i] = offer.get("Flags", 0) & OFFER_SELL_FLAG
         
-        # Sort bids descending, asks ascending
-        bids.sort(key=lambda x: x["price"], reverse=True)
-        asks.sort(key=lambda x: x["price"])
+        # Negating bid prices lets one stable argsort order asks ascending and
+        # bids descending; float64 keys only order, returned values stay Decimal
+        order = np.argsort(np.where(is_ask, sort_keys, -sort_keys), kind="stable")
+        side = is_ask[order]
         
-        return {"bids": bids, "asks": asks}
+        # tolist() hands back Python ints, which index the list faster than
+        # NumPy scalars
+        return {
+            "bids": [entries[i] for i in order[~side].tolist()],
+            "asks": [entries[i] for i in order[side].tolist()]
+        }
     
-    def _calculate_price(self, offer: Dict) -> Decimal:
-        # Calculate price based on taker_gets and taker_pays
-        taker_gets = offer.get("TakerGets", offer.get("taker_gets", {}))
-        taker_pays = offer.get("TakerPays", offer.get("taker_pays", {}))
-        
-        if isinstance(taker_gets, str):  # XRP amount in drops
-            gets_amount = Decimal(taker_gets) / DROPS_PER_XRP
-        else:
-            gets_amount = Decimal(taker_gets.get("value", "0"))
-        
-        if isinstance(taker_pays, str):  # XRP amount in drops
-            pays_amount = Decimal(taker_pays) / DROPS_PER_XRP
-        else:
-            pays_amount = Decimal(taker_pays.get("value", "0"))
+    @staticmethod
+    def _parse_amount(amount: Any) -> Decimal:
+        if isinstance(amount, str):  # XRP amount in drops
+            return Decimal(amount) / DROPS_PER_XRP
+        return Decimal(amount.get("value", "0"))
+    
+    def _extract_gets_pays(self, offer: Dict) -> Tuple[Decimal, Decimal, bool]:
+        """Parse an offer's TakerGets/TakerPays once
         
-        if gets_amount == 0:
-            return Decimal("0")
+        Returns ``(gets_amount, pays_amount, gets_is_xrp)``; rippled's
+        capitalized field names are probed first, snake_case only as fallback.
+        """
+        taker_gets = offer.get("TakerGets")
+        if taker_gets is None:
+            taker_gets = offer.get("taker_gets", {})
+        taker_pays = offer.get("TakerPays")
+        if taker_pays is None:
+            taker_pays = offer.get("taker_pays", {})
         
-        return pays_amount / gets_amount
+        return (
+            self._parse_amount(taker_gets),
+            self._parse_amount(taker_pays),
+            isinstance(taker_gets, str)
+        )
     
-    def _get_amount(self, offer: Dict) -> Decimal:
-        taker_gets = offer.get("TakerGets", offer.get("taker_gets", {}))
+    def _asset(self, currency: str) -> Dict[str, str]:
+        """Order book side for ``currency``, with its configured issuer"""
+        if currency == "XRP":
+            return {"currency": "XRP"}
         
-        if isinstance(taker_gets, str):  # XRP amount in drops
-            return Decimal(taker_gets) / DROPS_PER_XRP
-        else:
-            return Decimal(taker_gets.get("value", "0"))
-    
-    def _get_issuer_address(self, currency: str) -> str:
-        # This would normally come from a configuration or database
-        # For now, returning a placeholder
-        # In production, you'd map currency codes to their issuers
-        return "rN7n7otQDd6FczFgLdSqtcsAUxDkw6fzRH"  # Example issuer
+        issuer = self._issuer_map.get(currency)
+        if issuer is None:
+            raise ValueError(f"No issuer configured for currency {currency}")
+        return {"currency": currency, "issuer": issuer}
     
+    @log_and_reraise("creating offer")
     async def create_offer(
         self,
         taker_gets: Dict[str, Any],
@@ -211,58 +432,39 @@ class XRPLClient:
         if not self.wallet:
             raise ValueError("Wallet not initialized")
         
-        try:
-            offer = OfferCreate(
-                account=self.wallet.address,
-                taker_gets=taker_gets,
-                taker_pays=taker_pays,
-                flags=flags
-            )
-            
-            # Sign and submit the transaction
-            signed_tx = await safe_sign_and_autofill_transaction(
-                offer, self.wallet, self.json_client
-            )
-            
-            response = await send_reliable_submission(signed_tx, self.json_client)
-            
-            if response.is_successful():
-                logger.info(f"Offer created successfully: {response.result}")
-                return response.result
-            else:
-                logger.error(f"Failed to create offer: {response.result}")
-                raise Exception(f"Offer creation failed: {response.result}")
-                
-        except Exception as e:
-            logger.error(f"Error creating offer: {e}")
-            raise
+        offer = OfferCreate(
+            account=self.wallet.address,
+            taker_gets=taker_gets,
+            taker_pays=taker_pays,
+            flags=flags
+        )
+        
+        # Sign and submit the transaction
+        signed_tx = await safe_sign_and_autofill_transaction(
+            offer, self.wallet, self.json_client
+        )
+        
+        result = await self._submit_and_wait(signed_tx)
+        logger.info(f"Offer created successfully: {result}")
+        return result
     
+    @log_and_reraise("cancelling offer")
     async def cancel_offer(self, offer_sequence: int) -> Dict[str, Any]:
         if not self.wallet:
             raise ValueError("Wallet not initialized")
         
-        try:
-            cancel = OfferCancel(
-                account=self.wallet.address,
-                offer_sequence=offer_sequence
-            )
-            
-            signed_tx = await safe_sign_and_autofill_transaction(
-                cancel, self.wallet, self.json_client
-            )
-            
-            response = await send_reliable_submission(signed_tx, self.json_client)
-            
-            if response.is_successful():
-                logger.info(f"Offer cancelled successfully: {response.result}")
-                return response.result
-            else:
-                logger.error(f"Failed to cancel offer: {response.result}")
-                raise Exception(f"Offer cancellation failed: {response.result}")
-                
-        except Exception as e:
-            logger.error(f"Error cancelling offer: {e}")
-            raise
+        cancel = OfferCancel(
+            account=self.wallet.address,
+            offer_sequence=offer_sequence
+        )
+        
+        signed_tx = await safe_sign_and_autofill_transaction(
+            cancel, self.wallet, self.json_client
+        )
+        
+        result = await self._submit_and_wait(signed_tx)
+        logger.info(f"Offer cancelled successfully: {result}")
+        return result
     
     async def get_transaction_history(
         self,
@@ -303,7 +505,7 @@ class XRPLClient:
             "account": tx.get("Account"),
             "destination": tx.get("Destination"),
             "amount": self._format_amount(tx.get("Amount")),
-            "fee": drops_to_xrp(tx.get("Fee", "0")),
+            "fee": _drops_to_xrp(tx.get("Fee", "0")),
             "date": tx.get("date"),
             "result": meta.get("TransactionResult"),
             "validated": tx_data.get("validated", False)
@@ -313,7 +515,7 @@ class XRPLClient:
         if isinstance(amount, str):  # XRP amount in drops
             return {
                 "currency": "XRP",
-                "value": str(drops_to_xrp(amount))
+                "value": str(_drops_to_xrp(amount))
             }
         elif isinstance(amount, dict):
             return {
@@ -2,16 +2,44 @@
 Real-time AMM state tracking
 """
 
-from typing import Dict, Any, Optional
-from datetime import datetime
+import asyncio
+import time
+from typing import Dict, Any, NamedTuple, Optional, Set, Union
+from datetime import datetime, timezone
 from decimal import Decimal
+from cachetools import TTLCache
 from loguru import logger
 from xrpl.asyncio.clients import AsyncWebsocketClient
-from xrpl.models import AccountInfo, AMMInfo
-from xrpl.utils import ripple_time_to_datetime
+from xrpl.models import AccountInfo
+from xrpl.models.requests import GenericRequest
 
 from src.database.storage import DataStorage
 from src.database.models import AMMSnapshot
+from src.config.constants import RIPPLE_EPOCH
+
+
+# Seconds an AMMInfo response is reused, roughly one ledger close
+AMM_INFO_TTL = 4.0
+
+# AMMInfo requests kept in flight at once on the shared websocket
+MAX_CONCURRENT_REQUESTS = 16
+
+# Seconds a pool updated from its own transaction stream counts as current
+STREAM_FRESHNESS = 30.0
+
+
+class PoolAmount(NamedTuple):
+    """One side of an AMM pool; XRP values stay in drops"""
+    currency: str
+    issuer: Optional[str]
+    value: Decimal
+    
+    @classmethod
+    def parse(cls, amount: Union[str, Dict[str, Any]]) -> "PoolAmount":
+        """Parse an XRPL amount: a drops string or an issued-currency object"""
+        if isinstance(amount, str):
+            return cls("XRP", None, Decimal(amount))
+        return cls(amount.get("currency"), amount.get("issuer"), Decimal(amount.get("value", 0)))
 
 
 class AMMStateTracker:
@@ -21,27 +49,95 @@ class AMMStateTracker:
         self.storage = storage
         self.amm_states: Dict[str, Dict[str, Any]] = {}
         self.client: Optional[AsyncWebsocketClient] = None
+        # Recent AMMInfo results, so a snapshot cycle fetches each pool once
+        self._info_cache = TTLCache(maxsize=1024, ttl=AMM_INFO_TTL)
+        # Last known AMMInfo fields per pool, patched from transaction metadata
+        self._pool_info: Dict[str, Dict[str, Any]] = {}
+        # AMMInfo requests on the wire, so concurrent callers share one response
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._info_requests: Dict[str, GenericRequest] = {}
         
     async def set_client(self, client: AsyncWebsocketClient):
         """Set the XRPL client"""
         self.client = client
         
+    def invalidate(self, amm_address: str):
+        """Drop the cached AMMInfo for ``amm_address``"""
+        self._info_cache.pop(amm_address, None)
+        
     async def get_amm_info(self, amm_address: str) -> Optional[Dict[str, Any]]:
-        """Get current AMM state from XRPL"""
+        """Get current AMM state from XRPL, reusing a response from the last few seconds"""
+        cached = self._info_cache.get(amm_address)
+        if cached is not None:
+            return cached
+            
+        pending = self._inflight.get(amm_address)
+        if pending is not None:
+            return await asyncio.shield(pending)
+            
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[amm_address] = future
+        try:
+            info = await self._request_amm_info(amm_address)
+            future.set_result(info)
+            return info
+        finally:
+            del self._inflight[amm_address]
+            if not future.done():
+                future.set_result(None)  # Cancelled; waiters fall back to no data
+                
+    def _amm_info_request(self, amm_address: str) -> GenericRequest:
+        """Build the amm_info request for a pool once and reuse it
+        
+        xrpl-py's AMMInfo model has no ledger_index, so the request is sent as
+        a GenericRequest pinned to the validated ledger.
+        """
+        request = self._info_requests.get(amm_address)
+        if request is None:
+            request = GenericRequest(
+                method="amm_info",
+                amm_account=amm_address,
+                ledger_index="validated"
+            )
+            self._info_requests[amm_address] = request
+        return request
+        
+    @staticmethod
+    def _pool_fields(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Map an amm_info result onto the AMM ledger entry field names used here"""
+        amm = result.get("amm", {})
+        
+        def issue(amount):
+            if isinstance(amount, str):
+                return {"currency": "XRP"}
+            return {"currency": amount.get("currency"), "issuer": amount.get("issuer")}
+            
+        return {
+            "Account": amm.get("account"),
+            "Amount": amm.get("amount"),
+            "Amount2": amm.get("amount2"),
+            "Asset": issue(amm.get("amount", {})),
+            "Asset2": issue(amm.get("amount2", {})),
+            "LPTokenBalance": amm.get("lp_token", {}),
+            "TradingFee": amm.get("trading_fee", 0),
+            "ledger_index": result.get("ledger_index")
+        }
+        
+    async def _request_amm_info(self, amm_address: str) -> Optional[Dict[str, Any]]:
+        """Send one AMMInfo request and cache the result"""
         if not self.client or not self.client.is_open():
             logger.error("Client not connected")
             return None
             
         try:
             # Get AMM info
-            amm_info = AMMInfo(
-                amm_account=amm_address,
-                ledger_index="validated"
-            )
-            response = await self.client.request(amm_info)
+            response = await self.client.request(self._amm_info_request(amm_address))
             
             if response.is_successful():
-                return response.result.get("amm", {})
+                info = self._pool_fields(response.result)
+                self._info_cache[amm_address] = info
+                self._pool_info[amm_address] = info
+                return info
             else:
                 logger.error(f"Failed to get AMM info: {response.result}")
                 return None
@@ -50,21 +146,115 @@ class AMMStateTracker:
             logger.error(f"Error getting AMM info for {amm_address}: {e}")
             return None
             
-    async def process_amm_transaction(self, tx_data: Dict[str, Any], amm_address: str):
-        """Process transaction that affects AMM state"""
+    @staticmethod
+    def _affected_fields(tx_data: Dict[str, Any]):
+        """Yield ``(LedgerEntryType, fields)`` for nodes created or modified by a transaction"""
+        meta = tx_data.get("meta")
+        if not isinstance(meta, dict):
+            return
+            
+        for affected in meta.get("AffectedNodes", []):
+            node = affected.get("ModifiedNode") or affected.get("CreatedNode")
+            if node:
+                yield node.get("LedgerEntryType"), node.get("FinalFields") or node.get("NewFields") or {}
+                
+    def touched_accounts(self, tx_data: Dict[str, Any]) -> Set[str]:
+        """Accounts whose root, AMM entry or trust lines a transaction modified"""
+        accounts = set()
+        for entry_type, fields in self._affected_fields(tx_data):
+            if entry_type in ("AccountRoot", "AMM"):
+                accounts.add(fields.get("Account"))
+            elif entry_type == "RippleState":
+                accounts.add(fields.get("HighLimit", {}).get("issuer"))
+                accounts.add(fields.get("LowLimit", {}).get("issuer"))
+        accounts.discard(None)
+        return accounts
+        
+    def amm_info_from_meta(self, tx_data: Dict[str, Any], amm_address: str) -> Optional[Dict[str, Any]]:
+        """Rebuild a pool's AMMInfo fields from transaction metadata
+        
+        Reserves live on the AMM account itself: the XRP side in its
+        AccountRoot balance and token sides in its trust lines. Sides the
+        transaction did not touch are carried over from the last known state.
+        Returns None if the pool was not touched or cannot be fully resolved.
+        """
+        info = dict(self._pool_info.get(amm_address, {}))
+        balances = {}
+        touched = False
+        
+        for entry_type, fields in self._affected_fields(tx_data):
+            if entry_type == "AMM" and fields.get("Account") == amm_address:
+                for key in ("Asset", "Asset2", "LPTokenBalance", "TradingFee"):
+                    if key in fields:
+                        info[key] = fields[key]
+                touched = True
+            elif entry_type == "AccountRoot" and fields.get("Account") == amm_address:
+                balances["XRP"] = fields.get("Balance")
+            elif entry_type == "RippleState":
+                balance = fields.get("Balance", {})
+                low = fields.get("LowLimit", {}).get("issuer")
+                high = fields.get("HighLimit", {}).get("issuer")
+                # Balance is held from the low account's side
+                if low == amm_address:
+                    balances[(balance.get("currency"), high)] = str(Decimal(balance.get("value", 0)))
+                elif high == amm_address:
+                    balances[(balance.get("currency"), low)] = str(-Decimal(balance.get("value", 0)))
+                    
+        for asset_key, amount_key in (("Asset", "Amount"), ("Asset2", "Amount2")):
+            asset = info.get(asset_key)
+            if not asset:
+                continue
+            if asset.get("currency") == "XRP":
+                value = balances.get("XRP")
+                if value is not None:
+                    info[amount_key] = value
+                    touched = True
+            else:
+                value = balances.get((asset.get("currency"), asset.get("issuer")))
+                if value is not None:
+                    info[amount_key] = {**asset, "value": value}
+                    touched = True
+                    
+        if not touched:
+            return None
+        if not info.get("Amount") or not info.get("Amount2"):
+            return None
+        return info
+        
+    async def process_amm_transaction(
+        self,
+        tx_data: Dict[str, Any],
+        amm_address: str,
+        amm_info: Optional[Dict[str, Any]] = None
+    ):
+        """Process transaction that affects AMM state
+        
+        ``amm_info`` may carry an AMMInfo result the caller already fetched.
+        Otherwise pool state is read from the transaction metadata, and
+        AMMInfo is only requested when the metadata cannot resolve it.
+        """
         try:
             tx = tx_data.get("transaction", tx_data)
             tx_type = tx.get("TransactionType")
             
-            # Check if this is an AMM-related transaction
-            if tx_type not in ["AMMDeposit", "AMMWithdraw", "AMMCreate", "AMMBid", "AMMVote"]:
-                # Could also be a Payment or OfferCreate that affects the pool
-                # Check if the account is the AMM
-                if tx.get("Account") != amm_address and tx.get("Destination") != amm_address:
-                    return
-                    
-            # Get current AMM state
-            amm_info = await self.get_amm_info(amm_address)
+            if amm_info is None and tx_type != "PeriodicSnapshot":
+                # Payments routed through the pool also show up here
+                amm_info = self.amm_info_from_meta(tx_data, amm_address)
+                
+            if amm_info is None:
+                # Check if this is an AMM-related transaction
+                if tx_type not in ["AMMDeposit", "AMMWithdraw", "AMMCreate", "AMMBid", "AMMVote", "PeriodicSnapshot"]:
+                    # Could also be a Payment or OfferCreate that affects the pool
+                    # Check if the account is the AMM
+                    if tx.get("Account") != amm_address and tx.get("Destination") != amm_address:
+                        return
+                        
+                if tx_type != "PeriodicSnapshot":
+                    # The pool changed in this transaction, so a cached read is stale
+                    self.invalidate(amm_address)
+                
+                # Get current AMM state
+                amm_info = await self.get_amm_info(amm_address)
             if not amm_info:
                 return
                 
@@ -79,36 +269,41 @@ class AMMStateTracker:
                 return
                 
             # Parse amounts
-            asset1_amount = Decimal(amount) if isinstance(amount, str) else Decimal(amount.get("value", 0))
-            asset1_currency = "XRP" if isinstance(amount, str) else amount.get("currency")
-            asset1_issuer = None if isinstance(amount, str) else amount.get("issuer")
+            asset1 = PoolAmount.parse(amount)
+            asset2 = PoolAmount.parse(amount2)
             
-            asset2_amount = Decimal(amount2) if isinstance(amount2, str) else Decimal(amount2.get("value", 0))
-            asset2_currency = "XRP" if isinstance(amount2, str) else amount2.get("currency")
-            asset2_issuer = None if isinstance(amount2, str) else amount2.get("issuer")
-            
-            # Calculate metrics
-            k_constant = asset1_amount * asset2_amount
-            price = asset2_amount / asset1_amount if asset1_amount > 0 else 0
+            # Calculate metrics; k and price are analytics, so float is enough
+            asset1_float = float(asset1.value)
+            asset2_float = float(asset2.value)
+            k_constant = asset1_float * asset2_float
+            price = asset2_float / asset1_float if asset1_float > 0 else 0.0
             
             # Estimate TVL in XRP
-            if asset1_currency == "XRP":
-                tvl_xrp = asset1_amount * 2  # Double the XRP amount
+            if asset1.currency == "XRP":
+                tvl_xrp = asset1.value * 2  # Double the XRP amount
             else:
                 # For non-XRP pairs, we'd need external price data
                 tvl_xrp = 0
                 
+            # Ripple time is seconds since RIPPLE_EPOCH; synthetic snapshots
+            # carry no date and are stamped with the current time
+            ripple_time = tx.get("date")
+            now = time.time()
+            timestamp = datetime.fromtimestamp(
+                RIPPLE_EPOCH + ripple_time if ripple_time else now, tz=timezone.utc
+            )
+            
             # Create snapshot
             snapshot_data = {
-                "timestamp": ripple_time_to_datetime(tx.get("date", 0)),
+                "timestamp": timestamp,
                 "ledger_index": tx_data.get("ledger_index", tx.get("ledger_index")),
                 "amm_address": amm_address,
-                "asset1_currency": asset1_currency,
-                "asset1_issuer": asset1_issuer,
-                "asset1_amount": asset1_amount,
-                "asset2_currency": asset2_currency,
-                "asset2_issuer": asset2_issuer,
-                "asset2_amount": asset2_amount,
+                "asset1_currency": asset1.currency,
+                "asset1_issuer": asset1.issuer,
+                "asset1_amount": asset1.value,
+                "asset2_currency": asset2.currency,
+                "asset2_issuer": asset2.issuer,
+                "asset2_amount": asset2.value,
                 "lp_token_currency": lp_token.get("currency", ""),
                 "lp_token_supply": Decimal(lp_token.get("value", 0)),
                 "trading_fee": trading_fee,
@@ -119,66 +314,111 @@ class AMMStateTracker:
             
             # Store snapshot
             await self.storage.store_amm_snapshot(snapshot_data)
+            self.invalidate(amm_address)
+            self._pool_info[amm_address] = amm_info
             
-            # Update cached state
+            # Update cached state; only real transactions refresh the stream clock
+            previous = self.amm_states.get(amm_address, {})
             self.amm_states[amm_address] = {
-                "asset1_amount": asset1_amount,
-                "asset2_amount": asset2_amount,
-                "last_updated": datetime.utcnow(),
-                "ledger_index": snapshot_data["ledger_index"]
+                "asset1_amount": asset1.value,
+                "asset2_amount": asset2.value,
+                "last_updated": datetime.fromtimestamp(now, timezone.utc),
+                "ledger_index": snapshot_data["ledger_index"],
+                "last_stream_ts": (
+                    previous.get("last_stream_ts") if tx_type == "PeriodicSnapshot"
+                    else time.monotonic()
+                )
             }
             
-            logger.info(f"Updated AMM state for {amm_address}: {asset1_currency} {asset1_amount} / {asset2_currency} {asset2_amount}")
+            logger.info(f"Updated AMM state for {amm_address}: {asset1.currency} {asset1.value} / {asset2.currency} {asset2.value}")
             
         except Exception as e:
             logger.error(f"Error processing AMM transaction: {e}")
             
+    def _stream_is_fresh(self, amm_address: str) -> bool:
+        """Whether a stream transaction updated this pool within ``STREAM_FRESHNESS``"""
+        last_stream_ts = self.amm_states.get(amm_address, {}).get("last_stream_ts")
+        return last_stream_ts is not None and time.monotonic() - last_stream_ts < STREAM_FRESHNESS
+        
+    def _has_significant_change(
+        self,
+        amm_address: str,
+        amm_info: Dict[str, Any],
+        threshold: float = 0.01
+    ) -> bool:
+        """Compare a fetched AMMInfo result against the cached pool state"""
+        if amm_address not in self.amm_states:
+            return True  # First time seeing this AMM
+            
+        current_amount = PoolAmount.parse(amm_info.get("Amount")).value
+        cached_amount = self.amm_states[amm_address]["asset1_amount"]
+        
+        # Calculate percentage change
+        if cached_amount > 0:
+            change = abs(current_amount - cached_amount) / cached_amount
+            return change >= threshold
+        else:
+            return True
+            
     async def check_significant_change(self, amm_address: str, threshold: float = 0.01) -> bool:
         """Check if AMM state changed significantly (default 1%)"""
         if amm_address not in self.amm_states:
             return True  # First time seeing this AMM
+        if self._stream_is_fresh(amm_address):
+            return False  # The transaction stream already captured the change
             
         try:
             current_info = await self.get_amm_info(amm_address)
             if not current_info:
                 return False
                 
-            amount = current_info.get("Amount")
-            if isinstance(amount, str):
-                current_amount = Decimal(amount)
-            else:
-                current_amount = Decimal(amount.get("value", 0))
-                
-            cached_amount = self.amm_states[amm_address]["asset1_amount"]
-            
-            # Calculate percentage change
-            if cached_amount > 0:
-                change = abs(current_amount - cached_amount) / cached_amount
-                return change >= threshold
-            else:
-                return True
+            return self._has_significant_change(amm_address, current_info, threshold)
                 
         except Exception as e:
             logger.error(f"Error checking AMM change: {e}")
             return False
             
     async def periodic_snapshot(self, amm_addresses: list):
-        """Take periodic snapshots of all AMMs"""
-        for amm_address in amm_addresses:
+        """Drift check for pools the transaction stream has not updated
+        
+        Stream transactions keep pool state current from their metadata, so
+        pools updated within ``STREAM_FRESHNESS`` are skipped. Quiet pools
+        are fetched concurrently over the shared websocket, then each is
+        compared against the cached state without another request.
+        """
+        amm_addresses = [
+            amm_address for amm_address in amm_addresses
+            if not self._stream_is_fresh(amm_address)
+        ]
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        
+        async def fetch(amm_address: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                return await self.get_amm_info(amm_address)
+        
+        infos = await asyncio.gather(
+            *(fetch(amm_address) for amm_address in amm_addresses),
+            return_exceptions=True
+        )
+        
+        for amm_address, amm_info in zip(amm_addresses, infos):
             try:
+                if isinstance(amm_info, Exception):
+                    raise amm_info
+                if not amm_info:
+                    continue
+                    
                 # Check if there's been a significant change
-                if await self.check_significant_change(amm_address):
-                    amm_info = await self.get_amm_info(amm_address)
-                    if amm_info:
-                        # Create a dummy transaction data for snapshot
-                        tx_data = {
-                            "transaction": {
-                                "TransactionType": "PeriodicSnapshot",
-                                "date": 0  # Will use current time
-                            },
-                            "ledger_index": amm_info.get("ledger_index")
-                        }
-                        await self.process_amm_transaction(tx_data, amm_address)
+                if self._has_significant_change(amm_address, amm_info):
+                    # Create a dummy transaction data for snapshot
+                    tx_data = {
+                        "transaction": {
+                            "TransactionType": "PeriodicSnapshot",
+                            "date": 0  # Will use current time
+                        },
+                        "ledger_index": amm_info.get("ledger_index")
+                    }
+                    await self.process_amm_transaction(tx_data, amm_address, amm_info=amm_info)
                         
             except Exception as e:
-                logger.error(f"Error taking periodic snapshot for {amm_address}: {e}")
\ No newline at end of file
+                logger.error(f"Error taking periodic snapshot for {amm_address}: {e}")
@@ -9,11 +9,15 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from loguru import logger
 
+from ..config.settings import load_tokens
 from ..database.storage import DataStorage
 from ..data.full_history_collector import FullHistoryCollector
 from .realtime_collector import RealtimeCollector
 
 
+# Accounts backfilled at once over the shared backfill connection
+BACKFILL_CONCURRENCY = 5
+
 class CollectionManager:
     """Manages real-time collection with automatic backfill"""
     
@@ -30,13 +34,13 @@ class CollectionManager:
         gaps = {}
         
         try:
-            await self.backfill_collector.connect()
             current_ledger = await self.realtime_collector.get_current_ledger()
             
+            # Get last collected data from database in one query
+            logs = await self.storage.get_collection_logs_bulk("realtime", accounts)
+            
             for account in accounts:
-                # Get last collected data from database
-                log = await self.storage.get_collection_log("realtime", account)
-                
+                log = logs.get(account)
                 if log:
                     last_ledger = log.get("last_processed_ledger", 0)
                     gap_size = current_ledger - last_ledger
@@ -59,8 +63,6 @@ class CollectionManager:
                     
         except Exception as e:
             logger.error(f"Error checking gaps: {e}")
-        finally:
-            await self.backfill_collector.disconnect()
             
         return gaps
         
@@ -76,44 +78,58 @@ class CollectionManager:
             
         logger.warning(f"Found gaps in {len(gaps)} accounts")
         
-        for account, gap_info in gaps.items():
-            if gap_info["estimated_time"] == float('inf'):
-                logger.info(f"Account {account} needs initial backfill (max {max_days} days)")
-                days_to_collect = max_days
-            else:
-                logger.info(f"Account {account} is {gap_info['gap_size']} ledgers behind "
-                          f"(~{gap_info['estimated_time']:.1f} minutes)")
-                days_to_collect = min(max_days, gap_info['estimated_time'] / (60 * 24))
-                
-            try:
-                await self.backfill_collector.connect()
+        semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+        
+        async def backfill(account: str, gap_info: Dict):
+            async with semaphore:
+                await self._backfill_one(account, gap_info, max_days)
+                # Small delay before the slot goes to the next account
+                await asyncio.sleep(2)
+        
+        # The backfill connection stays open across runs and closes in stop()
+        await self._ensure_backfill_connected()
+        await asyncio.gather(*(
+            backfill(account, gap_info) for account, gap_info in gaps.items()
+        ))
+        
+    async def _ensure_backfill_connected(self):
+        """Open the backfill connection unless it is already open"""
+        client = getattr(self.backfill_collector, "client", None)
+        if not client or not client.is_open():
+            await self.backfill_collector.connect()
+            
+    async def _backfill_one(self, account: str, gap_info: Dict, max_days: int):
+        """Backfill a single account over the already connected backfill collector"""
+        if gap_info["estimated_time"] == float('inf'):
+            logger.info(f"Account {account} needs initial backfill (max {max_days} days)")
+            days_to_collect = max_days
+        else:
+            logger.info(f"Account {account} is {gap_info['gap_size']} ledgers behind "
+                      f"(~{gap_info['estimated_time']:.1f} minutes)")
+            days_to_collect = min(max_days, gap_info['estimated_time'] / (60 * 24))
+            
+        try:
+            # Perform backfill
+            stats = await self.backfill_collector.collect_amm_full_history(
+                amm_addresses=[account],
+                days_back=int(days_to_collect)
+            )
+            
+            if stats['total_transactions'] > 0:
+                logger.success(f"Backfilled {stats['total_transactions']} transactions for {account}")
                 
-                # Perform backfill
-                stats = await self.backfill_collector.collect_amm_full_history(
-                    amm_addresses=[account],
-                    days_back=int(days_to_collect)
+                # Update collection log
+                await self.storage.update_collection_progress(
+                    "realtime",
+                    account,
+                    gap_info["current_ledger"],
+                    records_added=stats['total_transactions']
                 )
+            else:
+                logger.warning(f"No transactions found for {account} in backfill period")
                 
-                if stats['total_transactions'] > 0:
-                    logger.success(f"Backfilled {stats['total_transactions']} transactions for {account}")
-                    
-                    # Update collection log
-                    await self.storage.update_collection_progress(
-                        "realtime",
-                        account,
-                        gap_info["current_ledger"],
-                        stats['total_transactions']
-                    )
-                else:
-                    logger.warning(f"No transactions found for {account} in backfill period")
-                    
-            except Exception as e:
-                logger.error(f"Error backfilling {account}: {e}")
-            finally:
-                await self.backfill_collector.disconnect()
-                
-            # Small delay between accounts
-            await asyncio.sleep(2)
+        except Exception as e:
+            logger.error(f"Error backfilling {account}: {e}")
             
     async def run_periodic_backfill(self, accounts: List[str], interval_hours: int = 1):
         """Run backfill checks periodically"""
@@ -196,6 +212,10 @@ class CollectionManager:
         
         # Stop collectors
         await self.realtime_collector.stop()
+        try:
+            await self.backfill_collector.disconnect()
+        except Exception as e:
+            logger.error(f"Error closing backfill connection: {e}")
         
         # Cancel tasks
         if self.realtime_task and not self.realtime_task.done():
@@ -225,13 +245,8 @@ class CollectionManager:
 
 async def main():
     """Main entry point"""
-    import json
-    from pathlib import Path
-    
-    # Load tokens
-    tokens_file = Path("src/config/tokens.json")
-    with open(tokens_file) as f:
-        tokens = json.load(f)
+    # Load tokens off the event loop
+    tokens = await asyncio.get_running_loop().run_in_executor(None, load_tokens)
         
     # Get AMM addresses
     amm_addresses = [token_info["amm_address"] for token_info in tokens.values()]
@@ -3,10 +3,10 @@ Real-time XRPL transaction collector with automatic backfill
 """
 
 import asyncio
-import json
-from datetime import datetime, timedelta
-from pathlib import Path
-from typing import Dict, List, Any, Optional, Set
+import time
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Set, Tuple
+from aiolimiter import AsyncLimiter
 from loguru import logger
 
 from xrpl.asyncio.clients import AsyncWebsocketClient
@@ -16,10 +16,26 @@ from xrpl.utils import ripple_time_to_datetime
 from ..database.storage import DataStorage
 from ..database.models import DataCollectionLog
 from ..data.metadata_processor import MetadataProcessor
-from ..config.settings import get_settings
+from ..config.settings import get_settings, load_tokens
 from .amm_state_tracker import AMMStateTracker
 
 
+# Seconds the validated ledger index is reused, just under one ledger close
+LEDGER_CACHE_TTL = 3.5
+
+# (tx hash, account) pairs remembered to drop stream/backfill duplicates
+RECENT_TX_LIMIT = 50_000
+
+# Gap backfill: ledgers per AccountTx range, page size (the server maximum)
+# and ranges fetched at once
+BACKFILL_CHUNK_LEDGERS = 1000
+BACKFILL_PAGE_LIMIT = 400
+BACKFILL_CONCURRENCY = 3
+# AccountTx pages per second across all accounts' backfills
+BACKFILL_REQUESTS_PER_SECOND = 10
+# AMM updates waiting for the tracker; the oldest is dropped when full
+AMM_QUEUE_SIZE = 10_000
+
 class RealtimeCollector:
     """Collects real-time transactions with automatic backfill"""
     
@@ -32,8 +48,26 @@ class RealtimeCollector:
         self.monitored_accounts: Set[str] = set()
         self.is_running = False
         self.last_processed_ledger: Dict[str, int] = {}
+        # Records stored per account since the last save_state flush
+        self.pending_records: Dict[str, int] = {}
         self.reconnect_attempts = 0
         self.max_reconnect_attempts = 10
+        # (ledger_index, monotonic time it was seen), fed by ServerInfo and ledgerClosed
+        self._ledger_cache: Optional[Tuple[int, float]] = None
+        # Set on connect; gaps are checked against the next ledgerClosed
+        self._gap_check_pending = False
+        # Per connection: a fresh socket carries no subscriptions
+        self._subscribed = False
+        self._ledger_stream = False
+        # Watermarks as of (re)subscribing, before the live stream moves them;
+        # gap backfills start from here
+        self._resume_from: Dict[str, int] = {}
+        self._backfill_tasks: Dict[str, asyncio.Task] = {}
+        # Token bucket shared by backfills so bursts pass but the node is not flooded
+        self._backfill_limiter = AsyncLimiter(BACKFILL_REQUESTS_PER_SECOND, 1)
+        self._recent_txs: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self._amm_queue: asyncio.Queue = asyncio.Queue(maxsize=AMM_QUEUE_SIZE)
+        self._amm_worker_task: Optional[asyncio.Task] = None
         
     async def connect(self) -> bool:
         """Connect to XRPL websocket"""
@@ -42,6 +76,9 @@ class RealtimeCollector:
             await self.client.open()
             logger.info(f"Connected to XRPL at {self.settings.xrpl_wss_url}")
             self.reconnect_attempts = 0
+            self._gap_check_pending = True
+            self._subscribed = False
+            self._ledger_stream = False
             
             # Set client for AMM state tracker
             await self.amm_state_tracker.set_client(self.client)
@@ -61,13 +98,18 @@ class RealtimeCollector:
                 logger.error(f"Error during disconnect: {e}")
                 
     async def get_current_ledger(self) -> int:
-        """Get current validated ledger"""
+        """Get current validated ledger, reusing one seen within ``LEDGER_CACHE_TTL``"""
+        if self._ledger_cache and time.monotonic() - self._ledger_cache[1] < LEDGER_CACHE_TTL:
+            return self._ledger_cache[0]
+            
         if not self.client or not self.client.is_open():
             raise Exception("Not connected to XRPL")
             
         response = await self.client.request(ServerInfo())
         if response.is_successful():
-            return response.result['info']['validated_ledger']['seq']
+            ledger_index = response.result['info']['validated_ledger']['seq']
+            self._ledger_cache = (ledger_index, time.monotonic())
+            return ledger_index
         raise Exception(f"Failed to get current ledger: {response.result}")
         
     async def subscribe_to_accounts(self, accounts: List[str]):
@@ -75,86 +117,173 @@ class RealtimeCollector:
         if not self.client or not self.client.is_open():
             raise Exception("Not connected to XRPL")
             
-        # Subscribe to transactions for these accounts
+        # Subscribe to transactions for these accounts, plus the ledger
+        # stream for sync unless this connection already carries it
         request = Subscribe(
             accounts=accounts,
-            streams=["ledger"]  # Also subscribe to ledger stream for sync
+            streams=None if self._ledger_stream else ["ledger"]
         )
         
         response = await self.client.request(request)
         if response.is_successful():
+            self._ledger_stream = True
             self.monitored_accounts.update(accounts)
             logger.info(f"Subscribed to {len(accounts)} accounts")
             
-            # Initialize last processed ledger for each account
+            # The ledger stream subscription reports the current validated
+            # ledger, so seed the cache instead of asking the server again
+            if response.result.get("ledger_index"):
+                self._ledger_cache = (response.result["ledger_index"], time.monotonic())
             current_ledger = await self.get_current_ledger()
-            for account in accounts:
-                if account not in self.last_processed_ledger:
-                    # Check database for last processed ledger
-                    log = await self.storage.get_collection_log("realtime", account)
-                    if log and log.get("last_processed_ledger"):
-                        self.last_processed_ledger[account] = log["last_processed_ledger"]
-                    else:
-                        self.last_processed_ledger[account] = current_ledger
-                        
+            
+            # Resume each new account from its stored watermark (one query)
+            new_accounts = [account for account in accounts if account not in self.last_processed_ledger]
+            logs = await self.storage.get_collection_logs_bulk("realtime", new_accounts)
+            self.last_processed_ledger.update({
+                account: (logs.get(account) or {}).get("last_processed_ledger") or current_ledger
+                for account in new_accounts
+            })
+                    
             return True
         else:
             logger.error(f"Failed to subscribe: {response.result}")
             return False
             
-    async def process_transaction(self, tx_data: Dict[str, Any], account: str):
-        """Process a single transaction"""
+    async def update_subscriptions(self, accounts: List[str]) -> bool:
+        """Subscribe and unsubscribe only the accounts that changed"""
+        if not self.client or not self.client.is_open():
+            raise Exception("Not connected to XRPL")
+            
+        wanted = set(accounts)
+        to_add = wanted - self.monitored_accounts
+        to_remove = self.monitored_accounts - wanted
+        
+        if to_remove:
+            response = await self.client.request(Unsubscribe(accounts=list(to_remove)))
+            if not response.is_successful():
+                logger.error(f"Failed to unsubscribe: {response.result}")
+                return False
+                
+            self.monitored_accounts -= to_remove
+            for account in to_remove:
+                task = self._backfill_tasks.pop(account, None)
+                if task:
+                    task.cancel()
+            logger.info(f"Unsubscribed from {len(to_remove)} accounts")
+            
+        if to_add:
+            return await self.subscribe_to_accounts(list(to_add))
+            
+        return True
+        
+    async def process_transaction(self, tx_data: Dict[str, Any], account: str, backfill: bool = False):
+        """Process a single transaction
+        
+        Backfilled transactions can sit below a watermark the live stream has
+        already advanced, so they rely on the duplicate check alone; rows
+        replayed after a restart are skipped by token_transactions' unique key.
+        """
         try:
             # Extract transaction details
-            tx = tx_data.get("transaction", tx_data)
-            ledger_index = tx_data.get("ledger_index", tx.get("ledger_index"))
+            tx = tx_data.get("transaction") or tx_data
+            ledger_index = tx_data.get("ledger_index") or tx.get("ledger_index")
+            last_seen = self.last_processed_ledger.get(account, 0)
             
-            # Skip if we've already processed this ledger for this account
-            if ledger_index and ledger_index <= self.last_processed_ledger.get(account, 0):
+            # Skip ledgers before the watermark; the watermark ledger itself can
+            # hold more transactions for the account, left to the hash check
+            if not backfill and ledger_index and ledger_index < last_seen:
                 return
                 
+            # Transactions at the backfill/stream seam arrive twice
+            seen_key = (tx.get("hash"), account)
+            if seen_key in self._recent_txs:
+                return
+            self._recent_txs[seen_key] = None
+            if len(self._recent_txs) > RECENT_TX_LIMIT:
+                self._recent_txs.popitem(last=False)
+                
             # Extract token transfers
             transfers = self.metadata_processor.extract_token_transfers(tx_data)
             
-            stored_count = 0
-            for transfer in transfers:
-                transfer_data = {
-                    "transaction_hash": tx.get("hash"),
-                    "ledger_index": ledger_index,
-                    "timestamp": ripple_time_to_datetime(tx.get("date", 0)),
-                    "wallet_address": account,
-                    "currency": transfer["currency"],
-                    "issuer": transfer.get("issuer"),
-                    "amount": transfer["amount"],
-                    "is_receive": transfer["is_receive"],
-                    "counterparty": transfer.get("counterparty"),
-                    "transaction_type": tx.get("TransactionType", "").lower()
-                }
+            if transfers:
+                # Fields shared by every transfer in the transaction
+                tx_hash = tx.get("hash")
+                timestamp = ripple_time_to_datetime(tx.get("date", 0))
+                tx_type = tx.get("TransactionType", "").lower()
                 
-                await self.storage.store_token_transaction(transfer_data)
-                stored_count += 1
-                
-            if stored_count > 0:
-                logger.debug(f"Stored {stored_count} transfers from tx {tx.get('hash')[:8]}...")
+                for transfer in transfers:
+                    await self.storage.store_token_transaction({
+                        "transaction_hash": tx_hash,
+                        "ledger_index": ledger_index,
+                        "timestamp": timestamp,
+                        "wallet_address": account,
+                        "currency": transfer["currency"],
+                        "issuer": transfer.get("issuer"),
+                        "amount": transfer["amount"],
+                        "is_receive": transfer["is_receive"],
+                        "counterparty": transfer.get("counterparty"),
+                        "transaction_type": tx_type
+                    })
+                    
+                self.pending_records[account] = self.pending_records.get(account, 0) + len(transfers)
+                # Lazy so the message is only built when debug logging is on
+                logger.opt(lazy=True).debug(
+                    "Stored {} transfers from tx {}...",
+                    lambda: len(transfers),
+                    lambda: (tx_hash or "")[:8]
+                )
                 
-            # Check for AMM state changes
-            await self.amm_state_tracker.process_amm_transaction(tx_data, account)
+            # Check for AMM state changes without holding up transfer ingestion
+            self._enqueue_amm_update(tx_data, account)
                 
-            # Update last processed ledger
+            # Update last processed ledger; re-read it, since a backfill may
+            # have advanced it while this transaction was being stored
             if ledger_index:
                 self.last_processed_ledger[account] = max(
-                    self.last_processed_ledger.get(account, 0),
-                    ledger_index
+                    self.last_processed_ledger.get(account, 0), ledger_index
                 )
                 
         except Exception as e:
             logger.error(f"Error processing transaction: {e}")
             
-    async def check_and_backfill(self, account: str):
-        """Check for gaps and backfill if needed"""
+    def _enqueue_amm_update(self, tx_data: Dict[str, Any], account: str):
+        """Hand a transaction to the AMM worker, dropping the oldest if backed up"""
         try:
-            current_ledger = await self.get_current_ledger()
-            last_processed = self.last_processed_ledger.get(account, current_ledger)
+            self._amm_queue.put_nowait((tx_data, account))
+        except asyncio.QueueFull:
+            self._amm_queue.get_nowait()
+            self._amm_queue.task_done()
+            self._amm_queue.put_nowait((tx_data, account))
+            logger.warning("AMM update queue full, dropped oldest update")
+            
+    async def _amm_worker(self):
+        """Feed queued transactions to the AMM state tracker in arrival order"""
+        while True:
+            tx_data, account = await self._amm_queue.get()
+            try:
+                await self.amm_state_tracker.process_amm_transaction(tx_data, account)
+            except Exception as e:
+                logger.error(f"Error tracking AMM state: {e}")
+            finally:
+                self._amm_queue.task_done()
+                
+    async def check_and_backfill(
+        self,
+        account: str,
+        from_ledger: Optional[int] = None,
+        to_ledger: Optional[int] = None
+    ):
+        """Check for gaps and backfill if needed
+        
+        ``from_ledger``/``to_ledger`` bound the gap explicitly; by default it
+        runs from the account's watermark to the current validated ledger.
+        """
+        try:
+            current_ledger = to_ledger if to_ledger is not None else await self.get_current_ledger()
+            last_processed = (
+                from_ledger if from_ledger is not None
+                else self.last_processed_ledger.get(account, current_ledger)
+            )
             
             # Check if we have a gap
             gap = current_ledger - last_processed
@@ -162,80 +291,116 @@ class RealtimeCollector:
             if gap > 100:  # More than ~6 minutes of data
                 logger.warning(f"Gap detected for {account}: {gap} ledgers behind")
                 
-                # Backfill in chunks
-                chunk_size = 1000
-                backfilled = 0
+                # Fetch fixed ledger ranges concurrently, then replay them in order
+                ranges = [
+                    (start, min(start + BACKFILL_CHUNK_LEDGERS - 1, current_ledger))
+                    for start in range(last_processed, current_ledger + 1, BACKFILL_CHUNK_LEDGERS)
+                ]
+                semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+                results = await asyncio.gather(
+                    *(self._fetch_account_txs(account, low, high, semaphore) for low, high in ranges),
+                    return_exceptions=True
+                )
                 
-                while last_processed < current_ledger - 10:  # Leave small buffer
-                    end_ledger = min(last_processed + chunk_size, current_ledger)
-                    
-                    logger.info(f"Backfilling {account} ledgers {last_processed} to {end_ledger}")
-                    
-                    # Fetch transactions for this range
-                    try:
-                        request = AccountTx(
-                            account=account,
-                            ledger_index_min=last_processed,
-                            ledger_index_max=end_ledger,
-                            limit=200
-                        )
-                        
-                        response = await self.client.request(request)
-                        
-                        if response.is_successful():
-                            transactions = response.result.get("transactions", [])
-                            
-                            for tx_wrapper in transactions:
-                                await self.process_transaction(tx_wrapper, account)
-                                backfilled += 1
-                                
-                            logger.info(f"Backfilled {len(transactions)} transactions")
-                        else:
-                            logger.error(f"Backfill failed: {response.result}")
-                            break
-                            
-                    except Exception as e:
-                        logger.error(f"Error during backfill: {e}")
+                backfilled = 0
+                for (low, high), transactions in zip(ranges, results):
+                    if isinstance(transactions, Exception):
+                        # Later ranges would leave a hole behind the watermark
+                        logger.error(f"Error during backfill of {account} ledgers {low} to {high}: {transactions}")
                         break
                         
-                    last_processed = end_ledger
-                    await asyncio.sleep(0.5)  # Rate limiting
+                    for tx_wrapper in transactions:
+                        await self.process_transaction(tx_wrapper, account, backfill=True)
+                    backfilled += len(transactions)
                     
                 if backfilled > 0:
+                    await self.storage.flush_all()
                     logger.info(f"Backfill complete: {backfilled} transactions")
                     
         except Exception as e:
             logger.error(f"Error checking backfill: {e}")
             
-    async def save_state(self):
-        """Save current state to database"""
-        for account, ledger in self.last_processed_ledger.items():
-            try:
-                log_data = {
-                    "collection_type": "realtime",
-                    "target": account,
-                    "last_processed_ledger": ledger,
-                    "last_run": datetime.utcnow(),
-                    "status": "active" if self.is_running else "stopped",
-                    "records_collected": 0  # Will be updated separately
-                }
+    async def _fetch_account_txs(
+        self,
+        account: str,
+        ledger_min: int,
+        ledger_max: int,
+        semaphore: asyncio.Semaphore
+    ) -> List[Dict[str, Any]]:
+        """Every transaction for ``account`` in a ledger range, oldest first"""
+        transactions = []
+        marker = None
+        
+        async with semaphore:
+            while True:
+                request = AccountTx(
+                    account=account,
+                    ledger_index_min=ledger_min,
+                    ledger_index_max=ledger_max,
+                    limit=BACKFILL_PAGE_LIMIT,
+                    forward=True,
+                    marker=marker
+                )
+                async with self._backfill_limiter:
+                    response = await self.client.request(request)
                 
-                # Check if log exists
-                existing = await self.storage.get_collection_log("realtime", account)
-                if existing:
-                    await self.storage.update_collection_progress(
-                        "realtime", account, ledger, 0
-                    )
-                else:
-                    await self.storage.create_collection_log(log_data)
+                if not response.is_successful():
+                    raise Exception(f"Backfill failed: {response.result}")
                     
-            except Exception as e:
-                logger.error(f"Error saving state for {account}: {e}")
+                transactions.extend(response.result.get("transactions", []))
+                marker = response.result.get("marker")
+                if not marker:
+                    return transactions
+                    
+    def _schedule_backfills(self, ledger_index: int):
+        """Start a backfill task for each monitored account more than 100 ledgers behind
+        
+        The gap runs from the watermark recorded at subscribe time, since
+        live transactions have advanced ``last_processed_ledger`` since then.
+        """
+        for account in self.monitored_accounts:
+            from_ledger = self._resume_from.get(account, ledger_index)
+            running = self._backfill_tasks.get(account)
+            if ledger_index - from_ledger > 100 and (running is None or running.done()):
+                self._backfill_tasks[account] = asyncio.create_task(
+                    self.check_and_backfill(account, from_ledger, ledger_index)
+                )
+                
+    async def save_state(self):
+        """Save current state to database"""
+        # Queued records must land before their counts are recorded
+        try:
+            await self.storage.flush_all()
+        except Exception as e:
+            logger.error(f"Error flushing queued records: {e}")
+            return
+        
+        progress = {
+            account: (ledger, self.pending_records.get(account, 0))
+            for account, ledger in self.last_processed_ledger.items()
+        }
+        
+        try:
+            await self.storage.bulk_upsert_collection_progress(
+                "realtime", progress, "active" if self.is_running else "stopped"
+            )
+        except Exception as e:
+            logger.error(f"Error saving state: {e}")
+            return
+            
+        # Keep anything counted while the write was in flight
+        for account, (_, records) in progress.items():
+            remaining = self.pending_records.get(account, 0) - records
+            if remaining > 0:
+                self.pending_records[account] = remaining
+            else:
+                self.pending_records.pop(account, None)
                 
     async def run(self, accounts: List[str]):
         """Main collection loop"""
         self.is_running = True
         logger.info(f"Starting real-time collection for {len(accounts)} accounts")
+        self._amm_worker_task = asyncio.create_task(self._amm_worker())
         
         while self.is_running:
             try:
@@ -245,22 +410,26 @@ class RealtimeCollector:
                         await asyncio.sleep(5)
                         continue
                         
-                # Subscribe to accounts
-                if not self.monitored_accounts:
-                    await self.subscribe_to_accounts(accounts)
-                    
-                # Check for backfill needs periodically
-                for account in accounts:
-                    await self.check_and_backfill(account)
+                # Subscribe on every (re)connect, keeping accounts added or
+                # removed through update_subscriptions
+                if not self._subscribed:
+                    if not await self.subscribe_to_accounts(list(self.monitored_accounts or accounts)):
+                        raise Exception("Subscription failed")
+                    self._subscribed = True
+                    self._resume_from = dict(self.last_processed_ledger)
                     
                 # Process incoming messages
                 message_count = 0
                 async for message in self.client:
                     try:
                         if message.get("type") == "transaction":
-                            # Process transaction
-                            account = message.get("account")
-                            if account in self.monitored_accounts:
+                            # Match the transaction to monitored accounts, including
+                            # AMM pools it only touched through its metadata
+                            tx = message.get("transaction", {})
+                            matched = {message.get("account"), tx.get("Account"), tx.get("Destination")}
+                            matched |= self.amm_state_tracker.touched_accounts(message)
+                            
+                            for account in matched & self.monitored_accounts:
                                 await self.process_transaction(message, account)
                                 message_count += 1
                                 
@@ -269,11 +438,24 @@ class RealtimeCollector:
                                     await self.save_state()
                                     
                         elif message.get("type") == "ledgerClosed":
+                            # The ledger stream reports each validated ledger for free
+                            self._ledger_cache = (message["ledger_index"], time.monotonic())
+                            
+                            # The first close after connecting shows how far each
+                            # account fell behind while the socket was down
+                            if self._gap_check_pending:
+                                self._gap_check_pending = False
+                                self._schedule_backfills(message["ledger_index"])
+                                
                             # New ledger closed, check for gaps
                             if message_count > 0:
                                 logger.debug(f"Processed {message_count} messages in ledger")
                                 message_count = 0
                                 
+                                # Write the ledger's queued transfers and snapshots
+                                # in one batch instead of waiting for a full queue
+                                await self.storage.flush_all()
+                                
                     except Exception as e:
                         logger.error(f"Error processing message: {e}")
                         
@@ -291,6 +473,7 @@ class RealtimeCollector:
                 await asyncio.sleep(wait_time)
                 
         # Final state save
+        self._amm_worker_task.cancel()
         await self.save_state()
         logger.info("Real-time collection stopped")
         
@@ -298,15 +481,15 @@ class RealtimeCollector:
         """Stop the collector"""
         logger.info("Stopping real-time collector...")
         self.is_running = False
+        for task in self._backfill_tasks.values():
+            task.cancel()
         await self.disconnect()
 
 
 async def main():
     """Run real-time collector"""
-    # Load configuration
-    tokens_file = Path("src/config/tokens.json")
-    with open(tokens_file) as f:
-        tokens = json.load(f)
+    # Load configuration off the event loop
+    tokens = await asyncio.get_running_loop().run_in_executor(None, load_tokens)
         
     # Get AMM addresses
     amm_addresses = [token_info["amm_address"] for token_info in tokens.values()]
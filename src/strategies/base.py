@@ -1,16 +1,33 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from collections import deque
+from itertools import islice
+from typing import Callable, Dict, Any, Optional, List
 from decimal import Decimal
 from datetime import datetime
 
 from src.config.constants import SIGNAL_BUY, SIGNAL_SELL, SIGNAL_HOLD
 
 
+REQUIRED_MARKET_FIELDS = frozenset(
+    ("timestamp", "best_bid", "best_ask", "mid_price", "spread_percentage")
+)
+
+# Market data with a wider spread (in percent) is not traded on
+MAX_SPREAD_PERCENTAGE = 10
+
+# Signals kept per strategy unless the "history_limit" parameter overrides it
+DEFAULT_HISTORY_LIMIT = 10_000
+
+
 class BaseStrategy(ABC):
     def __init__(self, name: str, parameters: Optional[Dict[str, Any]] = None):
         self.name = name
         self.parameters = parameters or {}
-        self._history: List[Dict[str, Any]] = []
+        # Bounded so a strategy running around the clock does not grow forever
+        history_limit = self.parameters.get("history_limit", DEFAULT_HISTORY_LIMIT)
+        self._history: deque = deque(maxlen=history_limit)
+        # Replaceable source of signal timestamps, e.g. simulated time in backtests
+        self.clock: Optional[Callable[[], datetime]] = None
         
     @abstractmethod
     async def analyze(self, market_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -26,7 +43,7 @@ class BaseStrategy(ABC):
         reason: Optional[str] = None
     ) -> Dict[str, Any]:
         signal = {
-            "timestamp": datetime.now(),
+            "timestamp": self.clock() if self.clock is not None else datetime.now(),
             "action": action,
             "confidence": confidence,
             "stop_loss": stop_loss,
@@ -68,18 +85,15 @@ class BaseStrategy(ABC):
     
     def get_signal_history(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         if limit:
-            return self._history[-limit:]
-        return self._history
+            return list(islice(reversed(self._history), limit))[::-1]
+        return list(self._history)
     
     def clear_history(self) -> None:
         self._history.clear()
     
     def validate_market_data(self, market_data: Dict[str, Any]) -> bool:
-        required_fields = ["timestamp", "best_bid", "best_ask", "mid_price"]
-        
-        for field in required_fields:
-            if field not in market_data:
-                return False
+        if not REQUIRED_MARKET_FIELDS.issubset(market_data):
+            return False
             
         # Check for valid prices
         if (
@@ -90,7 +104,7 @@ class BaseStrategy(ABC):
             return False
         
         # Check spread is reasonable
-        if market_data["spread_percentage"] > 10:  # More than 10% spread
+        if market_data["spread_percentage"] > MAX_SPREAD_PERCENTAGE:
             return False
         
-        return True
\ No newline at end of file
+        return True
@@ -7,6 +7,10 @@ from src.strategies.base import BaseStrategy
 from src.config.constants import SIGNAL_BUY, SIGNAL_SELL, SIGNAL_HOLD
 
 
+# Most confidence the trend (weight 0.3) and volume (0.2 * 0.2) terms can add
+MAX_TREND_VOLUME_CONFIDENCE = 0.3 + 0.2 * 0.2
+
+
 class SimpleMomentumStrategy(BaseStrategy):
     def __init__(self, parameters: Optional[Dict[str, Any]] = None):
         default_params = {
@@ -23,10 +27,23 @@ class SimpleMomentumStrategy(BaseStrategy):
             
         super().__init__("Simple Momentum", default_params)
         
-        # Price history for momentum calculation
+        # Price history for momentum calculation (floats; Decimal is only used
+        # for the stop loss and take profit handed to order sizing)
         self._price_history: deque = deque(maxlen=self.parameters["lookback_period"])
         self._volume_history: deque = deque(maxlen=self.parameters["lookback_period"])
         
+        # Direction (+1, -1 or 0) of each move inside the window, with running
+        # counts so trend strength does not rescan the history every tick
+        self._move_signs: deque = deque(maxlen=max(self.parameters["lookback_period"] - 1, 0))
+        self._positive_moves = 0
+        self._negative_moves = 0
+        
+        # Thresholds converted once instead of on every tick
+        self._momentum_threshold = float(self.parameters["momentum_threshold"])
+        self._min_confidence = float(self.parameters["min_confidence"])
+        self._stop_loss_pct = Decimal(str(self.parameters["stop_loss_pct"]))
+        self._take_profit_pct = Decimal(str(self.parameters["take_profit_pct"]))
+        
     async def analyze(self, market_data: Dict[str, Any]) -> Dict[str, Any]:
         # Validate market data
         if not self.validate_market_data(market_data):
@@ -34,8 +51,8 @@ class SimpleMomentumStrategy(BaseStrategy):
             return self.get_hold_signal("Invalid market data")
         
         # Update price history
-        current_price = market_data["mid_price"]
-        self._price_history.append(current_price)
+        current_price = float(market_data["mid_price"])
+        self._record_price(current_price)
         
         # Need enough history
         if len(self._price_history) < self.parameters["lookback_period"]:
@@ -44,6 +61,12 @@ class SimpleMomentumStrategy(BaseStrategy):
         # Calculate momentum
         momentum = self._calculate_momentum()
         
+        # Skip the trend and volume checks when even their best case could
+        # not lift confidence to the minimum
+        momentum_confidence = min(abs(momentum) / 0.1, 1.0)
+        if momentum_confidence * 0.5 + MAX_TREND_VOLUME_CONFIDENCE < self._min_confidence:
+            return self.get_hold_signal(f"Low confidence: momentum {momentum:.2%}")
+        
         # Calculate trend strength
         trend_strength = self._calculate_trend_strength()
         
@@ -55,55 +78,70 @@ class SimpleMomentumStrategy(BaseStrategy):
             momentum,
             trend_strength,
             volume_signal,
-            current_price,
             market_data
         )
         
         return signal
     
-    def _calculate_momentum(self) -> Decimal:
+    def _record_price(self, price: float):
+        """Append a price and update the running move counts"""
+        if self._price_history and self._move_signs.maxlen:
+            previous = self._price_history[-1]
+            sign = (price > previous) - (price < previous)
+            
+            # The oldest move leaves the window together with the oldest price
+            if len(self._move_signs) == self._move_signs.maxlen:
+                self._count_move(self._move_signs[0], -1)
+            self._move_signs.append(sign)
+            self._count_move(sign, 1)
+            
+        self._price_history.append(price)
+    
+    def _count_move(self, sign: int, delta: int):
+        if sign > 0:
+            self._positive_moves += delta
+        elif sign < 0:
+            self._negative_moves += delta
+    
+    def _calculate_momentum(self) -> float:
         if len(self._price_history) < 2:
-            return Decimal("0")
+            return 0.0
         
         # Simple momentum: (current_price - old_price) / old_price
         current_price = self._price_history[-1]
         old_price = self._price_history[0]
         
         if old_price == 0:
-            return Decimal("0")
+            return 0.0
         
-        momentum = (current_price - old_price) / old_price
-        return momentum
+        return (current_price - old_price) / old_price
     
-    def _calculate_trend_strength(self) -> Decimal:
+    def _calculate_trend_strength(self) -> float:
         if len(self._price_history) < 3:
-            return Decimal("0")
+            return 0.0
         
-        # Count positive vs negative price changes
-        positive_moves = 0
-        negative_moves = 0
-        
-        for i in range(1, len(self._price_history)):
-            if self._price_history[i] > self._price_history[i-1]:
-                positive_moves += 1
-            elif self._price_history[i] < self._price_history[i-1]:
-                negative_moves += 1
+        # Positive vs negative price changes, maintained by _record_price
+        positive_moves = self._positive_moves
+        negative_moves = self._negative_moves
         
         total_moves = positive_moves + negative_moves
         if total_moves == 0:
-            return Decimal("0")
+            return 0.0
         
         # Trend strength from -1 to 1
-        trend_strength = Decimal(str((positive_moves - negative_moves) / total_moves))
-        return trend_strength
+        return (positive_moves - negative_moves) / total_moves
     
     def _check_volume_signal(self, market_data: Dict[str, Any]) -> bool:
         # Simplified volume check - in real implementation would check actual volume
         # For now, check order book depth
         order_book = market_data.get("order_book", {})
+        bids = order_book.get("bids")
+        asks = order_book.get("asks")
+        if not bids or not asks:
+            return False
         
-        bid_depth = sum(Decimal(str(bid["amount"])) for bid in order_book.get("bids", [])[:5])
-        ask_depth = sum(Decimal(str(ask["amount"])) for ask in order_book.get("asks", [])[:5])
+        bid_depth = sum(float(bid.amount) for bid in bids[:5])
+        ask_depth = sum(float(ask.amount) for ask in asks[:5])
         
         # Good volume if balanced order book
         if bid_depth > 0 and ask_depth > 0:
@@ -114,47 +152,39 @@ class SimpleMomentumStrategy(BaseStrategy):
     
     def _generate_signal(
         self,
-        momentum: Decimal,
-        trend_strength: Decimal,
+        momentum: float,
+        trend_strength: float,
         volume_signal: bool,
-        current_price: Decimal,
         market_data: Dict[str, Any]
     ) -> Dict[str, Any]:
         # Calculate confidence based on multiple factors
         confidence = self._calculate_confidence(momentum, trend_strength, volume_signal)
         
         # Check if confidence meets minimum threshold
-        if confidence < self.parameters["min_confidence"]:
+        if confidence < self._min_confidence:
             return self.get_hold_signal(f"Low confidence: {confidence:.2f}")
         
-        # Momentum threshold
-        momentum_threshold = Decimal(str(self.parameters["momentum_threshold"]))
-        
         # Buy signal
-        if momentum > momentum_threshold and trend_strength > 0.3:
-            stop_loss = self.calculate_stop_loss(
-                current_price,
-                Decimal(str(self.parameters["stop_loss_pct"]))
-            )
-            take_profit = self.calculate_take_profit(
-                current_price,
-                Decimal(str(self.parameters["take_profit_pct"]))
-            )
+        if momentum > self._momentum_threshold and trend_strength > 0.3:
+            # Exit levels are priced off the exact Decimal quote
+            entry_price = market_data["mid_price"]
+            stop_loss = self.calculate_stop_loss(entry_price, self._stop_loss_pct)
+            take_profit = self.calculate_take_profit(entry_price, self._take_profit_pct)
             
             return self._create_signal(
                 action=SIGNAL_BUY,
-                confidence=float(confidence),
+                confidence=confidence,
                 stop_loss=stop_loss,
                 take_profit=take_profit,
                 reason=f"Positive momentum: {momentum:.2%}, Trend: {trend_strength:.2f}"
             )
         
         # Sell signal
-        elif momentum < -momentum_threshold and trend_strength < -0.3:
+        elif momentum < -self._momentum_threshold and trend_strength < -0.3:
             # For existing positions (would need position tracking)
             return self._create_signal(
                 action=SIGNAL_SELL,
-                confidence=float(confidence),
+                confidence=confidence,
                 reason=f"Negative momentum: {momentum:.2%}, Trend: {trend_strength:.2f}"
             )
         
@@ -166,24 +196,15 @@ class SimpleMomentumStrategy(BaseStrategy):
     
     def _calculate_confidence(
         self,
-        momentum: Decimal,
-        trend_strength: Decimal,
+        momentum: float,
+        trend_strength: float,
         volume_signal: bool
-    ) -> Decimal:
-        # Base confidence from momentum strength
-        momentum_confidence = min(abs(momentum) / Decimal("0.1"), Decimal("1"))  # Max 1.0 at 10% move
-        
-        # Trend contribution
-        trend_confidence = abs(trend_strength)
-        
-        # Volume contribution
-        volume_confidence = Decimal("0.2") if volume_signal else Decimal("0")
-        
-        # Weighted average
-        confidence = (
-            momentum_confidence * Decimal("0.5") +
-            trend_confidence * Decimal("0.3") +
-            volume_confidence * Decimal("0.2")
-        )
-        
-        return min(confidence, Decimal("1"))  # Cap at 1.0
\ No newline at end of file
+    ) -> float:
+        # Weighted momentum (max 1.0 at a 10% move), trend and volume scores,
+        # capped at 1.0, as one float expression
+        return min(
+            min(abs(momentum) / 0.1, 1.0) * 0.5 +
+            abs(trend_strength) * 0.3 +
+            (0.2 if volume_signal else 0.0) * 0.2,
+            1.0
+        )
\ No newline at end of file
@@ -1,6 +1,7 @@
-import asyncio
+import math
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 import ccxt.async_support as ccxt
 from loguru import logger
@@ -11,6 +12,21 @@ from decimal import Decimal
 from src.config.settings import Settings
 
 
+# Max candles per exchange request when ccxt paginates a date range
+OHLCV_BATCH_SIZE = 1000
+
+# Candle duration in minutes per ccxt timeframe (unknown timeframes count as 1h)
+TIMEFRAME_MINUTES = {
+    '1m': 1,
+    '5m': 5,
+    '15m': 15,
+    '30m': 30,
+    '1h': 60,
+    '4h': 240,
+    '1d': 1440
+}
+
+
 class DataFetcher:
     def __init__(self, settings: Settings):
         self.settings = settings
@@ -32,7 +48,8 @@ class DataFetcher:
         symbol: str = "XRP/USDT",
         timeframe: str = "1h",
         since: Optional[datetime] = None,
-        limit: int = 1000
+        limit: Optional[int] = 1000,
+        params: Optional[Dict[str, Any]] = None
     ) -> pd.DataFrame:
         """
         Fetch OHLCV data from exchange
@@ -42,6 +59,7 @@ class DataFetcher:
             timeframe: Candle timeframe (1m, 5m, 15m, 30m, 1h, 4h, 1d)
             since: Start datetime
             limit: Number of candles to fetch
+            params: Exchange-specific options passed through to ccxt
         
         Returns:
             DataFrame with columns: timestamp, open, high, low, close, volume
@@ -58,21 +76,20 @@ class DataFetcher:
                 symbol,
                 timeframe,
                 since=since_ms,
-                limit=limit
-            )
-            
-            # Convert to DataFrame
-            df = pd.DataFrame(
-                ohlcv,
-                columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']
+                limit=limit,
+                params=params or {}
             )
             
-            # Convert timestamp to datetime
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            
-            # Ensure numeric types
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+            # Convert to DataFrame from one float64 block (missing values become NaN)
+            arr = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 6)
+            df = pd.DataFrame({
+                'timestamp': pd.to_datetime(arr[:, 0].astype(np.int64), unit='ms'),
+                'open': arr[:, 1],
+                'high': arr[:, 2],
+                'low': arr[:, 3],
+                'close': arr[:, 4],
+                'volume': arr[:, 5]
+            })
             
             logger.info(f"Fetched {len(df)} candles from {df['timestamp'].min()} to {df['timestamp'].max()}")
             
@@ -106,72 +123,45 @@ class DataFetcher:
         if not end_date:
             end_date = datetime.now()
         
-        all_data = []
-        current_date = start_date
-        
         # Calculate candle duration
-        timeframe_minutes = self._timeframe_to_minutes(timeframe)
-        batch_size = 1000  # Max candles per request
+        timeframe_minutes = TIMEFRAME_MINUTES.get(timeframe, 60)
         
-        while current_date < end_date:
-            try:
-                # Fetch batch
-                df = await self.fetch_ohlcv(
-                    symbol=symbol,
-                    timeframe=timeframe,
-                    since=current_date,
-                    limit=batch_size
-                )
-                
-                if df.empty:
-                    break
-                
-                # Filter by end date
-                df = df[df['timestamp'] <= end_date]
-                
-                if not df.empty:
-                    all_data.append(df)
-                
-                # Move to next batch
-                last_timestamp = df['timestamp'].max()
-                current_date = last_timestamp + timedelta(minutes=timeframe_minutes)
-                
-                # Rate limit
-                await asyncio.sleep(0.5)
-                
-            except Exception as e:
-                logger.error(f"Error fetching batch at {current_date}: {e}")
-                await asyncio.sleep(5)  # Wait before retry
-                continue
+        # ccxt splits the range into requests, fetches them concurrently under
+        # its rate limiter and retries failed pages
+        candles = (end_date - start_date) / timedelta(minutes=timeframe_minutes)
+        try:
+            df = await self.fetch_ohlcv(
+                symbol=symbol,
+                timeframe=timeframe,
+                since=start_date,
+                limit=None,
+                params={
+                    'paginate': True,
+                    'paginationCalls': max(math.ceil(candles / OHLCV_BATCH_SIZE), 1),
+                    'maxEntriesPerRequest': OHLCV_BATCH_SIZE,
+                    'until': int(end_date.timestamp() * 1000)
+                }
+            )
+        except Exception as e:
+            logger.error(f"Error fetching {symbol} {timeframe} history: {e}")
+            return pd.DataFrame()
         
-        if all_data:
-            # Combine all data
-            result = pd.concat(all_data, ignore_index=True)
-            
-            # Remove duplicates
-            result = result.drop_duplicates(subset=['timestamp'])
-            
-            # Sort by timestamp
-            result = result.sort_values('timestamp')
-            
-            logger.info(f"Fetched total {len(result)} candles from {result['timestamp'].min()} to {result['timestamp'].max()}")
-            
-            return result
-        else:
+        # Filter by end date and drop candles repeated where pages overlap
+        # (keeping first occurrences in order) with one mask, so the frame
+        # is copied once
+        keep = (df['timestamp'] <= end_date) & ~df['timestamp'].duplicated()
+        if not keep.any():
             return pd.DataFrame()
-    
-    def _timeframe_to_minutes(self, timeframe: str) -> int:
-        """Convert timeframe string to minutes"""
-        mapping = {
-            '1m': 1,
-            '5m': 5,
-            '15m': 15,
-            '30m': 30,
-            '1h': 60,
-            '4h': 240,
-            '1d': 1440
-        }
-        return mapping.get(timeframe, 60)
+        result = df if keep.all() else df[keep]
+        result.index = pd.RangeIndex(len(result))
+        
+        # Only sort if the exchange returned candles out of order
+        if not result['timestamp'].is_monotonic_increasing:
+            result = result.sort_values('timestamp', ignore_index=True)
+        
+        logger.info(f"Fetched total {len(result)} candles from {result['timestamp'].min()} to {result['timestamp'].max()}")
+        
+        return result
     
     async def fetch_xrpl_dex_data(
         self,
@@ -192,23 +182,30 @@ class DataFetcher:
         return pd.DataFrame()
     
     async def save_data(self, df: pd.DataFrame, filename: str):
-        """Save DataFrame to CSV file"""
+        """Save DataFrame to a Parquet file, or CSV when the name ends in .csv"""
         data_dir = "data"
         import os
         os.makedirs(data_dir, exist_ok=True)
         
         filepath = os.path.join(data_dir, filename)
-        df.to_csv(filepath, index=False)
+        if filename.endswith(".csv"):
+            df.to_csv(filepath, index=False)
+        else:
+            df.to_parquet(filepath, compression="snappy", index=False)
         logger.info(f"Saved {len(df)} rows to {filepath}")
     
     async def load_data(self, filename: str) -> pd.DataFrame:
-        """Load DataFrame from CSV file"""
+        """Load DataFrame saved by ``save_data``"""
         import os
         filepath = os.path.join("data", filename)
         
         if os.path.exists(filepath):
-            df = pd.read_csv(filepath)
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
+            if filename.endswith(".csv"):
+                df = pd.read_csv(filepath)
+                df['timestamp'] = pd.to_datetime(df['timestamp'])
+            else:
+                # Parquet keeps column dtypes, timestamps included
+                df = pd.read_parquet(filepath)
             logger.info(f"Loaded {len(df)} rows from {filepath}")
             return df
         else:
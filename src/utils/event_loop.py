@@ -0,0 +1,19 @@
+import asyncio
+
+from loguru import logger
+
+
+def use_uvloop() -> bool:
+    """Run asyncio on uvloop when it is installed
+
+    Must be called before ``asyncio.run``. uvloop does not support Windows,
+    where the default event loop is kept.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        logger.debug("uvloop not installed, using the default asyncio event loop")
+        return False
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
@@ -0,0 +1,10 @@
+import pandas as pd
+
+
+def downcast_floats(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert float64 columns to float32 for ML processing and storage"""
+    float_columns = df.select_dtypes("float64").columns
+    if len(float_columns) == 0:
+        return df
+
+    return df.astype({column: "float32" for column in float_columns})
@@ -0,0 +1,52 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+import aiohttp
+from aiolimiter import AsyncLimiter
+from loguru import logger
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+
+
+# Bound every request so one hung endpoint cannot stall sibling fetches
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=20, connect=5, sock_read=15)
+
+
+def new_session() -> aiohttp.ClientSession:
+    """HTTP session with bounded timeouts and per-host connection cap"""
+    return aiohttp.ClientSession(
+        timeout=HTTP_TIMEOUT,
+        connector=aiohttp.TCPConnector(limit_per_host=10),
+        trust_env=True
+    )
+
+
+@retry(
+    retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError)),
+    wait=wait_exponential_jitter(initial=1, max=30),
+    stop=stop_after_attempt(5),
+    reraise=True
+)
+async def get_json(
+    session: aiohttp.ClientSession,
+    limiter: AsyncLimiter,
+    source: str,
+    url: str,
+    params: Optional[Dict[str, Any]] = None
+) -> Optional[Any]:
+    """Rate-limited GET that retries transient failures with backoff"""
+    async with limiter:
+        async with session.get(url, params=params) as response:
+            # Surface throttling and server errors so they get retried
+            if response.status == 429 or response.status >= 500:
+                response.raise_for_status()
+
+            if response.status == 200:
+                return await response.json()
+
+            logger.warning(f"{source} API returned {response.status}")
+            return None
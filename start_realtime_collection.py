@@ -10,6 +10,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from src.realtime.collection_manager import main
+from src.utils.event_loop import use_uvloop
 
 if __name__ == "__main__":
     print("="*60)
@@ -23,6 +24,7 @@ if __name__ == "__main__":
     print("\nPress Ctrl+C to stop")
     print("="*60)
     
+    use_uvloop()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
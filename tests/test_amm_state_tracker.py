@@ -0,0 +1,153 @@
+import importlib.util
+import sys
+import types
+
+import pytest
+
+
+def stub_if_missing(name, attr):
+    """Register an empty placeholder for a collector module absent from the tree
+
+    Importing the tracker runs src/realtime/__init__, which pulls in the
+    collectors; the tracker itself needs neither of them.
+    """
+    if importlib.util.find_spec(name) is None:
+        module = types.ModuleType(name)
+        setattr(module, attr, type(attr, (), {}))
+        sys.modules[name] = module
+
+
+stub_if_missing("src.data.metadata_processor", "MetadataProcessor")
+stub_if_missing("src.data.full_history_collector", "FullHistoryCollector")
+
+from src.realtime import amm_state_tracker  # noqa: E402
+
+AMM_ACCOUNT = "rHUpaqUPbwzKZdzQ8ZQCme18FrgW9pB4am"
+GATEHUB = "rhub8VRN55s94qWKDv6jmDy1pUykJzF3wq"
+BITSTAMP = "rvYAfWj5gh67oV6fW32ZzP3Aw4Eubs59B"
+TRADER = "rPEPPER7kfTD9w2To4CQk6UCfuHM9c6GDY"
+ACCOUNT_ONE = "rrrrrrrrrrrrrrrrrrrrBZbvji"
+
+
+def trust_line(currency, value, low, high):
+    return {
+        "ModifiedNode": {
+            "LedgerEntryType": "RippleState",
+            "FinalFields": {
+                "Balance": {"currency": currency, "issuer": ACCOUNT_ONE, "value": value},
+                "Flags": 16908288,
+                "HighLimit": {"currency": currency, "issuer": high, "value": "0"},
+                "LowLimit": {"currency": currency, "issuer": low, "value": "0"}
+            },
+            "PreviousFields": {
+                "Balance": {"currency": currency, "issuer": ACCOUNT_ONE, "value": "0"}
+            }
+        }
+    }
+
+
+@pytest.fixture
+def tracker():
+    return amm_state_tracker.AMMStateTracker(storage=None)
+
+
+@pytest.fixture
+def xrp_usd_deposit():
+    # AMMDeposit into an XRP/USD.GateHub pool
+    return {
+        "ledger_index": 86543210,
+        "tx": {"TransactionType": "AMMDeposit", "Account": TRADER},
+        "meta": {
+            "TransactionResult": "tesSUCCESS",
+            "AffectedNodes": [
+                {
+                    "ModifiedNode": {
+                        "LedgerEntryType": "AMM",
+                        "FinalFields": {
+                            "Account": AMM_ACCOUNT,
+                            "Asset": {"currency": "XRP"},
+                            "Asset2": {"currency": "USD", "issuer": GATEHUB},
+                            "LPTokenBalance": {
+                                "currency": "03930D02208264E2E40EC1B0C09E4DB96EE197B1",
+                                "issuer": AMM_ACCOUNT,
+                                "value": "1414213.562373095"
+                            },
+                            "TradingFee": 500
+                        }
+                    }
+                },
+                {
+                    "ModifiedNode": {
+                        "LedgerEntryType": "AccountRoot",
+                        "FinalFields": {
+                            "Account": AMM_ACCOUNT,
+                            "Balance": "2000000000000",
+                            "OwnerCount": 1,
+                            "Sequence": 0
+                        },
+                        "PreviousFields": {"Balance": "1999000000000"}
+                    }
+                },
+                # The AMM sorts high against GateHub, so its USD is a negative balance
+                trust_line("USD", "-1000000", GATEHUB, AMM_ACCOUNT),
+                {
+                    "ModifiedNode": {
+                        "LedgerEntryType": "AccountRoot",
+                        "FinalFields": {"Account": TRADER, "Balance": "99000000"},
+                        "PreviousFields": {"Balance": "1099000012"}
+                    }
+                }
+            ]
+        }
+    }
+
+
+@pytest.fixture
+def usd_eur_swap():
+    # Payment crossing a USD.GateHub/EUR.Bitstamp pool; the AMM entry itself
+    # is untouched, only the pool's trust lines move
+    return {
+        "ledger_index": 86543211,
+        "tx": {"TransactionType": "Payment", "Account": TRADER},
+        "meta": {
+            "TransactionResult": "tesSUCCESS",
+            "AffectedNodes": [
+                trust_line("USD", "-5010", GATEHUB, AMM_ACCOUNT),
+                trust_line("EUR", "4610.25", AMM_ACCOUNT, BITSTAMP),
+                trust_line("USD", "-90", GATEHUB, TRADER)
+            ]
+        }
+    }
+
+
+def test_amm_info_from_meta_xrp_iou(tracker, xrp_usd_deposit):
+    info = tracker.amm_info_from_meta(xrp_usd_deposit, AMM_ACCOUNT)
+
+    assert info["Asset"] == {"currency": "XRP"}
+    assert info["Amount"] == "2000000000000"
+    assert info["Amount2"] == {"currency": "USD", "issuer": GATEHUB, "value": "1000000"}
+    assert info["LPTokenBalance"]["value"] == "1414213.562373095"
+    assert info["TradingFee"] == 500
+
+
+def test_amm_info_from_meta_iou_iou(tracker, usd_eur_swap):
+    tracker._pool_info[AMM_ACCOUNT] = {
+        "Asset": {"currency": "USD", "issuer": GATEHUB},
+        "Asset2": {"currency": "EUR", "issuer": BITSTAMP},
+        "Amount": {"currency": "USD", "issuer": GATEHUB, "value": "5100"},
+        "Amount2": {"currency": "EUR", "issuer": BITSTAMP, "value": "4530"},
+        "TradingFee": 300
+    }
+
+    info = tracker.amm_info_from_meta(usd_eur_swap, AMM_ACCOUNT)
+
+    assert info["Amount"] == {"currency": "USD", "issuer": GATEHUB, "value": "5010"}
+    assert info["Amount2"] == {"currency": "EUR", "issuer": BITSTAMP, "value": "4610.25"}
+    assert info["TradingFee"] == 300
+    # The cached state is patched on a copy, not in place
+    assert tracker._pool_info[AMM_ACCOUNT]["Amount"]["value"] == "5100"
+
+
+def test_amm_info_from_meta_needs_known_assets(tracker, usd_eur_swap):
+    # Without an AMM node or prior state the trust lines cannot be matched to sides
+    assert tracker.amm_info_from_meta(usd_eur_swap, AMM_ACCOUNT) is None
@@ -0,0 +1,30 @@
+import csv
+from datetime import datetime
+
+import pandas as pd
+from src.database.models import PriceData, _copy_buffer, _copy_value
+
+
+def test_copy_value_casts_integer_columns():
+    assert _copy_value(5.0, integer=True) == 5
+    assert _copy_value(float("nan"), integer=True) == "\\N"
+    assert _copy_value(None, integer=True) == "\\N"
+    assert _copy_value(5.5) == 5.5
+
+
+def test_copy_buffer_writes_nan_int_column_as_integers():
+    # An int column with a missing value comes out of pandas as float64
+    frame = pd.DataFrame({
+        "timestamp": [datetime(2024, 1, 14, 10), datetime(2024, 1, 14, 11)],
+        "pair": ["XRP/USDT", "XRP/USDT"],
+        "close": [0.55, 0.56],
+        "trades_count": [5, None],
+    })
+    assert frame["trades_count"].dtype == "float64"
+
+    columns = list(frame.columns)
+    rows = list(csv.reader(_copy_buffer(PriceData, columns, frame.to_dict("records"))))
+
+    trades_count = columns.index("trades_count")
+    assert [row[trades_count] for row in rows] == ["5", "\\N"]
+    assert rows[0][columns.index("close")] == "0.55"
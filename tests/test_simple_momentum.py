@@ -2,6 +2,7 @@ import pytest
 from decimal import Decimal
 from src.strategies.simple_momentum import SimpleMomentumStrategy
 from src.config.constants import SIGNAL_BUY, SIGNAL_SELL, SIGNAL_HOLD
+from src.exchanges.order_book import OrderEntry
 
 
 @pytest.fixture
@@ -20,8 +21,8 @@ def sample_market_data():
         "spread": Decimal("0.01"),
         "spread_percentage": Decimal("1.8"),
         "order_book": {
-            "bids": [{"price": 0.55, "amount": 1000}],
-            "asks": [{"price": 0.56, "amount": 1000}]
+            "bids": [OrderEntry(Decimal("0.55"), Decimal("1000"), Decimal("550"))],
+            "asks": [OrderEntry(Decimal("0.56"), Decimal("1000"), Decimal("560"))]
         }
     }
 
@@ -46,8 +47,8 @@ async def test_insufficient_history(strategy, sample_market_data):
 async def test_momentum_calculation(strategy, sample_market_data):
     # Fill price history with upward trend
     for i in range(20):
-        price = Decimal("0.50") + Decimal("0.01") * i
-        strategy._price_history.append(price)
+        price = 0.50 + 0.01 * i
+        strategy._record_price(price)
     
     momentum = strategy._calculate_momentum()
     assert momentum > 0  # Positive momentum for upward trend
@@ -57,8 +58,8 @@ async def test_momentum_calculation(strategy, sample_market_data):
 async def test_buy_signal(strategy, sample_market_data):
     # Create strong upward momentum
     for i in range(20):
-        price = Decimal("0.50") + Decimal("0.002") * i
-        strategy._price_history.append(price)
+        price = 0.50 + 0.002 * i
+        strategy._record_price(price)
     
     signal = await strategy.analyze(sample_market_data)
     
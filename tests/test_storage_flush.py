@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+from src.database.storage import DataStorage
+
+
+class RecordingStorage(DataStorage):
+    """DataStorage with its queues but no database; bulk writes are recorded"""
+
+    def __init__(self):
+        self._dex_queue = []
+        self._token_tx_queue = []
+        self._amm_snapshot_queue = []
+        self._amm_state_queue = []
+        self._flushers = {}
+        self._flush_locks = {}
+        self.stored = []
+        self.writing = asyncio.Event()
+
+    async def store_amm_snapshots_bulk(self, snapshots):
+        # Two suspension points, like the resolve-rows and insert thread hops
+        self.writing.set()
+        await asyncio.sleep(0.05)
+        await asyncio.sleep(0.05)
+        self.stored.extend(snapshots)
+        return len(snapshots)
+
+    async def store_dex_trades_bulk(self, trades):
+        return len(trades)
+
+    async def store_token_transactions_bulk(self, transactions):
+        return len(transactions)
+
+    def store_amm_states_bulk(self, states):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_flush_all_during_timed_flush_keeps_every_snapshot():
+    storage = RecordingStorage()
+
+    for ledger_index in range(3):
+        await storage.store_amm_snapshot({"ledger_index": ledger_index})
+
+    # Stop the flusher while its batch is halfway through being written
+    await asyncio.wait_for(storage.writing.wait(), timeout=1)
+    await storage.store_amm_snapshot({"ledger_index": 3})
+    await storage.flush_all()
+
+    assert sorted(row["ledger_index"] for row in storage.stored) == [0, 1, 2, 3]
+    assert storage._amm_snapshot_queue == []
+    assert storage._flushers == {}